@@ -8,7 +8,11 @@ from qasync import QEventLoop
 import logging
 
 from config import load_settings
-from logger_config import setup_logging
+from config_store import config_store
+from state_store import StateStore
+from latency import latency_tracker
+from control_scheduler import control_scheduler, PRIORITY_DISPLAY
+from logger_config import setup_logging, add_log_sink
 
 # Import the GUI modules
 from gui.network_config_tab import NetworkConfigTab
@@ -17,7 +21,12 @@ from gui.ton_damage_system_tab import TonDamageSystemTab
 from gui.log_viewer_tab import LogViewerTab
 from gui.osc_parameters import OSCParametersTab
 
-setup_logging()
+_logging_settings = load_settings() or {}
+setup_logging(
+    log_dir=_logging_settings.get('log_dir'),
+    max_bytes=_logging_settings.get('log_max_bytes', 5 * 1024 * 1024),
+    backup_count=_logging_settings.get('log_backup_count', 5)
+)
 # Configure the logger
 logger = logging.getLogger(__name__)
 
@@ -42,12 +51,20 @@ class MainWindow(QMainWindow):
             'interface': '',
             'ip': '',
             'port': 5678,
-            'osc_port': 9001
+            'osc_port': 9001,
+            'float_output_rate': 20,
+            'pulse_buffer_seconds': 2.0,
+            'log_viewer_capacity': 500,
+            'gui_refresh_rate': 30,
+            'slider_output_rate': 10,
+            'latency_tracking': True
         }
+        latency_tracker.enabled = self.settings.get('latency_tracking', True)
 
         # Set initial controller to None
         self.controller = None
         self.app_status_online = False
+        self.state_store = StateStore()  # 控制器狀態, 界面按幀合併刷新
 
         # Create the tab widget
         self.tab_widget = QTabWidget()
@@ -67,25 +84,36 @@ class MainWindow(QMainWindow):
         self.tab_widget.addTab(self.osc_parameters_tab, "OSC參數配置")
         self.tab_widget.addTab(self.ton_damage_system_tab, "ToN遊戲同步")
         self.tab_widget.addTab(self.log_viewer_tab, "日誌查看")
+        # 地址列表變化時更新 OSC 映射, 只在此處連接一次
+        self.osc_parameters_tab.addresses_updated.connect(self.network_config_tab.update_osc_mappings)
+
+        # 各頁面訂閱控制器狀態, 每幀僅應用有變化的欄位
+        self.state_views = [
+            (self.state_store.subscribe(), self.network_config_tab.apply_state),
+            (self.state_store.subscribe(), self.controller_settings_tab.apply_state),
+        ]
+        refresh_rate = min(max(self.settings.get('gui_refresh_rate', 30), 1), 60)
+        self.state_refresh_job = control_scheduler.every(
+            'state_refresh', 1.0 / refresh_rate, self.refresh_state_views, PRIORITY_DISPLAY)
 
         # Setup logging to the log viewer
         self.app_setup_logging()
 
+    def refresh_state_views(self):
+        """將自上一幀以來變化的狀態應用到各頁面"""
+        for subscription, apply_state in self.state_views:
+            changes = subscription.take_changes()
+            if changes:
+                apply_state(changes)
+
     def app_setup_logging(self):
-        """設置日誌系統輸出到 QTextEdit 和控制台"""
+        """設置日誌系統輸出到日誌查看頁的環形緩衝區"""
         logger = logging.getLogger()
         logger.setLevel(logging.INFO)
 
-        # 創建 QTextEditHandler 並添加到日誌系統中
+        # 將日誌查看頁的處理器添加到後台日誌線程的輸出中
         self.log_handler = self.log_viewer_tab.log_handler
-        logger.addHandler(self.log_handler)
-
-        # 限制日誌框中的最大行數
-        self.log_viewer_tab.log_text_edit.textChanged.connect(lambda: self.limit_log_lines(max_lines=100))
-
-    def limit_log_lines(self, max_lines=500):
-        """限制 QTextEdit 中的最大行數，保留顏色和格式，並保持顯示最新日誌"""
-        self.log_viewer_tab.limit_log_lines(max_lines)
+        add_log_sink(self.log_handler)
 
     def update_current_channel_display(self, channel_name):
         """Update current selected channel display."""
@@ -101,6 +129,8 @@ if __name__ == "__main__":
 
     window = MainWindow()
     window.show()
+    control_scheduler.start(loop)  # 界面頁面在事件循環啟動前已註冊定時任務
 
     with loop:
         loop.run_forever()
+    config_store.flush()  # 寫入退出前尚未保存的修改
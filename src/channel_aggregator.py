@@ -0,0 +1,145 @@
+"""
+channel_aggregator.py
+交互模式的多來源合併: 每個通道保存各 OSC 地址的最新強度, 每個控制週期按合併方式計算一次目標強度
+"""
+import time
+
+from pydglab_ws import Channel
+
+from latency import current_trace
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+REDUCER_MAX = 'max'  # 取各來源中最大的強度
+REDUCER_SUM = 'sum'  # 按權重求和, 不超過強度上限
+REDUCER_PRIORITY = 'priority'  # 使用優先級最高的活動來源, 同優先級取最近更新的
+REDUCERS = (REDUCER_MAX, REDUCER_SUM, REDUCER_PRIORITY)
+
+
+class FloatSource:
+    __slots__ = ('strength', 'value', 'weight', 'priority', 'updated_at', 'trace')
+
+    def __init__(self, strength, value, weight, priority, updated_at, trace):
+        self.strength = strength  # 經過響應曲線後的強度
+        self.value = value  # 原始輸入, 大於 0 表示來源處於活動狀態
+        self.weight = weight
+        self.priority = priority
+        self.updated_at = updated_at
+        self.trace = trace
+
+
+def reduce_sources(reducer, sources, limit):
+    """按合併方式計算目標強度, sources 為空時返回 0"""
+    if not sources:
+        return 0
+    if reducer == REDUCER_SUM:
+        return min(round(sum(source.strength * source.weight for source in sources)), limit)
+    if reducer == REDUCER_PRIORITY:
+        active = [source for source in sources if source.value > 0] or sources
+        return max(active, key=lambda source: (source.priority, source.updated_at)).strength
+    return max(source.strength for source in sources)
+
+
+class ChannelAggregator:
+    """
+    submit 只更新來源的最新值, evaluate 由 StrengthCoalescer 在每次發送前調用
+    N 個來源在一個週期內的多次輸入只產生一次強度寫入
+    """
+
+    def __init__(self, coalescer, get_limit, is_active, reducer=REDUCER_MAX, timeout=0.0, clock=time.monotonic):
+        """
+        :param coalescer: 接收合併結果的 StrengthCoalescer
+        :param get_limit: get_limit(channel) 返回通道強度上限
+        :param is_active: is_active(channel) 返回通道是否處於交互模式, 非交互模式時清空來源且不輸出
+        :param reducer: 合併方式, 或 {'A': 合併方式, 'B': 合併方式}
+        :param timeout: 來源超過此秒數未更新時移除, 0 表示不過期
+            VRChat 只在參數變化時發送, 保持不動的 Contact/PhysBone 不會持續更新, 過短的超時會中斷保持的輸出
+        """
+        self.coalescer = coalescer
+        self.get_limit = get_limit
+        self.is_active = is_active
+        self.clock = clock
+        self.timeout = timeout
+        self.sources = {Channel.A: {}, Channel.B: {}}  # 通道 -> {來源地址: FloatSource}
+        self.dirty = {Channel.A: False, Channel.B: False}
+        self.reducers = {Channel.A: REDUCER_MAX, Channel.B: REDUCER_MAX}
+        self.set_reducer(reducer)
+        # 統計計數
+        self.inputs_received = {Channel.A: 0, Channel.B: 0}
+        self.evaluations = {Channel.A: 0, Channel.B: 0}
+        self.expired = {Channel.A: 0, Channel.B: 0}
+        coalescer.aggregator = self
+
+    def set_reducer(self, reducer):
+        if not isinstance(reducer, dict):
+            reducer = {'A': reducer, 'B': reducer}
+        for channel in (Channel.A, Channel.B):
+            name = reducer.get(channel.name, self.reducers[channel])
+            if name not in REDUCERS:
+                logger.warning(f"未知的合併方式 {name}, 通道 {channel.name} 使用 {REDUCER_MAX}")
+                name = REDUCER_MAX
+            self.reducers[channel] = name
+            if self.sources[channel]:
+                self.dirty[channel] = True
+
+    def submit(self, channel, source, strength, value, weight=1.0, priority=0):
+        """
+        記錄來源的最新強度
+        :param source: 來源標識, 一般為 OSC 地址
+        :param value: 原始輸入值, 用於判斷來源是否活動
+        """
+        self.inputs_received[channel] += 1
+        self.sources[channel][source] = FloatSource(strength, value, weight, priority, self.clock(), current_trace.get())
+        self.dirty[channel] = True
+
+    def remove_source(self, source, channels=(Channel.A, Channel.B)):
+        """
+        移除地址在指定通道上的來源, 用於地址被刪除或取消勾選通道時
+        未設置超時時來源不會過期, 不移除則通道會一直保持該來源最後的強度
+        """
+        for channel in channels:
+            if self.sources[channel].pop(source, None) is not None:
+                self.dirty[channel] = True
+
+    def clear(self, channel=None):
+        for target in ((channel,) if channel is not None else (Channel.A, Channel.B)):
+            self.sources[target].clear()
+            self.dirty[target] = False
+
+    def evaluate(self):
+        """移除過期來源, 並將有變化的通道的合併結果提交給 coalescer"""
+        now = self.clock()
+        for channel in (Channel.A, Channel.B):
+            sources = self.sources[channel]
+            if not sources and not self.dirty[channel]:
+                continue  # 移除最後一個來源後仍需提交一次 0
+            if not self.is_active(channel):
+                self.clear(channel)
+                continue
+            if self.timeout > 0:
+                expired = [source for source, entry in sources.items() if now - entry.updated_at > self.timeout]
+                for source in expired:
+                    del sources[source]
+                if expired:
+                    self.expired[channel] += len(expired)
+                    self.dirty[channel] = True
+            if not self.dirty[channel]:
+                continue
+            self.dirty[channel] = False
+            self.evaluations[channel] += 1
+            entries = list(sources.values())
+            newest = max(entries, key=lambda entry: entry.updated_at) if entries else None
+            strength = reduce_sources(self.reducers[channel], entries, self.get_limit(channel))
+            self.coalescer.submit(channel, strength, trace=newest.trace if newest else None)
+
+    def get_stats(self):
+        """
+        返回 {'A': (sources, inputs, evaluations, expired), 'B': ...}
+        """
+        return {
+            channel.name: (len(self.sources[channel]), self.inputs_received[channel],
+                           self.evaluations[channel], self.expired[channel])
+            for channel in (Channel.A, Channel.B)
+        }
@@ -1,9 +1,10 @@
-import os
-import yaml
+import copy
 import psutil
 import socket
 import ipaddress
 
+from config_store import config_store
+
 import logging
 logger = logging.getLogger(__name__)
 
@@ -33,17 +34,31 @@ def validate_port(port):
     except ValueError:
         return False
 
-# Load the configuration from a YAML file
+# Load the configuration from config.yml (or the legacy settings.yml)
 def load_settings():
-    if os.path.exists('settings.yml'):
-        with open('settings.yml', 'r') as f:
-            logger.info("settings.yml found")
-            return yaml.safe_load(f)
-    logger.info("No settings.yml found")
-    return None
-
-# Save the configuration to a YAML file
+    settings = config_store.get('settings')
+    if settings is None:
+        logger.info("No saved settings found")
+    return settings
+
+# Save the configuration, written to disk after edits settle
 def save_settings(settings):
-    with open('settings.yml', 'w') as f:
-        yaml.dump(settings, f)
-        logger.info("settings.yml saved")
+    config_store.set('settings', dict(settings))
+
+# 默認的自訂 OSC 地址 (未保存過地址時使用)
+DEFAULT_OSC_ADDRESSES = [
+    {'address': '/avatar/parameters/DG-LAB/*', 'channels': {'A': True}},
+    {'address': '/avatar/parameters/Tail_Stretch', 'channels': {'B': True}},
+]
+
+# Load the custom OSC addresses from config.yml (or the legacy osc_addresses.yml)
+def load_osc_addresses():
+    addresses = config_store.get('osc_addresses')
+    if addresses is not None:
+        logger.info("OSC addresses loaded.")
+        return copy.deepcopy(addresses)
+    return [dict(addr, channels=dict(addr['channels'])) for addr in DEFAULT_OSC_ADDRESSES]
+
+# Save the custom OSC addresses, written to disk after edits settle
+def save_osc_addresses(addresses):
+    config_store.set('osc_addresses', copy.deepcopy(addresses))
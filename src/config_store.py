@@ -0,0 +1,163 @@
+"""
+config_store.py
+設置與 OSC 地址合併存放在同一個帶版本號的 config.yml 中; 修改後延遲合併寫入, 在後台線程中以臨時文件 + 改名的方式原子寫入
+"""
+import asyncio
+import copy
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import yaml
+
+from control_scheduler import control_scheduler, PRIORITY_DISPLAY
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 有 libyaml 時使用 C 實現的解析與輸出
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+YamlDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+CONFIG_FILE = 'config.yml'
+CONFIG_VERSION = 1
+# 舊版本分開存放的文件, config.yml 不存在時從中遷移
+LEGACY_SETTINGS_FILE = 'settings.yml'
+LEGACY_OSC_ADDRESSES_FILE = 'osc_addresses.yml'
+
+
+def read_yaml(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.load(f, Loader=YamlLoader)
+
+
+def write_yaml_atomic(path, data):
+    """寫入同目錄下的臨時文件後改名覆蓋, 寫入中途退出不會留下不完整的文件"""
+    text = yaml.dump(data, Dumper=YamlDumper, allow_unicode=True, sort_keys=False)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path), suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class ConfigStore:
+    """
+    文件內容: {'version': 1, 'settings': {...}, 'osc_addresses': [...]}
+    save_* 只更新內存中的文檔並重新計時, 停止修改 debounce 秒後才寫入一次
+    """
+
+    def __init__(self, path=CONFIG_FILE, debounce=0.5):
+        self.path = path
+        self.debounce = debounce
+        self.document = None  # 首次讀取時載入
+        self.save_job = None
+        # 修改時遞增 revision, 寫入成功後才更新 saved_revision; 寫入失敗的修改保持未保存, 由下一次保存或 flush 重試
+        self.revision = 0
+        self.saved_revision = 0
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='config-writer')  # 單線程保證寫入順序
+        self.writes = 0
+
+    def load(self):
+        if self.document is None:
+            self.document = self._read()
+        return self.document
+
+    def _read(self):
+        if os.path.exists(self.path):
+            try:
+                document = read_yaml(self.path) or {}
+                logger.info(f"{self.path} 已載入")
+                return self._migrate(document)
+            except (OSError, yaml.YAMLError) as e:
+                logger.error(f"讀取 {self.path} 失敗, 使用預設設置: {e}")
+                return {'version': CONFIG_VERSION}
+        document = {'version': CONFIG_VERSION}
+        for key, legacy_path in (('settings', LEGACY_SETTINGS_FILE), ('osc_addresses', LEGACY_OSC_ADDRESSES_FILE)):
+            if os.path.exists(legacy_path):
+                try:
+                    document[key] = read_yaml(legacy_path)
+                    logger.info(f"已從 {legacy_path} 遷移設置, 下次保存時寫入 {self.path}")
+                except (OSError, yaml.YAMLError) as e:
+                    logger.error(f"讀取 {legacy_path} 失敗: {e}")
+        return document
+
+    def _migrate(self, document):
+        """按版本號升級舊的文檔結構"""
+        version = document.get('version', 1)
+        if version > CONFIG_VERSION:
+            logger.warning(f"{self.path} 的版本 {version} 高於當前支持的版本 {CONFIG_VERSION}, 未知欄位保存時將保留")
+        document['version'] = max(version, CONFIG_VERSION)
+        return document
+
+    @property
+    def dirty(self):
+        """有尚未成功寫入的修改"""
+        return self.revision != self.saved_revision
+
+    def get(self, key, default=None):
+        return self.load().get(key, default)
+
+    def set(self, key, value):
+        """更新文檔中的一個區段並安排延遲寫入"""
+        self.load()[key] = value
+        self.revision += 1
+        self.schedule_save()
+
+    def schedule_save(self):
+        if self.save_job is not None:
+            self.save_job.cancel()
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self.save_job = None
+            self.flush()  # 事件循環外 (例如退出時) 直接同步寫入
+            return
+        self.save_job = control_scheduler.call_later('config_save', self.debounce, self._write_async, PRIORITY_DISPLAY)
+
+    def _write_async(self):
+        self.save_job = None
+        document = copy.deepcopy(self.document)  # 後台線程只讀取副本
+        future = asyncio.get_running_loop().run_in_executor(self.executor, self._write, document, self.revision)
+        future.add_done_callback(self._on_written)
+
+    def _write(self, document, revision):
+        """寫入成功後才標記為已保存, 失敗時拋出的異常由調用方記錄"""
+        write_yaml_atomic(self.path, document)
+        self.saved_revision = max(self.saved_revision, revision)
+        self.writes += 1
+        return self.path
+
+    def _on_written(self, future):
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            logger.error(f"保存 {self.path} 失敗: {future.exception()}")
+            return
+        logger.info(f"{self.path} 已保存")
+
+    def flush(self):
+        """立即同步寫入尚未保存的修改, 用於退出前"""
+        if self.save_job is not None:
+            self.save_job.cancel()
+            self.save_job = None
+        self.executor.submit(lambda: None).result()  # 等待已提交的後台寫入完成, 失敗的寫入在此重試
+        if not self.dirty:
+            return
+        try:
+            self._write(self.document, self.revision)
+        except (OSError, yaml.YAMLError) as e:
+            logger.error(f"保存 {self.path} 失敗: {e}")
+
+
+config_store = ConfigStore()
@@ -0,0 +1,227 @@
+"""
+control_scheduler.py
+統一的定時任務排程: 週期任務與按鍵長按計時按截止時間排序, 由單個 asyncio 任務依次觸發, 並記錄每個任務的超時統計
+"""
+import asyncio
+import functools
+import heapq
+import inspect
+import itertools
+import time
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 同一時刻到期的任務按優先級從小到大執行
+PRIORITY_CONTROL = 0  # 強度與波形輸出
+PRIORITY_STATUS = 10  # ChatBox 等狀態回報
+PRIORITY_DISPLAY = 20  # 界面刷新
+
+
+class ScheduledJob:
+    """
+    由 ControlScheduler.every / call_later 返回, 調用 cancel 取消
+    """
+    __slots__ = ('name', 'callback', 'interval', 'priority', 'error_backoff', 'deadline', 'cancelled', 'task',
+                 'runs', 'late', 'overruns', 'skipped', 'errors', 'max_lateness', 'max_duration', 'total_duration')
+
+    def __init__(self, name, callback, interval, priority, error_backoff, deadline):
+        self.name = name
+        self.callback = callback
+        self.interval = interval  # None 表示只執行一次
+        self.priority = priority
+        self.error_backoff = error_backoff  # 出錯後額外推遲的秒數
+        self.deadline = deadline  # time.monotonic
+        self.cancelled = False
+        self.task = None  # 協程回調執行中的任務
+        self.runs = 0
+        self.late = 0  # 開始時間晚於截止時間超過容差的次數
+        self.overruns = 0  # 執行結束時已錯過下一個截止時間, 或到期時上一次執行仍未完成的次數
+        self.skipped = 0  # 因超時跳過的週期數
+        self.errors = 0
+        self.max_lateness = 0.0
+        self.max_duration = 0.0
+        self.total_duration = 0.0
+
+    def cancel(self):
+        self.cancelled = True
+        if self.task is not None:
+            self.task.cancel()
+
+
+class ControlScheduler:
+    """
+    截止時間排序的定時器: 只在最近的截止時間喚醒一次事件循環, 週期任務按固定頻率排程不累積漂移
+    回調可以是普通函數或協程函數; 普通函數在排程任務中直接執行, 應當很快完成
+    協程作為獨立任務執行, 可能長時間等待 (如 App 斷線時 ensure_bind 等待重新綁定) 而不阻塞其他任務,
+    到期時同一任務的上一次執行仍未完成則跳過本次, 記為 overrun
+    """
+
+    def __init__(self, tolerance=0.005):
+        """
+        :param tolerance: 開始時間晚於截止時間多少秒記為延遲
+        """
+        self.tolerance = tolerance
+        self.jobs = []  # 未取消的任務, 用於統計
+        self.heap = []  # (截止時間, 優先級, 序號, 任務)
+        self.sequence = itertools.count()
+        self.runner = None
+        self.wakeup = None  # 等待中的 Future, 新任務早於當前等待的截止時間時提前喚醒
+        self.ticks = 0  # 實際喚醒並執行任務的次數
+
+    def every(self, name, interval, callback, priority=PRIORITY_CONTROL, delay=None, error_backoff=0.0):
+        """
+        註冊週期任務
+        :param delay: 第一次執行前的等待時間, 預設為 interval
+        """
+        job = ScheduledJob(name, callback, interval, priority, error_backoff,
+                           time.monotonic() + (interval if delay is None else delay))
+        self._push(job)
+        return job
+
+    def call_later(self, name, delay, callback, priority=PRIORITY_CONTROL):
+        """註冊只執行一次的任務, 例如長按計時"""
+        job = ScheduledJob(name, callback, None, priority, 0.0, time.monotonic() + delay)
+        self._push(job)
+        return job
+
+    def _push(self, job):
+        if job not in self.jobs:
+            self.jobs.append(job)
+        heapq.heappush(self.heap, (job.deadline, job.priority, next(self.sequence), job))
+        if self.wakeup is not None and not self.wakeup.done():
+            self.wakeup.set_result(None)
+        if self.runner is None or self.runner.done():
+            try:
+                self.start(asyncio.get_running_loop())
+            except RuntimeError:
+                pass  # 尚未進入事件循環, 由 start 啟動
+
+    def start(self, loop=None):
+        if self.runner is None or self.runner.done():  # 上一個事件循環結束時任務已被取消
+            loop = loop or asyncio.get_event_loop()
+            self.runner = loop.create_task(self._run())
+
+    def close(self):
+        if self.runner is not None:
+            self.runner.cancel()
+            self.runner = None
+        for job in self.jobs:
+            if job.task is not None:
+                job.task.cancel()
+
+    async def _sleep_until(self, deadline):
+        loop = asyncio.get_running_loop()
+        self.wakeup = loop.create_future()
+        handle = None
+        if deadline is not None:
+            handle = loop.call_later(max(0.0, deadline - time.monotonic()),
+                                     lambda future=self.wakeup: future.done() or future.set_result(None))
+        try:
+            await self.wakeup
+        finally:
+            if handle is not None:
+                handle.cancel()
+            self.wakeup = None
+
+    async def _run(self):
+        while True:
+            while self.heap and (self.heap[0][3].cancelled or self.heap[0][3].deadline != self.heap[0][0]):
+                job = heapq.heappop(self.heap)[3]  # 已取消或已重新排程的舊條目
+                if job.cancelled and job in self.jobs:
+                    self.jobs.remove(job)
+            if not self.heap:
+                await self._sleep_until(None)
+                continue
+            if self.heap[0][0] > time.monotonic():
+                await self._sleep_until(self.heap[0][0])
+                continue
+
+            now = time.monotonic()
+            due = []
+            while self.heap and self.heap[0][0] <= now:
+                deadline, _, _, job = heapq.heappop(self.heap)
+                if not job.cancelled and job.deadline == deadline:
+                    due.append(job)
+            due.sort(key=lambda job: job.priority)
+            self.ticks += 1
+            for job in due:
+                await self._execute(job)
+
+    async def _execute(self, job):
+        start = time.monotonic()
+        lateness = start - job.deadline
+        if lateness > self.tolerance:
+            job.late += 1
+        job.max_lateness = max(job.max_lateness, lateness)
+        if job.task is not None:  # 上一次的協程仍在執行, 不疊加新的執行
+            job.overruns += 1
+            job.skipped += 1
+            self._reschedule(job)
+            return
+        try:
+            result = job.callback()
+        except Exception as e:
+            self._record(job, start, e)
+            self._reschedule(job, job.error_backoff)
+            return
+        if inspect.isawaitable(result):
+            job.task = asyncio.ensure_future(result)
+            job.task.add_done_callback(functools.partial(self._on_task_done, job, start))
+            if job.interval is not None:
+                self._reschedule(job)  # 週期任務按原頻率繼續排程, 不等待協程完成
+            return
+        self._record(job, start)
+        self._reschedule(job)
+
+    def _on_task_done(self, job, start, task):
+        job.task = None
+        if task.cancelled():
+            return
+        error = task.exception()
+        self._record(job, start, error)
+        if job.interval is None:
+            self._reschedule(job)
+        elif error is not None and job.error_backoff and not job.cancelled:
+            job.deadline += job.error_backoff
+            self._push(job)
+
+    def _record(self, job, start, error=None):
+        if error is not None:
+            job.errors += 1
+            logger.error(f"定時任務 {job.name} 發生錯誤: {error}")
+        duration = time.monotonic() - start
+        job.runs += 1
+        job.total_duration += duration
+        job.max_duration = max(job.max_duration, duration)
+
+    def _reschedule(self, job, backoff=0.0):
+        if job.interval is None or job.cancelled:
+            job.cancelled = True
+            if job in self.jobs:
+                self.jobs.remove(job)
+            return
+        deadline = job.deadline + job.interval + backoff
+        now = time.monotonic()
+        if deadline <= now:  # 執行或等待超過一個週期, 跳過已錯過的截止時間, 不補跑
+            missed = int((now - deadline) // job.interval) + 1
+            job.overruns += 1
+            job.skipped += missed
+            deadline += missed * job.interval
+        job.deadline = deadline
+        self._push(job)
+
+    def get_stats(self):
+        """
+        返回 [(name, interval, runs, late, overruns, skipped, errors, max_lateness_ms, avg_duration_ms, max_duration_ms)]
+        """
+        return [
+            (job.name, job.interval, job.runs, job.late, job.overruns, job.skipped, job.errors,
+             job.max_lateness * 1000, job.total_duration / job.runs * 1000 if job.runs else 0.0,
+             job.max_duration * 1000)
+            for job in self.jobs if not job.cancelled
+        ]
+
+
+control_scheduler = ControlScheduler()
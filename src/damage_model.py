@@ -0,0 +1,119 @@
+"""
+damage_model.py
+ToN 累計傷害模型: 浮點精度, 讀取時按經過的時間連續衰減, 按曲線將傷害映射為強度
+"""
+import math
+import time
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+DECAY_LINEAR = 'linear'  # 每秒減少固定的傷害值
+DECAY_EXPONENTIAL = 'exponential'  # 按半衰期衰減
+
+# 傷害比例 (0-1) -> 強度比例 (0-1)
+DAMAGE_CURVES = {
+    'linear': lambda x: x,
+    'quadratic': lambda x: x * x,  # 小傷害時輸出較弱
+    'sqrt': math.sqrt,  # 小傷害時輸出較強
+    'smoothstep': lambda x: x * x * (3 - 2 * x),
+}
+
+MAX_DAMAGE = 100.0
+
+
+class DamageModel:
+    """
+    僅保存最後一次修改時的傷害值與時間, 當前傷害在讀取時計算, 衰減精度與讀取頻率無關
+    """
+
+    def __init__(self, decay=DECAY_LINEAR, reduction_rate=2.0, half_life=10.0, curve='linear', clock=time.monotonic):
+        """
+        :param decay: DECAY_LINEAR 或 DECAY_EXPONENTIAL
+        :param reduction_rate: 線性衰減時每秒減少的傷害值
+        :param half_life: 指數衰減時傷害減半所需的秒數
+        :param curve: DAMAGE_CURVES 中的曲線名稱
+        """
+        self.clock = clock
+        self._damage = 0.0
+        self._updated_at = clock()
+        self._decay = DECAY_LINEAR
+        self._reduction_rate = float(reduction_rate)
+        self._half_life = float(half_life)
+        self.decay = decay  # 經過 setter 檢查, 無效值拋出 ValueError
+        self.curve = curve
+
+    def _decayed(self, now):
+        elapsed = max(0.0, now - self._updated_at)
+        if self._decay == DECAY_EXPONENTIAL:
+            if self._half_life <= 0:
+                return 0.0
+            return self._damage * 0.5 ** (elapsed / self._half_life)
+        return max(0.0, self._damage - self._reduction_rate * elapsed)
+
+    def _settle(self, now=None):
+        """將衰減結果寫回狀態, 修改傷害或衰減參數前調用, 避免新參數作用於過去的時間段"""
+        now = self.clock() if now is None else now
+        self._damage = self._decayed(now)
+        self._updated_at = now
+
+    def value(self, now=None):
+        """當前傷害, 0-100"""
+        return self._decayed(self.clock() if now is None else now)
+
+    def add(self, damage):
+        self._settle()
+        self._damage = min(MAX_DAMAGE, self._damage + damage)
+        return self._damage
+
+    def set(self, damage):
+        self._settle()
+        self._damage = min(max(float(damage), 0.0), MAX_DAMAGE)
+
+    def reset(self):
+        self.set(0)
+
+    def strength(self, max_strength, now=None):
+        """按曲線將當前傷害映射為 0 - max_strength 的整數強度"""
+        ratio = self.value(now) / MAX_DAMAGE
+        return math.floor(DAMAGE_CURVES[self.curve](ratio) * max_strength)
+
+    @property
+    def decay(self):
+        return self._decay
+
+    @decay.setter
+    def decay(self, value):
+        if value not in (DECAY_LINEAR, DECAY_EXPONENTIAL):
+            raise ValueError(f"未知的衰減方式: {value}")
+        self._settle()
+        self._decay = value
+
+    @property
+    def reduction_rate(self):
+        return self._reduction_rate
+
+    @reduction_rate.setter
+    def reduction_rate(self, value):
+        self._settle()
+        self._reduction_rate = max(0.0, float(value))
+
+    @property
+    def half_life(self):
+        return self._half_life
+
+    @half_life.setter
+    def half_life(self, value):
+        self._settle()
+        self._half_life = max(0.0, float(value))
+
+    @property
+    def curve(self):
+        return self._curve
+
+    @curve.setter
+    def curve(self, value):
+        if value not in DAMAGE_CURVES:
+            raise ValueError(f"未知的傷害曲線: {value}")
+        self._curve = value
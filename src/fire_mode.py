@@ -0,0 +1,122 @@
+"""
+fire_mode.py
+一鍵開火的通道狀態機: 空閒 -> 開火中 -> 恢復中 -> 空閒
+"""
+import time
+
+from pydglab_ws import Channel, StrengthOperationType
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+IDLE = 'idle'
+FIRING = 'firing'
+RESTORING = 'restoring'  # 已發送恢復強度, 等待 App 回報確認
+
+
+class ChannelFireMode:
+    """
+    單個通道的開火狀態
+    多個來源 (SoundPad 按鍵, 死亡懲罰等) 可同時按下, 全部鬆開後才恢復到進入開火前記錄的基準強度
+    """
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.state = IDLE
+        self.baseline = 0  # 進入開火前的強度
+        self.holders = {}  # 來源 -> 開火強度增量
+        self.target = None  # 開火中最後發送的強度
+        self.restore_started = 0.0
+
+
+class FireModeController:
+    """
+    按下與鬆開僅發送一次強度設置, 不等待 App 回報
+    恢復中再次按下時沿用原基準強度, 連點不會導致輸出持續上升
+    """
+
+    def __init__(self, client, restore_timeout=1.0):
+        """
+        :param client: 提供 set_strength 的用戶端 (一般為 StrengthModel)
+        :param restore_timeout: 恢復中超過此時間仍未收到確認時視為已恢復 (秒)
+        """
+        self.client = client
+        self.restore_timeout = restore_timeout
+        self.channels = {channel: ChannelFireMode(channel) for channel in (Channel.A, Channel.B)}
+
+    @property
+    def active(self):
+        return any(fire.state != IDLE for fire in self.channels.values())
+
+    def is_active(self, channel):
+        return self.channels[channel].state != IDLE
+
+    async def press(self, channel, source, fire_strength, strength_data, base=None):
+        """
+        :param source: 觸發來源名稱, 同一來源重複按下時僅更新強度增量
+        :param strength_data: 最近一次 App 回報的強度快照, 用於記錄基準強度和上限
+        :param base: 指定基準強度, 預設為當前通道強度
+        """
+        fire = self.channels[channel]
+        if strength_data is None:
+            logger.warning(f"尚未收到通道 {channel.name} 的強度數據, 忽略開火請求")
+            return
+        if fire.state == RESTORING and time.monotonic() - fire.restore_started > self.restore_timeout:
+            fire.state = IDLE
+        if fire.state == IDLE:
+            fire.baseline = base if base is not None else self._channel_strength(strength_data, channel)
+        fire.holders[source] = fire_strength
+        fire.state = FIRING
+        await self._fire(fire, self._channel_limit(strength_data, channel))
+        logger.debug(f"FIRE START {channel.name} source={source} baseline={fire.baseline}")
+
+    async def release(self, source, strength_data):
+        """
+        鬆開該來源持有的所有通道, 無其他來源持有時恢復到基準強度
+        """
+        for fire in self.channels.values():
+            if fire.holders.pop(source, None) is None:
+                continue
+            if fire.holders:  # 其他來源仍在開火, 以剩餘的最大增量為準
+                await self._fire(fire, self._channel_limit(strength_data, fire.channel) if strength_data else 200)
+                continue
+            fire.state = RESTORING
+            fire.target = None
+            fire.restore_started = time.monotonic()
+            await self._send(fire.channel, fire.baseline)
+            logger.debug(f"FIRE END {fire.channel.name} source={source} baseline={fire.baseline}")
+
+    def cancel(self, channel):
+        """
+        強度已被其他操作直接設置, 放棄開火狀態且不恢復
+        """
+        fire = self.channels[channel]
+        fire.holders.clear()
+        fire.state = IDLE
+        fire.target = None
+
+    def on_strength_data(self, data):
+        """
+        App 回報強度後, 恢復中的通道若已到達基準強度則回到空閒
+        """
+        for channel, fire in self.channels.items():
+            if fire.state == RESTORING and self._channel_strength(data, channel) == fire.baseline:
+                fire.state = IDLE
+
+    async def _fire(self, fire, limit):
+        target = min(fire.baseline + max(fire.holders.values()), limit)
+        if target != fire.target:
+            fire.target = target
+            await self._send(fire.channel, target)
+
+    async def _send(self, channel, strength):
+        await self.client.set_strength(channel, StrengthOperationType.SET_TO, strength)
+
+    @staticmethod
+    def _channel_strength(data, channel):
+        return data.a if channel == Channel.A else data.b
+
+    @staticmethod
+    def _channel_limit(data, channel):
+        return data.a_limit if channel == Channel.A else data.b_limit
@@ -5,8 +5,9 @@ import math
 import asyncio
 import logging
 
-from pydglab_ws import Channel, StrengthOperationType
+from pydglab_ws import Channel
 from pulse_data import PULSE_NAME
+from strength_throttle import StrengthThrottle
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +17,7 @@ class ControllerSettingsTab(QWidget):
         self.main_window = main_window
 
         self.dg_controller = None
+        self.strength_throttle = None  # 滑動條強度限速發送, 綁定控制器後創建
 
         self.layout = QFormLayout(self)
         self.setLayout(self.layout)
@@ -117,6 +119,13 @@ class ControllerSettingsTab(QWidget):
             self.dg_controller.pulse_mode_a = self.pulse_mode_a_combobox.currentIndex()
             self.dg_controller.pulse_mode_b = self.pulse_mode_b_combobox.currentIndex()
             self.dg_controller.enable_chatbox_status = self.enable_chatbox_status_checkbox.isChecked()
+            if self.strength_throttle:
+                self.strength_throttle.close()
+            self.strength_throttle = StrengthThrottle(
+                self.dg_controller.strength,
+                self.main_window.settings.get('slider_output_rate', 10),
+                on_send=self.dg_controller.float_coalescer.invalidate
+            )
             logger.info("DGLabController 參數已綁定")
         else:
             logger.warning("Controller is not initialized yet.")
@@ -165,17 +174,15 @@ class ControllerSettingsTab(QWidget):
             logger.info(f"ChatBox status enabled: {self.dg_controller.enable_chatbox_status}")
 
     def set_a_channel_strength(self, value):
-        """根據滑動條的值設定 A 通道強度"""
-        if self.main_window.controller:
-            asyncio.create_task(self.dg_controller.client.set_strength(Channel.A, StrengthOperationType.SET_TO, value))
-            self.dg_controller.last_strength.a = value  # 同步更新 last_strength 的 A 通道值
+        """根據滑動條的值設定 A 通道強度, 拖動過程中限速發送"""
+        if self.strength_throttle:
+            self.strength_throttle.submit(Channel.A, value)
             self.a_channel_slider.setToolTip(f"SET A 通道強度: {value}")
 
     def set_b_channel_strength(self, value):
-        """根據滑動條的值設定 B 通道強度"""
-        if self.main_window.controller:
-            asyncio.create_task(self.dg_controller.client.set_strength(Channel.B, StrengthOperationType.SET_TO, value))
-            self.dg_controller.last_strength.b = value  # 同步更新 last_strength 的 B 通道值
+        """根據滑動條的值設定 B 通道強度, 拖動過程中限速發送"""
+        if self.strength_throttle:
+            self.strength_throttle.submit(Channel.B, value)
             self.b_channel_slider.setToolTip(f"SET B 通道強度: {value}")
 
     def disable_a_channel_updates(self):
@@ -185,7 +192,8 @@ class ControllerSettingsTab(QWidget):
     def enable_a_channel_updates(self):
         """啟用 A 通道的外部更新"""
         self.allow_a_channel_update = True
-        self.set_a_channel_strength(self.a_channel_slider.value())  # 用戶釋放時，更新設備
+        if self.strength_throttle:
+            self.strength_throttle.commit(Channel.A, self.a_channel_slider.value())  # 用戶釋放時，立即發送最終值
 
     def disable_b_channel_updates(self):
         """禁用 B 通道的外部更新"""
@@ -194,7 +202,8 @@ class ControllerSettingsTab(QWidget):
     def enable_b_channel_updates(self):
         """啟用 B 通道的外部更新"""
         self.allow_b_channel_update = True
-        self.set_b_channel_strength(self.b_channel_slider.value())  # 用戶釋放時，更新設備
+        if self.strength_throttle:
+            self.strength_throttle.commit(Channel.B, self.b_channel_slider.value())  # 用戶釋放時，立即發送最終值
 
     def show_tooltip(self, slider):
         """顯示滑動條當前值的工具提示在滑塊上方"""
@@ -221,23 +230,38 @@ class ControllerSettingsTab(QWidget):
         """更新當前選擇通道顯示"""
         self.current_channel_label.setText(f"面板當前控制通道: {channel_name}")
 
-    def update_channel_strength_labels(self, strength_data):
-        logger.info(f"通道狀態已更新 - A通道強度: {strength_data.a}, B通道強度: {strength_data.b}")
-        if self.main_window.controller and self.main_window.controller.last_strength:
-            # 僅當允許外部更新時更新 A 通道滑動條
-            if self.allow_a_channel_update:
-                self.a_channel_slider.blockSignals(True)
-                self.a_channel_slider.setRange(0, self.main_window.controller.last_strength.a_limit)  # 根據限制更新範圍
-                self.a_channel_slider.setValue(self.main_window.controller.last_strength.a)
-                self.a_channel_slider.blockSignals(False)
-                self.a_channel_label.setText(
-                    f"A 通道強度: {self.main_window.controller.last_strength.a} 強度上限: {self.main_window.controller.last_strength.a_limit}  波形: {PULSE_NAME[self.main_window.controller.pulse_mode_a]}")
-
-            # 僅當允許外部更新時更新 B 通道滑動條
-            if self.allow_b_channel_update:
-                self.b_channel_slider.blockSignals(True)
-                self.b_channel_slider.setRange(0, self.main_window.controller.last_strength.b_limit)  # 根據限制更新範圍
-                self.b_channel_slider.setValue(self.main_window.controller.last_strength.b)
-                self.b_channel_slider.blockSignals(False)
-                self.b_channel_label.setText(
-                    f"B 通道強度: {self.main_window.controller.last_strength.b} 強度上限: {self.main_window.controller.last_strength.b_limit}  波形: {PULSE_NAME[self.main_window.controller.pulse_mode_b]}")
+    def apply_state(self, changes):
+        """應用狀態存儲中變化的欄位, 未變化的控件不重繪"""
+        state = self.main_window.state_store
+        for name, slider, label, allow_update in (
+                ('a', self.a_channel_slider, self.a_channel_label, self.allow_a_channel_update),
+                ('b', self.b_channel_slider, self.b_channel_label, self.allow_b_channel_update)):
+            strength_key, limit_key, pulse_key = f'strength_{name}', f'strength_limit_{name}', f'pulse_mode_{name}'
+            if strength_key not in changes and limit_key not in changes and pulse_key not in changes:
+                continue
+            strength, limit = state.get(strength_key, 0), state.get(limit_key, 0)
+            # 僅當允許外部更新時 (用戶未在拖動) 更新滑動條
+            if allow_update and (strength_key in changes or limit_key in changes):
+                slider.blockSignals(True)
+                slider.setRange(0, limit)  # 根據限制更新範圍
+                slider.setValue(strength)
+                slider.blockSignals(False)
+            label.setText(f"{name.upper()} 通道強度: {strength} 強度上限: {limit}  波形: {PULSE_NAME[state.get(pulse_key, 0)]}")
+
+        widget_fields = (
+            ('pulse_mode_a', self.pulse_mode_a_combobox, 'setCurrentIndex'),
+            ('pulse_mode_b', self.pulse_mode_b_combobox, 'setCurrentIndex'),
+            ('enable_chatbox_status', self.enable_chatbox_status_checkbox, 'setChecked'),
+            ('is_dynamic_bone_mode_a', self.dynamic_bone_mode_a_checkbox, 'setChecked'),
+            ('is_dynamic_bone_mode_b', self.dynamic_bone_mode_b_checkbox, 'setChecked'),
+            ('fire_mode_strength_step', self.strength_step_spinbox, 'setValue'),
+            ('enable_panel_control', self.enable_panel_control_checkbox, 'setChecked'),
+        )
+        for key, widget, setter in widget_fields:
+            if key in changes:
+                widget.blockSignals(True)  # 防止觸發 valueChanged 事件
+                getattr(widget, setter)(changes[key])
+                widget.blockSignals(False)
+
+        if 'current_select_channel' in changes:
+            self.update_current_channel_display(changes['current_select_channel'].name)
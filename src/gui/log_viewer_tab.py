@@ -1,28 +1,37 @@
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QTextEdit, QGroupBox, QLabel, QHBoxLayout, QFormLayout
-from PySide6.QtGui import QTextCursor
-from PySide6.QtCore import Qt, QTimer
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QPlainTextEdit, QGroupBox, QLabel, QHBoxLayout, QFormLayout,
+                               QComboBox, QPushButton, QFileDialog)
+from PySide6.QtGui import QTextCursor, QTextCharFormat, QColor, QFont
+from PySide6.QtCore import Qt
+from collections import deque
+import itertools
 import logging
 
+from pydglab_ws import Channel
+
+from latency import latency_tracker, TOTAL
+from control_scheduler import control_scheduler, PRIORITY_DISPLAY
+
 logger = logging.getLogger(__name__)
 
-class QTextEditHandler(logging.Handler):
-    """Custom log handler to output log messages to QTextEdit."""
-    def __init__(self, text_edit):
+class RingBufferLogHandler(logging.Handler):
+    """
+    將格式化後的日誌保存到固定容量的環形緩衝區, 由 LogViewerTab 的定時器批量取出顯示
+    emit 在後台日誌線程中調用, 不直接操作 Qt 組件
+    """
+    def __init__(self, capacity=500):
         super().__init__()
-        self.text_edit = text_edit
+        self.records = deque(maxlen=capacity)  # (序號, 日誌級別, 文本)
+        self.sequence = itertools.count(1)
 
     def emit(self, record):
-        msg = self.format(record)
-        # Highlight error logs in red
-        if record.levelno >= logging.ERROR:
-            msg = f"<b style='color:red;'>{msg}</b>"  # Display error messages in red
-        elif record.levelno == logging.WARNING:
-            msg = f"<b style='color:orange;'>{msg}</b>"  # Display warnings in orange
-        else:
-            msg = f"<span>{msg}</span>"  # 預設使用普通字體
-        # Append the message to the text edit and reset the cursor position
-        self.text_edit.append(msg)
-        self.text_edit.ensureCursorVisible()  # Ensure the latest log is visible
+        try:
+            self.records.append((next(self.sequence), record.levelno, self.format(record)))
+        except Exception:
+            self.handleError(record)
+
+    def snapshot(self):
+        """返回當前緩衝區的副本"""
+        return list(self.records)
 
 class SimpleFormatter(logging.Formatter):
     """自訂格式化器，將日誌級別縮寫並調整時間格式"""
@@ -35,10 +44,14 @@ class SimpleFormatter(logging.Formatter):
             'ERROR': 'E',
             'CRITICAL': 'C'
         }.get(record.levelname, 'I')  # 默認 INFO
+        # 同一條記錄會依次交給多個處理器, 使用副本避免修改原記錄
+        record = logging.makeLogRecord(record.__dict__)
         record.levelname = level_short
         return super().format(record)
 
 class LogViewerTab(QWidget):
+    LOG_LEVELS = [("DEBUG", logging.DEBUG), ("INFO", logging.INFO), ("WARNING", logging.WARNING), ("ERROR", logging.ERROR)]
+
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
@@ -53,12 +66,22 @@ class LogViewerTab(QWidget):
         self.log_groupbox.setChecked(True)
         self.log_groupbox.toggled.connect(self.toggle_log_display)
 
-        # 日誌顯示框
-        self.log_text_edit = QTextEdit(self)
+        # 日誌級別篩選
+        self.log_level_combobox = QComboBox()
+        for level_name, level in self.LOG_LEVELS:
+            self.log_level_combobox.addItem(level_name, level)
+        self.log_level_combobox.setCurrentIndex(1)  # 預設 INFO
+        self.log_level_combobox.currentIndexChanged.connect(self.rebuild_log_display)
+
+        # 日誌顯示框, 超出容量的舊行由 maximumBlockCount 自動移除
+        capacity = self.main_window.settings.get('log_viewer_capacity', 500)
+        self.log_text_edit = QPlainTextEdit(self)
         self.log_text_edit.setReadOnly(True)
+        self.log_text_edit.setMaximumBlockCount(capacity)
 
         # 將日誌顯示框添加到 GroupBox 的布局中
         log_layout = QVBoxLayout()
+        log_layout.addWidget(self.log_level_combobox)
         log_layout.addWidget(self.log_text_edit)
         self.log_groupbox.setLayout(log_layout)
 
@@ -66,13 +89,26 @@ class LogViewerTab(QWidget):
         self.layout.addWidget(self.log_groupbox)
 
         # 設置日誌處理器
-        self.log_handler = QTextEditHandler(self.log_text_edit)
+        self.log_handler = RingBufferLogHandler(capacity)
         self.log_handler.setLevel(logging.DEBUG)  # 捕獲所有日誌級別
 
         # 使用自訂格式化器，簡化時間和日誌級別
         formatter = SimpleFormatter('%(asctime)s-%(levelname)s: %(message)s', datefmt='%H:%M:%S')
         self.log_handler.setFormatter(formatter)
 
+        # 各級別日誌的顯示格式
+        self.normal_format = QTextCharFormat()
+        self.warning_format = QTextCharFormat()
+        self.warning_format.setForeground(QColor("orange"))  # Display warnings in orange
+        self.warning_format.setFontWeight(QFont.Bold)
+        self.error_format = QTextCharFormat()
+        self.error_format.setForeground(QColor("red"))  # Display error messages in red
+        self.error_format.setFontWeight(QFont.Bold)
+
+        # 定時批量刷新日誌, 頁面不可見時暫停
+        self.last_shown_sequence = 0
+        self.log_flush_job = control_scheduler.every('log_flush', 0.1, self.flush_log_records, PRIORITY_DISPLAY)
+
         # 增加可摺疊的除錯界面
         self.debug_group = QGroupBox("除錯資訊")
         self.debug_group.setCheckable(True)
@@ -87,13 +123,24 @@ class LogViewerTab(QWidget):
         self.param_label = QLabel("正在載入控制器參數...")
         self.debug_layout.addWidget(self.param_label)
 
+        # 端到端延遲 (輸入 -> 設備回報強度) 分位數, 可匯出各階段明細
+        latency_layout = QVBoxLayout()
+        self.latency_label = QLabel("暫無延遲數據")
+        latency_layout.addWidget(self.latency_label)
+        self.latency_export_button = QPushButton("匯出延遲統計")
+        self.latency_export_button.clicked.connect(self.export_latency)
+        latency_layout.addWidget(self.latency_export_button)
+        self.latency_reset_button = QPushButton("重設延遲統計")
+        self.latency_reset_button.clicked.connect(latency_tracker.reset)
+        latency_layout.addWidget(self.latency_reset_button)
+        latency_layout.addStretch()
+        self.debug_layout.addLayout(latency_layout)
+
         self.debug_group.setLayout(self.debug_layout)
         self.layout.addRow(self.debug_group)
 
-        # 啟動定時器，每秒刷新一次除錯資訊
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_debug_info)
-        self.timer.start(1000)  # 每秒刷新一次
+        # 每秒刷新一次除錯資訊
+        self.debug_info_job = control_scheduler.every('debug_info', 1.0, self.update_debug_info, PRIORITY_DISPLAY)
 
     def toggle_log_display(self, enabled):
         """摺疊或展開日誌顯示框"""
@@ -102,25 +149,45 @@ class LogViewerTab(QWidget):
         else:
             self.log_text_edit.hide()  # 摺疊時隱藏日誌框
 
-    def limit_log_lines(self, max_lines=500):
-        """限制 QTextEdit 中的最大行數，保留顏色和格式，並保持顯示最新日誌"""
-        document = self.log_text_edit.document()
-        block_count = document.blockCount()
-        cursor = self.log_text_edit.textCursor()
-        # 如果當前行數超過最大行數
-        if block_count > max_lines:
-            cursor.movePosition(QTextCursor.Start)  # 移動到文本開頭
-
-            # 選擇並刪除前面的行，直到行數符合要求
-            for _ in range(block_count - max_lines):
-                cursor.select(QTextCursor.BlockUnderCursor)
-                cursor.removeSelectedText()
-                cursor.deleteChar()  # 刪除行後保留格式
-        # 無論是否刪除行，都移動游標到文本末尾
+    def flush_log_records(self):
+        """將上次刷新後的新日誌一次性追加到顯示框"""
+        if not self.log_text_edit.isVisible():
+            return
+        records = self.log_handler.records
+        if not records or records[-1][0] <= self.last_shown_sequence:
+            return
+        min_level = self.log_level_combobox.currentData()
+        new_records = [record for record in self.log_handler.snapshot()
+                       if record[0] > self.last_shown_sequence and record[1] >= min_level]
+        self.last_shown_sequence = records[-1][0]
+        self.append_log_records(new_records)
+
+    def rebuild_log_display(self):
+        """日誌級別篩選變更後, 從環形緩衝區重新生成顯示內容"""
+        self.log_text_edit.clear()
+        self.last_shown_sequence = 0
+        self.flush_log_records()
+
+    def append_log_records(self, records):
+        if not records:
+            return
+        scrollbar = self.log_text_edit.verticalScrollBar()
+        at_bottom = scrollbar.value() == scrollbar.maximum()
+        cursor = QTextCursor(self.log_text_edit.document())
         cursor.movePosition(QTextCursor.End)
-        self.log_text_edit.setTextCursor(cursor)
-        # 確保最新日誌可見
-        self.log_text_edit.ensureCursorVisible()
+        cursor.beginEditBlock()
+        for _, levelno, text in records:
+            if not self.log_text_edit.document().isEmpty():
+                cursor.insertBlock()
+            if levelno >= logging.ERROR:
+                cursor.insertText(text, self.error_format)
+            elif levelno == logging.WARNING:
+                cursor.insertText(text, self.warning_format)
+            else:
+                cursor.insertText(text, self.normal_format)
+        cursor.endEditBlock()
+        if at_bottom:  # 保持顯示最新日誌, 用戶向上翻看時不自動滾動
+            scrollbar.setValue(scrollbar.maximum())
 
     def toggle_debug_info(self, checked):
         """當除錯組被啟用/禁用時摺疊或展開內容"""
@@ -130,6 +197,8 @@ class LogViewerTab(QWidget):
 
     def update_debug_info(self):
         """更新除錯資訊"""
+        if not self.debug_group.isVisible():
+            return
         if self.main_window.controller is not None:
             self.dg_controller = self.main_window.controller
             params = (
@@ -142,6 +211,63 @@ class LogViewerTab(QWidget):
                 f"Fire Mode Strength Step: {self.dg_controller.fire_mode_strength_step}\n"
                 f"Enable ChatBox Status: {self.dg_controller.enable_chatbox_status}\n"
             )
+            # 動骨強度合併發送統計: 輸入數量 / 實際寫入數量
+            for channel_name, (inputs, writes) in self.dg_controller.float_coalescer.get_stats().items():
+                params += f"Float Output {channel_name}: inputs {inputs} / writes {writes}\n"
+            # 多來源合併統計: 活動來源數 / 輸入數量 / 合併次數 / 過期來源數
+            for channel_name, (sources, inputs, evaluations, expired) in \
+                    self.dg_controller.float_aggregator.get_stats().items():
+                params += (f"Float Sources {channel_name}: {sources} active, inputs {inputs} / "
+                           f"aggregated {evaluations}, expired {expired}\n")
+            strength = self.dg_controller.strength
+            params += (f"Strength Writes: sent {strength.writes_sent} / skipped {strength.writes_skipped} "
+                       f"(v{strength.confirmed.version if strength.confirmed else 0})\n")
+            params += (f"Pulse Frames Sent: A {self.dg_controller.pulse_scheduler.frames_sent[Channel.A]} "
+                       f"B {self.dg_controller.pulse_scheduler.frames_sent[Channel.B]}\n")
+            chatbox_sent, chatbox_delayed, parameters_sent, parameters_deduped = \
+                self.dg_controller.status_publisher.get_stats()
+            params += (f"Status Output: chatbox sent {chatbox_sent} delayed {chatbox_delayed} / "
+                       f"parameters sent {parameters_sent} deduped {parameters_deduped}\n")
+            osc_address_filter = self.main_window.network_config_tab.osc_service.osc_address_filter
+            params += (f"OSC Packets: accepted {osc_address_filter.accepted_packets} "
+                       f"/ dropped {osc_address_filter.dropped_packets}\n")
+            osc_mailboxes = self.main_window.network_config_tab.osc_service.osc_mailboxes
+            if osc_mailboxes:
+                params += f"Queues: active {len(osc_mailboxes.mailboxes)} evicted {osc_mailboxes.evicted}\n"
+                for key, depth, dropped, processed in osc_mailboxes.get_stats()[:5]:
+                    params += f"Queue {key}: depth {depth} dropped {dropped} processed {processed}\n"
+
+            # 定時任務統計: 執行次數 / 延遲 / 超時 (跳過的週期) / 最大耗時
+            params += f"Scheduler Ticks: {control_scheduler.ticks}\n"
+            for name, interval, runs, late, overruns, skipped, errors, max_lateness, avg_duration, max_duration \
+                    in control_scheduler.get_stats():
+                params += (f"Job {name}: runs {runs} late {late} overruns {overruns} (skipped {skipped}) "
+                           f"errors {errors} max {max_duration:.1f}ms\n")
+
             self.param_label.setText(params)
+            self.update_latency_info()
         else:
-            self.param_label.setText("控制器未初始化.")
\ No newline at end of file
+            self.param_label.setText("控制器未初始化.")
+
+    def update_latency_info(self):
+        """顯示每個來源與通道的端到端延遲"""
+        if not latency_tracker.enabled:
+            self.latency_label.setText("延遲統計已關閉")
+            return
+        rows = latency_tracker.summary(TOTAL)
+        if not rows:
+            self.latency_label.setText("暫無延遲數據")
+            return
+        lines = ["Latency (ms) p50 / p95 / p99:"]
+        for _, source, channel_name, count, p50, p95, p99, _ in rows:
+            lines.append(f"{source} {channel_name}: {p50:.1f} / {p95:.1f} / {p99:.1f} (n={count})")
+        self.latency_label.setText("\n".join(lines))
+
+    def export_latency(self):
+        path, _ = QFileDialog.getSaveFileName(self, "匯出延遲統計", "latency.csv", "CSV (*.csv)")
+        if not path:
+            return
+        try:
+            latency_tracker.export(path)
+        except OSError as e:
+            logger.error(f"匯出延遲統計失敗: {e}")
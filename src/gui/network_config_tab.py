@@ -5,12 +5,12 @@ import logging
 import asyncio
 
 from config import get_active_ip_addresses, save_settings
-from pydglab_ws import DGLabWSServer, RetCode, StrengthData, FeedbackButton
+from pydglab_ws import DGLabWSServer
 from dglab_controller import DGLabController
 from qasync import asyncio
-from pythonosc import osc_server, dispatcher, udp_client
+from pythonosc import udp_client
+from osc_service import OSCService
 
-import functools # Use the built-in functools module
 import sys
 import os
 import qrcode
@@ -50,10 +50,8 @@ class NetworkConfigTab(QWidget):
         self.osc_port_spinbox.setValue(self.main_window.settings['osc_port'])  # Set the default or loaded value
         self.form_layout.addRow("OSC接收埠:", self.osc_port_spinbox)
 
-        # 創建 dispatcher 和地址處理器字典
-        self.dispatcher = dispatcher.Dispatcher()
-        self.osc_address_handlers = {}  # 自訂 OSC 地址的處理器
-        self.panel_control_handlers = {}  # 面板控制 OSC 地址的處理器
+        # OSC 接收服務 (dispatcher, 地址預過濾與處理郵箱)
+        self.osc_service = OSCService(self.main_window.settings)
 
         # 添加用戶端連接狀態標籤
         self.connection_status_label = QLabel("未連接, 請在點擊啟動後掃描二維碼連接")
@@ -98,7 +96,7 @@ class NetworkConfigTab(QWidget):
                     break
 
     def save_network_settings(self):
-        """Save network settings to the settings.yml file."""
+        """Save network settings, written to config.yml after edits settle."""
         selected_interface_ip = self.ip_combobox.currentText().split(": ")
         if len(selected_interface_ip) == 2:
             selected_interface, selected_ip = selected_interface_ip
@@ -130,8 +128,6 @@ class NetworkConfigTab(QWidget):
             loop = asyncio.get_running_loop()
             loop.create_task(self.run_server(selected_ip, selected_port, osc_port))
             logger.info('WebSocket 伺服器已啟動')
-            # After starting the server, connect the addresses_updated signal
-            self.main_window.osc_parameters_tab.addresses_updated.connect(self.update_osc_mappings)
             # 啟動成功後，將按鈕設為灰色並禁用
             self.start_button.setText("已啟動")
             self.start_button.setStyleSheet("background-color: grey; color: white;")
@@ -162,50 +158,29 @@ class NetworkConfigTab(QWidget):
 
                 osc_client = udp_client.SimpleUDPClient("127.0.0.1", 9000)
                 # Initialize controller
-                controller = DGLabController(client, osc_client, self.main_window)
+                controller = DGLabController(client, osc_client, self.main_window,
+                                             float_output_rate=self.main_window.settings.get('float_output_rate', 20),
+                                             pulse_buffer_seconds=self.main_window.settings.get('pulse_buffer_seconds', 2.0),
+                                             soundpad_keymap=self.main_window.settings.get('soundpad_keymap'),
+                                             state_store=self.main_window.state_store,
+                                             status_parameters=self.main_window.settings.get('status_parameters', True),
+                                             float_reducer=self.main_window.settings.get('float_reducer', 'max'),
+                                             float_source_timeout=self.main_window.settings.get('float_source_timeout', 0))
                 self.main_window.controller = controller
                 logger.info("DGLabController 已初始化")
                 # After controller initialization, bind settings
                 self.main_window.controller_settings_tab.bind_controller_settings()
 
-                # 設置 OSC 伺服器
-                osc_server_instance = osc_server.AsyncIOOSCUDPServer(
-                    ("0.0.0.0", osc_port), self.dispatcher, asyncio.get_event_loop()
-                )
-                osc_transport, osc_protocol = await osc_server_instance.create_serve_endpoint()
-                logger.info(f"OSC Server Listening on port {osc_port}")
+                await self.osc_service.start(osc_port)
 
-                # 連接 addresses_updated 信號到 update_osc_mappings 方法
-                self.main_window.osc_parameters_tab.addresses_updated.connect(self.update_osc_mappings)
-                # 初始化 OSC 映射，包括面板控制和自訂地址
+                # 初始化 OSC 映射，包括面板控制和自訂地址; 之後的地址修改由 MainWindow 連接的 addresses_updated 觸發
                 self.update_osc_mappings(controller)
 
-                # Start the data processing loop
-                async for data in client.data_generator():
-                    if isinstance(data, StrengthData):
-                        logger.info(f"接收到封包 - A通道: {data.a}, B通道: {data.b}")
-                        controller.last_strength = data
-                        controller.data_updated_event.set()  # 數據更新，觸發開火操作的後續事件
-                        controller.app_status_online = True
-                        self.main_window.app_status_online = True
-                        self.update_connection_status(controller.app_status_online)
-                        # Update UI components related to strength data
-                        self.main_window.controller_settings_tab.update_channel_strength_labels(data)
-                    elif isinstance(data, FeedbackButton):
-                        logger.info(f"App 觸發了回饋按鈕：{data.name}")
-                    elif data == RetCode.CLIENT_DISCONNECTED:
-                        logger.info("App 已斷開連接，你可以嘗試重新掃碼進行連接綁定")
-                        controller.app_status_online = False
-                        self.main_window.app_status_online = False
-                        self.update_connection_status(controller.app_status_online)
-                        await client.rebind()
-                        logger.info("重新綁定成功")
-                        controller.app_status_online = True
-                        self.update_connection_status(controller.app_status_online)
-                    else:
-                        logger.info(f"獲取到狀態碼：{RetCode}")
-
-                osc_transport.close()
+                # Start the data processing loop, 界面通過 state_store 按幀刷新
+                await controller.process_app_data()
+
+                self.osc_service.close()
+                controller.close()
         except OSError as e:
             # Handle specific errors and log them
             error_message = f"WebSocket 伺服器啟動失敗: {str(e)}"
@@ -215,13 +190,6 @@ class NetworkConfigTab(QWidget):
             self.start_button.setText("啟動失敗，請重試")
             self.start_button.setStyleSheet("background-color: red; color: white;")
             self.start_button.setEnabled(True)
-            self.main_window.log_viewer_tab.log_text_edit.append(f"ERROR: {error_message}")
-
-    def handle_osc_message_task_pad(self, address, *args):
-        asyncio.create_task(self.main_window.controller.handle_osc_message_pad(address, *args))
-
-    def handle_osc_message_task_pb(self, address, *args):
-        asyncio.create_task(self.main_window.controller.handle_osc_message_pb(address, *args))
 
     def generate_qrcode(self, data: str):
         """生成二維碼並轉換為PySide6可顯示的QPixmap"""
@@ -245,6 +213,11 @@ class NetworkConfigTab(QWidget):
         self.qrcode_label.setFixedSize(qrcode_pixmap.size())  # 根據二維碼尺寸調整QLabel大小
         logger.info("二維碼已更新")
 
+    def apply_state(self, changes):
+        """應用狀態存儲中變化的欄位"""
+        if 'app_status_online' in changes:
+            self.update_connection_status(changes['app_status_online'])
+
     def update_connection_status(self, is_online):
         self.main_window.app_status_online = is_online
         """根據設備連接狀態更新標籤的文本和顏色"""
@@ -263,46 +236,9 @@ class NetworkConfigTab(QWidget):
         self.connection_status_label.adjustSize()  # 根據內容調整標籤大小
 
     def update_osc_mappings(self, controller=None):
+        """按當前的地址列表差異更新 OSC 映射, 伺服器啟動前忽略"""
         if controller is None:
             controller = self.main_window.controller
-        asyncio.run_coroutine_threadsafe(self._update_osc_mappings(controller), asyncio.get_event_loop())
-
-    async def _update_osc_mappings(self, controller):
-        # 首先，移除之前的自訂 OSC 地址映射
-        for address, handler in self.osc_address_handlers.items():
-            self.dispatcher.unmap(address, handler)
-        self.osc_address_handlers.clear()
-
-        # 添加新的自訂 OSC 地址映射
-        osc_addresses = self.main_window.get_osc_addresses()
-        for addr in osc_addresses:
-            address = addr['address']
-            channels = addr['channels']
-            handler = functools.partial(self.handle_osc_message_task_pb_with_channels, controller=controller, channels=channels)
-            self.dispatcher.map(address, handler)
-            self.osc_address_handlers[address] = handler
-        logger.info("OSC dispatcher mappings updated with custom addresses.")
-
-        # 確保面板控制的 OSC 地址映射被添加（如果尚未添加）
-        if not self.panel_control_handlers:
-            self.add_panel_control_mappings(controller)
-
-    def add_panel_control_mappings(self, controller):
-        # 添加面板控制功能的 OSC 地址映射
-        panel_addresses = [
-            "/avatar/parameters/SoundPad/Button/*",
-            "/avatar/parameters/SoundPad/Volume",
-            "/avatar/parameters/SoundPad/Page",
-            "/avatar/parameters/SoundPad/PanelControl"
-        ]
-        for address in panel_addresses:
-            handler = functools.partial(self.handle_osc_message_task_pad, controller=controller)
-            self.dispatcher.map(address, handler)
-            self.panel_control_handlers[address] = handler
-        logger.info("OSC dispatcher mappings updated with panel control addresses.")
-
-    def handle_osc_message_task_pad(self, address, *args, controller):
-        asyncio.create_task(controller.handle_osc_message_pad(address, *args))
-
-    def handle_osc_message_task_pb_with_channels(self, address, *args, controller, channels):
-        asyncio.create_task(controller.handle_osc_message_pb(address, *args, channels=channels))
+        if controller is None:
+            return
+        self.osc_service.update_mappings(controller, self.main_window.get_osc_addresses())
@@ -2,8 +2,9 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
                                QLineEdit, QCheckBox, QLabel, QListWidget, QListWidgetItem, QAbstractItemView)
 from PySide6.QtCore import Qt, Signal
 import logging
-import yaml
-import os
+
+from config import load_osc_addresses, save_osc_addresses
+from control_scheduler import control_scheduler, PRIORITY_DISPLAY
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +34,8 @@ class OSCParametersTab(QWidget):
         self.add_button.clicked.connect(self.add_address)
         self.remove_button.clicked.connect(self.remove_address)
 
+        self.apply_job = None  # 地址輸入停止後才通知更新映射
+
         # Load existing addresses
         self.addresses = []
         self.load_addresses()
@@ -68,6 +71,14 @@ class OSCParametersTab(QWidget):
             widget = self.address_list_widget.itemWidget(item)
             self.addresses[i]['address'] = widget.address_edit.text()
         self.save_addresses()
+        # 每次按鍵都會觸發, 停止輸入 0.5 秒後再重新映射
+        if self.apply_job is not None:
+            self.apply_job.cancel()
+        self.apply_job = control_scheduler.call_later(
+            'osc_addresses_apply', 0.5, self.emit_addresses_updated, PRIORITY_DISPLAY)
+
+    def emit_addresses_updated(self):
+        self.apply_job = None
         self.addresses_updated.emit()
 
     def on_channel_changed(self):
@@ -95,25 +106,12 @@ class OSCParametersTab(QWidget):
             widget.channelChanged.connect(self.on_channel_changed)
 
     def save_addresses(self):
-        # Save addresses to a YAML file
-        with open('osc_addresses.yml', 'w', encoding='utf-8') as f:
-            yaml.dump(self.addresses, f, allow_unicode=True)
-        logger.info("OSC addresses saved.")
+        # 寫入由 config_store 延遲合併
+        save_osc_addresses(self.addresses)
 
     def load_addresses(self):
-        # Load addresses from a YAML file
-        if os.path.exists('osc_addresses.yml'):
-            with open('osc_addresses.yml', 'r', encoding='utf-8') as f:
-                self.addresses = yaml.safe_load(f)
-            if self.addresses is None:
-                self.addresses = []
-            logger.info("OSC addresses loaded.")
-        else:
-            # Load default addresses
-            self.addresses = [
-                {'address': '/avatar/parameters/DG-LAB/*', 'channels': {'A': True}},
-                {'address': '/avatar/parameters/Tail_Stretch', 'channels': {'B': True}},
-            ]
+        # Load addresses from a YAML file, or the default addresses
+        self.addresses = load_osc_addresses()
 
     def get_addresses(self):
         # Return the list of addresses
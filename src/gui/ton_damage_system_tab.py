@@ -1,14 +1,14 @@
 from PySide6.QtWidgets import (QWidget, QGroupBox, QFormLayout, QCheckBox, QLabel,
-                               QProgressBar, QSlider, QSpinBox, QHBoxLayout, QToolTip)
-from PySide6.QtCore import Qt, QTimer, QPoint
-import math
+                               QProgressBar, QSlider, QSpinBox, QHBoxLayout, QToolTip, QComboBox)
+from PySide6.QtCore import Qt, QPoint
 import asyncio
 import logging
-import json
-
-from pydglab_ws import Channel, StrengthOperationType
 
+from config import save_settings
 from ton_websocket_handler import WebSocketClient
+from ton_damage import TonDamageSystem
+from damage_model import DAMAGE_CURVES, DECAY_LINEAR, DECAY_EXPONENTIAL
+from control_scheduler import control_scheduler, PRIORITY_DISPLAY
 
 logger = logging.getLogger(__name__)
 
@@ -48,6 +48,27 @@ class TonDamageSystemTab(QWidget):
         self.damage_progress_bar.setValue(0)  # Initial damage is 0%
         self.damage_layout.addRow("累計傷害:", self.damage_progress_bar)
 
+        # 傷害衰減方式與傷害到強度的映射曲線
+        settings = self.main_window.settings
+        self.damage_curve_layout = QHBoxLayout()
+        self.damage_decay_combobox = QComboBox()
+        self.damage_decay_combobox.addItem("線性衰減", DECAY_LINEAR)
+        self.damage_decay_combobox.addItem("指數衰減 (半衰期)", DECAY_EXPONENTIAL)
+        self.select_saved_item(self.damage_decay_combobox, 'ton_damage_decay', DECAY_LINEAR)
+        self.damage_half_life_spinbox = QSpinBox()
+        self.damage_half_life_spinbox.setRange(1, 120)
+        self.damage_half_life_spinbox.setSuffix(" s")
+        self.damage_half_life_spinbox.setValue(settings.get('ton_damage_half_life', 10))
+        self.damage_curve_combobox = QComboBox()
+        for curve_name in DAMAGE_CURVES:
+            self.damage_curve_combobox.addItem(curve_name, curve_name)
+        self.select_saved_item(self.damage_curve_combobox, 'ton_damage_curve', 'linear')
+        self.damage_curve_layout.addWidget(self.damage_decay_combobox)
+        self.damage_curve_layout.addWidget(self.damage_half_life_spinbox)
+        self.damage_curve_layout.addWidget(QLabel("強度曲線:"))
+        self.damage_curve_layout.addWidget(self.damage_curve_combobox)
+        self.damage_layout.addRow("傷害衰減:", self.damage_curve_layout)
+
         # 統一滑動條的寬度
         slider_max_width = 450
 
@@ -108,13 +129,70 @@ class TonDamageSystemTab(QWidget):
         self.damage_group.setLayout(self.damage_layout)
         self.layout.addRow(self.damage_group)
 
-        # Main Timer for Damage Reduction
-        self.damage_timer = QTimer(self)
-        self.damage_timer.timeout.connect(self.reduce_damage)
+        # 傷害計算與死亡懲罰, 界面僅負責參數與顯示
+        self.damage_system = TonDamageSystem(
+            lambda: self.main_window.controller,
+            on_display_name=lambda name: self.display_name_label.setText(f"User Display Name: {name}"),
+            decay=self.damage_decay_combobox.currentData(),
+            half_life=self.damage_half_life_spinbox.value(),
+            curve=self.damage_curve_combobox.currentData(),
+            output_rate=settings.get('ton_output_rate', 10)
+        )
+        self.damage_system.reduction_strength = self.damage_reduction_slider.value()
+        self.damage_system.damage_strength = self.damage_strength_slider.value()
+        self.damage_system.death_penalty_strength = self.death_penalty_strength_slider.value()
+        self.damage_system.death_penalty_time = self.death_penalty_time_spinbox.value()
+        self.damage_reduction_slider.valueChanged.connect(
+            lambda value: setattr(self.damage_system, 'reduction_strength', value))
+        self.damage_strength_slider.valueChanged.connect(
+            lambda value: setattr(self.damage_system, 'damage_strength', value))
+        self.death_penalty_strength_slider.valueChanged.connect(
+            lambda value: setattr(self.damage_system, 'death_penalty_strength', value))
+        self.death_penalty_time_spinbox.valueChanged.connect(
+            lambda value: setattr(self.damage_system, 'death_penalty_time', value))
+        self.damage_decay_combobox.currentIndexChanged.connect(
+            lambda: setattr(self.damage_system.model, 'decay', self.damage_decay_combobox.currentData()))
+        self.damage_half_life_spinbox.valueChanged.connect(
+            lambda value: setattr(self.damage_system.model, 'half_life', value))
+        self.damage_curve_combobox.currentIndexChanged.connect(
+            lambda: setattr(self.damage_system.model, 'curve', self.damage_curve_combobox.currentData()))
+        # 衰減方式, 半衰期與強度曲線保存到設置, 下次啟動時恢復
+        self.damage_decay_combobox.currentIndexChanged.connect(
+            lambda: self.save_setting('ton_damage_decay', self.damage_decay_combobox.currentData()))
+        self.damage_half_life_spinbox.valueChanged.connect(
+            lambda value: self.save_setting('ton_damage_half_life', value))
+        self.damage_curve_combobox.currentIndexChanged.connect(
+            lambda: self.save_setting('ton_damage_curve', self.damage_curve_combobox.currentData()))
+
+        # 進度條按界面刷新率顯示傷害模型的當前值, 頁面不可見時不刷新
+        refresh_rate = min(max(settings.get('gui_refresh_rate', 30), 1), 60)
+        self.damage_display_job = control_scheduler.every(
+            'ton_damage_display', 1.0 / refresh_rate, self.update_damage_display, PRIORITY_DISPLAY)
 
         # WebSocket Client (Initialized as None)
         self.websocket_client = None
 
+    def select_saved_item(self, combobox, key, default):
+        """按設置選中下拉框的項目, 無效的值記錄警告並使用第一項"""
+        value = self.main_window.settings.get(key, default)
+        index = combobox.findData(value)
+        if index < 0:
+            logger.warning(f"設置 {key} 的值 {value} 無效, 使用 {combobox.itemData(0)}")
+            index = 0
+        combobox.setCurrentIndex(index)
+
+    def save_setting(self, key, value):
+        self.main_window.settings[key] = value
+        save_settings(self.main_window.settings)  # 連續修改時由 config_store 合併為一次寫入
+        logger.info(f"ToN setting {key} saved: {value}")
+
+    def update_damage_display(self):
+        if not self.damage_progress_bar.isVisible():
+            return
+        value = round(self.damage_system.damage)
+        if value != self.damage_progress_bar.value():
+            self.damage_progress_bar.setValue(value)
+
     def show_tooltip(self, slider):
         """顯示滑動條當前值的工具提示在滑塊上方"""
         value = slider.value()
@@ -141,13 +219,15 @@ class TonDamageSystemTab(QWidget):
         if enabled:
             logger.info("Enabling damage system and starting WebSocket connection.")
             # Start WebSocket connection and damage timer
-            self.websocket_client = WebSocketClient("ws://localhost:11398")
-            self.websocket_client.status_update_signal.connect(self.handle_websocket_status_update)
-            self.websocket_client.message_received.connect(self.handle_websocket_message)
-            self.websocket_client.error_signal.connect(self.handle_websocket_error)
+            self.websocket_client = WebSocketClient(
+                "ws://localhost:11398",
+                on_event=self.damage_system.handle_event,
+                on_status=self.handle_websocket_status_update,
+                on_error=self.handle_websocket_error
+            )
             loop = asyncio.get_event_loop()
             asyncio.run_coroutine_threadsafe(self.websocket_client.start_connection(), loop)
-            self.damage_timer.start(1000)  # Reduce damage every second
+            self.damage_system.start()  # 按傷害輸出強度
         else:
             logger.info("Disabling damage system and closing WebSocket connection.")
             # Stop WebSocket connection and damage timer
@@ -155,56 +235,11 @@ class TonDamageSystemTab(QWidget):
                 loop = asyncio.get_event_loop()
                 asyncio.run_coroutine_threadsafe(self.websocket_client.close(), loop)
                 self.websocket_client = None
-            self.damage_timer.stop()
-            self.reset_damage()
+            self.damage_system.stop()
+            self.damage_system.reset_damage()
             self.websocket_status_label.setText("WebSocket Status: 未連接")
             self.websocket_status_label.setStyleSheet("color: red;")
 
-    def reduce_damage(self):
-        """Reduce the accumulated damage based on the set reduction strength every second."""
-        reduction_strength = self.damage_reduction_slider.value()
-        current_value = self.damage_progress_bar.value()
-        new_value = max(0, current_value - reduction_strength)  # Ensure damage does not go below 0%
-        new_strength = math.floor(0.01 * new_value * self.damage_strength_slider.value())
-        self.damage_progress_bar.setValue(new_value)
-        if current_value > 0:
-            logger.info(f"Damage reduced by {reduction_strength}%. Current damage: {new_value}%")
-        if self.main_window.app_status_online and self.main_window.controller.last_strength and self.main_window.controller.last_strength.a != new_value and not self.main_window.controller.fire_mode_active:
-            asyncio.create_task(self.main_window.controller.client.set_strength(Channel.A, StrengthOperationType.SET_TO, new_strength))
-
-    def handle_websocket_message(self, message):
-        """Handle incoming WebSocket messages and update status or damage accordingly."""
-        logger.info(f"Received WebSocket message: {message}")
-
-        # 如果消息是字串類型，嘗試解析為 JSON
-        if isinstance(message, str):
-            try:
-                message = json.loads(message)
-            except json.JSONDecodeError:
-                logger.error("Received message is not valid JSON format.")
-                return
-
-        # 處理不同類型的消息
-        if message.get("Type") == "DAMAGED":
-            damage_value = message.get("Value", 0)  # 確保獲取大小寫正確的 "Value"
-            self.accumulate_damage(damage_value)
-        elif message.get("Type") == "SAVED":
-            self.reset_damage()
-            logger.info("存檔更新，重設強度")
-        elif message.get("Type") == "ALIVE":
-            is_alive = message.get("Value", 0)
-            if not is_alive:
-                asyncio.create_task(self.trigger_death_penalty())
-                logger.info("已死亡，觸發死亡懲罰")
-        elif message.get("Type") == "STATS":
-            if message.get("DisplayName"):
-                user_display_name = message.get("DisplayName")
-                self.display_name_label.setText(f"User Display Name: {user_display_name}")
-        elif message.get("Type") == "CONNECTED":
-            if message.get("DisplayName"):
-                user_display_name = message.get("DisplayName")
-                self.display_name_label.setText(f"User Display Name: {user_display_name}")
-
     def handle_websocket_status_update(self, status):
         """Update WebSocket status label based on connection status."""
         logger.info(f"WebSocket status updated: {status}")
@@ -225,34 +260,3 @@ class TonDamageSystemTab(QWidget):
         logger.error(f"WebSocket error: {error_message}")
         self.websocket_status_label.setText(f"WebSocket Status: 錯誤 - {error_message}")
         self.websocket_status_label.setStyleSheet("color: orange;")
-
-    def accumulate_damage(self, value):
-        """Accumulate damage based on incoming value."""
-        current_value = self.damage_progress_bar.value()
-        new_value = min(100, current_value + value)  # Cap damage at 100%
-        self.damage_progress_bar.setValue(new_value)
-        logger.info(f"Accumulated damage by {value}%. Current damage: {new_value}%")
-
-    def reset_damage(self):
-        """Reset the damage accumulation."""
-        logger.info("Resetting damage accumulation.")
-        self.damage_progress_bar.setValue(0)
-        if self.main_window.app_status_online and self.main_window.controller:
-            asyncio.create_task(self.main_window.controller.client.set_strength(Channel.A, StrengthOperationType.SET_TO, 0))
-            asyncio.create_task(self.main_window.controller.strength_fire_mode(False, Channel.A, self.death_penalty_strength_slider.value(), self.main_window.controller.last_strength)) #可能遺漏
-
-    async def trigger_death_penalty(self):
-        """Trigger death penalty by setting damage to 100% and applying penalty."""
-        penalty_strength = self.death_penalty_strength_slider.value()  # 獲取懲罰強度
-        penalty_time = self.death_penalty_time_spinbox.value()  # 獲取懲罰持續時間
-        logger.warning(f"Death penalty triggered: Strength={penalty_strength}, Time={penalty_time}s")
-        self.damage_progress_bar.setValue(100)  # 將傷害設置為 100%
-        if self.main_window.controller:
-            last_strength_mod = self.main_window.controller.last_strength
-            last_strength_mod.a = self.damage_strength_slider.value() # 開火值基於傷害強度上限更新
-            logger.warning(f"Death penalty triggered: a {last_strength_mod.a} fire {penalty_strength}")
-            # 開始懲罰
-            if self.main_window.app_status_online:
-                asyncio.create_task(self.main_window.controller.strength_fire_mode(True, Channel.A, penalty_strength, last_strength_mod))
-                await asyncio.sleep(penalty_time)  # 等待指定的懲罰持續時間
-                asyncio.create_task(self.main_window.controller.strength_fire_mode(False, Channel.A, penalty_strength, last_strength_mod))
@@ -0,0 +1,131 @@
+"""
+headless.py
+無界面運行: 讀取 config.yml (或舊版的 settings.yml 與 osc_addresses.yml), 在 asyncio 事件循環中啟動
+DG-LAB WebSocket 伺服器, OSC 伺服器, 控制器與 ToN 用戶端, 不依賴 Qt
+安裝了 uvloop 時自動使用
+"""
+import argparse
+import asyncio
+
+import qrcode
+from pydglab_ws import DGLabWSServer
+from pythonosc import udp_client
+
+from config import load_settings, load_osc_addresses, get_active_ip_addresses
+from logger_config import setup_logging
+from dglab_controller import DGLabController
+from osc_service import OSCService
+from ton_damage import TonDamageSystem
+from ton_websocket_handler import WebSocketClient
+from latency import latency_tracker
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'ip': '',
+    'port': 5678,
+    'osc_port': 9001,
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="DG-LAB-VRCOSC 無界面模式")
+    parser.add_argument('--latency-export', metavar='PATH', help="退出時將延遲統計匯出為 CSV 文件")
+    parser.add_argument('--ip', help="WebSocket 伺服器地址, 預設使用設置中的 ip 或第一個可用網卡")
+    parser.add_argument('--port', type=int, help="WebSocket 連接埠")
+    parser.add_argument('--osc-port', type=int, help="OSC 接收埠")
+    parser.add_argument('--ton', action='store_true', help="啟用 ToN 傷害系統 (需要 ToNSaveManager 的 WebSocket API)")
+    parser.add_argument('--ton-url', default="ws://localhost:11398", help="ToNSaveManager WebSocket API 地址")
+    return parser.parse_args()
+
+
+def print_qrcode(url):
+    """在終端輸出二維碼與 URL"""
+    qr = qrcode.QRCode(border=1)
+    qr.add_data(url)
+    qr.make(fit=True)
+    qr.print_ascii(invert=True)
+    print(url, flush=True)
+
+
+async def run(settings, args):
+    ip = args.ip or settings.get('ip') or next(iter(get_active_ip_addresses().values()), '127.0.0.1')
+    port = args.port or settings['port']
+    osc_port = args.osc_port or settings['osc_port']
+    logger.info(f"正在啟動 WebSocket 伺服器，監聽地址: {ip}:{port} 和 OSC 數據接收埠: {osc_port}")
+
+    async with DGLabWSServer(ip, port, 60) as server:
+        client = server.new_local_client()
+        print_qrcode(client.get_qrcode(f"ws://{ip}:{port}"))
+
+        osc_client = udp_client.SimpleUDPClient("127.0.0.1", 9000)
+        controller = DGLabController(client, osc_client, None,
+                                     float_output_rate=settings.get('float_output_rate', 20),
+                                     pulse_buffer_seconds=settings.get('pulse_buffer_seconds', 2.0),
+                                     soundpad_keymap=settings.get('soundpad_keymap'),
+                                     status_parameters=settings.get('status_parameters', True),
+                                     float_reducer=settings.get('float_reducer', 'max'),
+                                     float_source_timeout=settings.get('float_source_timeout', 0))
+
+        osc_service = OSCService(settings)
+        await osc_service.start(osc_port)
+        osc_service.update_mappings(controller, load_osc_addresses())
+
+        ton_client = None
+        if args.ton:
+            damage_system = TonDamageSystem(lambda: controller,
+                                            decay=settings.get('ton_damage_decay', 'linear'),
+                                            half_life=settings.get('ton_damage_half_life', 10),
+                                            curve=settings.get('ton_damage_curve', 'linear'),
+                                            output_rate=settings.get('ton_output_rate', 10))
+            ton_client = WebSocketClient(
+                args.ton_url,
+                on_event=damage_system.handle_event,
+                on_status=lambda status: logger.info(f"ToN WebSocket status: {status}"),
+                on_error=lambda error: logger.error(f"ToN WebSocket error: {error}")
+            )
+            asyncio.create_task(ton_client.start_connection())
+            damage_system.start()
+
+        def on_connection_changed(is_online):
+            logger.info("App 已連接" if is_online else "App 未連接")
+
+        try:
+            await controller.process_app_data(on_connection_changed=on_connection_changed)
+        finally:
+            osc_service.close()
+            controller.close()
+            if ton_client:
+                await ton_client.close()
+            if args.latency_export:
+                latency_tracker.export(args.latency_export)
+
+
+def main():
+    args = parse_args()
+    settings = dict(DEFAULT_SETTINGS, **(load_settings() or {}))
+    latency_tracker.enabled = settings.get('latency_tracking', True)
+    setup_logging(
+        log_dir=settings.get('log_dir'),
+        max_bytes=settings.get('log_max_bytes', 5 * 1024 * 1024),
+        backup_count=settings.get('log_backup_count', 5)
+    )
+    logging.getLogger().setLevel(logging.INFO)
+    try:
+        if uvloop is not None:
+            uvloop.run(run(settings, args))
+        else:
+            asyncio.run(run(settings, args))
+    except KeyboardInterrupt:
+        logger.info("已停止")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+latency.py
+從輸入 (OSC 數據包, ToN 事件, 界面滑動條) 到設備回報強度的各階段延遲統計
+"""
+import contextvars
+import csv
+import time
+from bisect import bisect_left
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 階段按時間順序排列, 相鄰兩個已記錄的階段之間的耗時計入該階段的直方圖
+STAGES = ('receive', 'dispatch', 'handler', 'send', 'ack')
+TOTAL = 'total'  # receive -> ack 的端到端耗時
+
+SOURCE_SOUNDPAD = 'soundpad'
+SOURCE_OSC = 'osc'  # 自訂 OSC 地址 (動骨, Contact)
+SOURCE_TON = 'ton'
+SOURCE_GUI = 'gui'
+
+# 當前正在處理的輸入, 由郵箱 worker, 合併發送任務等在調用處理函數前設置
+current_trace = contextvars.ContextVar('current_trace', default=None)
+
+
+class LatencyHistogram:
+    """
+    對數分桶直方圖, 記錄時只做一次二分查找, 分位數取所在桶的上界 (不超過最大值)
+    """
+    # 50us 起, 每桶 x1.2, 最大約 30s
+    BOUNDS = tuple(0.00005 * 1.2 ** i for i in range(74))
+
+    __slots__ = ('counts', 'count', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.counts[bisect_left(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p):
+        """
+        :param p: 0-100
+        :return: 秒, 無數據時為 0
+        """
+        if not self.count:
+            return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(self.BOUNDS[index], self.max) if index < len(self.BOUNDS) else self.max
+        return self.max
+
+
+class LatencyTrace:
+    """
+    單個輸入的各階段時間戳 (time.perf_counter)
+    """
+    __slots__ = ('source', 'stamps', 'finished')
+
+    def __init__(self, source, received=None):
+        self.source = source
+        self.stamps = {'receive': received if received is not None else time.perf_counter()}
+        self.finished = False
+
+    def stamp(self, stage):
+        self.stamps.setdefault(stage, time.perf_counter())
+
+
+class LatencyTracker:
+    def __init__(self):
+        self.enabled = True
+        self.histograms = {}  # (stage, source, channel name) -> LatencyHistogram
+        self.last_packet_time = None  # 當前 UDP 數據包的接收時間, 由預過濾協議在分派前設置
+
+    def begin_trace(self, source, received=None):
+        """
+        :return: LatencyTrace, 統計關閉時返回 None
+        """
+        if not self.enabled:
+            return None
+        return LatencyTrace(source, received)
+
+    def finish(self, trace, channel):
+        """
+        設備確認了該輸入產生的強度後調用, 每個輸入只計入一次
+        """
+        if trace is None or trace.finished:
+            return
+        trace.finished = True
+        trace.stamp('ack')
+        stamps = trace.stamps
+        channel_name = channel.name
+        previous = None
+        for stage in STAGES:
+            stamp = stamps.get(stage)
+            if stamp is None:
+                continue
+            if previous is not None:
+                self._histogram(stage, trace.source, channel_name).record(stamp - previous)
+            previous = stamp
+        self._histogram(TOTAL, trace.source, channel_name).record(stamps['ack'] - stamps['receive'])
+
+    def _histogram(self, stage, source, channel_name):
+        key = (stage, source, channel_name)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = LatencyHistogram()
+        return histogram
+
+    def summary(self, stage=None):
+        """
+        返回 [(stage, source, channel, count, p50, p95, p99, max)], 時間單位為毫秒
+        """
+        rows = []
+        for (hist_stage, source, channel_name), histogram in sorted(self.histograms.items()):
+            if stage is not None and hist_stage != stage:
+                continue
+            rows.append((hist_stage, source, channel_name, histogram.count,
+                         histogram.percentile(50) * 1000, histogram.percentile(95) * 1000,
+                         histogram.percentile(99) * 1000, histogram.max * 1000))
+        return rows
+
+    def export(self, path):
+        """將所有直方圖的統計結果寫入 CSV 文件"""
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['stage', 'source', 'channel', 'count', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms'])
+            for row in self.summary():
+                writer.writerow([*row[:4], *(f"{value:.3f}" for value in row[4:])])
+        logger.info(f"延遲統計已匯出到 {path}")
+
+    def reset(self):
+        self.histograms.clear()
+
+
+latency_tracker = LatencyTracker()
@@ -1,21 +1,40 @@
 import logging
+import logging.handlers
 import colorlog
 from datetime import datetime
+import atexit
 import os
+import queue
+import tempfile
+import time
+
+DEFAULT_LOG_DIR = os.path.join(tempfile.gettempdir(), "DG-LAB-VRCOSC", "logs")
+
+_log_listener = None
+
+
+def setup_logging(log_dir=None, max_bytes=5 * 1024 * 1024, backup_count=5):
+    """
+    配置日誌系統: 根記錄器只將日誌放入隊列, 文件/控制台/GUI 的輸出由後台線程的 QueueListener 完成
+    :param log_dir: 日誌目錄, 預設為系統臨時目錄下的 DG-LAB-VRCOSC/logs
+    :param max_bytes: 單個日誌文件的最大大小, 超出後輪替
+    :param backup_count: 保留的輪替文件數量
+    """
+    global _log_listener
 
-def setup_logging():
     # 獲取當前時間，用於生成日誌檔案名
     log_filename = datetime.now().strftime("DG-LAB-VRCOSC_%Y-%m-%d_%H-%M-%S.log")
 
     # 創建日誌目錄（如果不存在）
-    log_dir = "Z:\Temp\logs"
+    log_dir = log_dir or DEFAULT_LOG_DIR
     os.makedirs(log_dir, exist_ok=True)
 
     # 配置日誌格式
     log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s [in %(filename)s:%(lineno)d]'
 
-    # 創建文件日誌處理器，寫入新創建的日誌檔案
-    file_handler = logging.FileHandler(os.path.join(log_dir, log_filename), encoding='utf-8')
+    # 創建文件日誌處理器，按大小輪替
+    file_handler = logging.handlers.RotatingFileHandler(
+        os.path.join(log_dir, log_filename), maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
     file_handler.setLevel(logging.DEBUG)  # 文件日誌級別
     file_formatter = logging.Formatter(log_format)
     file_handler.setFormatter(file_formatter)
@@ -36,14 +55,69 @@ def setup_logging():
     )
     console_handler.setFormatter(console_formatter)
 
-    # 獲取根記錄器，並添加文件和控制台處理器
+    # 根記錄器僅添加 QueueHandler, 事件循環中不進行磁碟與控制台 I/O
+    log_queue = queue.SimpleQueue()
     logger = logging.getLogger()
     logger.setLevel(logging.DEBUG)  # 全局日誌級別
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    _log_listener = logging.handlers.QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True)
+    _log_listener.start()
+    atexit.register(stop_logging)
 
     # 可選：禁用第三方庫的日誌
     logging.getLogger("websockets.server").setLevel(logging.WARNING)
     logging.getLogger("websockets.protocol").setLevel(logging.WARNING)
     logging.getLogger('qasync').setLevel(logging.WARNING)
 
+
+def add_log_sink(handler):
+    """
+    添加額外的日誌輸出 (如 GUI), 由後台線程調用, handler 需自行保證線程安全
+    未調用 setup_logging 時直接添加到根記錄器
+    """
+    if _log_listener is None:
+        logging.getLogger().addHandler(handler)
+    else:
+        _log_listener.handlers = _log_listener.handlers + (handler,)
+
+
+def stop_logging():
+    """停止後台日誌線程並輸出隊列中剩餘的日誌"""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+
+class RateLimitedLogger:
+    """
+    熱路徑日誌限流: 同一條消息模板在 interval 秒內最多輸出一次, 輸出時附帶期間略過的條數
+    使用 % 格式參數, 被略過的日誌不會進行字串格式化
+    """
+
+    def __init__(self, logger, interval=1.0):
+        self.logger = logger
+        self.interval = interval
+        self.last_log_time = {}
+        self.suppressed = {}
+
+    def log(self, level, msg, *args):
+        if not self.logger.isEnabledFor(level):
+            return
+        now = time.monotonic()
+        if now - self.last_log_time.get(msg, float('-inf')) < self.interval:
+            self.suppressed[msg] = self.suppressed.get(msg, 0) + 1
+            return
+        self.last_log_time[msg] = now
+        suppressed = self.suppressed.pop(msg, 0)
+        if suppressed:
+            msg = f"{msg} (已略過 {suppressed} 條)"
+        self.logger.log(level, msg, *args, stacklevel=3)
+
+    def debug(self, msg, *args):
+        self.log(logging.DEBUG, msg, *args)
+
+    def info(self, msg, *args):
+        self.log(logging.INFO, msg, *args)
@@ -0,0 +1,135 @@
+"""
+osc_mailbox.py
+OSC 處理任務的有界郵箱: 每個地址一個隊列, 由一個 worker 任務按順序處理, 長時間空閒的郵箱會被回收
+"""
+import asyncio
+from collections import deque
+
+from latency import current_trace
+from control_scheduler import control_scheduler, PRIORITY_DISPLAY
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+DROP_OLDEST = 'drop_oldest'  # 隊列已滿時丟棄最舊的消息, 適用於 Float 等只關心最新值的參數
+ORDERED = 'ordered'  # 按順序處理, 隊列已滿時丟棄新的按下消息, 鬆開消息永不丟棄, 保證按下/鬆開成對
+MAILBOX_IDLE_TIMEOUT = 60.0  # 空閒郵箱的回收時間 (秒)
+
+
+class OSCMailbox:
+    """
+    單個 OSC 地址的郵箱
+    """
+
+    def __init__(self, key, policy, maxsize):
+        self.key = key
+        self.policy = policy
+        self.maxsize = max(1, maxsize)
+        self.queue = deque()
+        self.wakeup = asyncio.Event()
+        self.dropped = 0
+        self.processed = 0
+        self.waiting = False  # worker 正在等待新消息 (不在處理中)
+        self.idle_mark = 0  # 上次回收檢查時的 processed, 用於判斷期間是否有消息
+        self.worker_task = asyncio.create_task(self.run())
+
+    def put(self, handler, args, trace=None):
+        if len(self.queue) >= self.maxsize:
+            if self.policy == DROP_OLDEST:
+                self.queue.popleft()
+                self.dropped += 1
+            elif args and args[-1]:  # ORDERED: 僅丟棄按下消息 (最後一個參數為 OSC 數值)
+                self.dropped += 1
+                return
+        self.queue.append((handler, args, trace))
+        self.wakeup.set()
+
+    async def run(self):
+        while True:
+            if not self.queue:
+                self.wakeup.clear()
+                self.waiting = True
+                await self.wakeup.wait()
+                self.waiting = False
+                continue
+            handler, args, trace = self.queue.popleft()
+            if trace is not None:
+                trace.stamp('handler')
+            token = current_trace.set(trace)
+            try:
+                await handler(*args)
+            except Exception as e:
+                logger.error(f"OSC 地址 {self.key} 處理時發生錯誤: {e}")
+            finally:
+                current_trace.reset(token)
+            self.processed += 1
+
+    def close(self):
+        self.worker_task.cancel()
+
+
+class OSCMailboxRouter:
+    """
+    按地址分配郵箱, 不同類型的參數使用不同的策略
+    """
+
+    def __init__(self, float_policy=DROP_OLDEST, float_size=4, button_policy=ORDERED, button_size=32,
+                 idle_timeout=MAILBOX_IDLE_TIMEOUT):
+        """
+        :param idle_timeout: 郵箱在此時間 (秒) 內沒有任何消息時取消 worker 並移除, 下次收到消息時重新創建
+            通配符映射會為每個實際收到的地址創建郵箱, 不回收時 Avatar 參數名越多常駐任務越多
+        """
+        self.policies = {
+            'float': (float_policy, float_size),
+            'button': (button_policy, button_size),
+        }
+        self.mailboxes = {}
+        self.evicted = 0
+        # 每隔半個超時檢查一次, 郵箱在空閒 idle_timeout 到 1.5 倍 idle_timeout 之間被回收
+        self.evict_job = control_scheduler.every(
+            'osc_mailbox_evict', idle_timeout / 2, self.evict_idle, PRIORITY_DISPLAY, delay=idle_timeout)
+
+    def post(self, key, kind, handler, *args, trace=None):
+        """
+        :param key: 郵箱名稱, 一般為 OSC 地址
+        :param kind: 'float' 或 'button', 決定新建郵箱時使用的策略
+        :param handler: 處理消息的協程函數, 以 args 調用, args 的最後一個參數為 OSC 數值
+        :param trace: 延遲記錄 (LatencyTrace), 處理期間設置為 current_trace
+        """
+        mailbox = self.mailboxes.get(key)
+        if mailbox is None:
+            policy, maxsize = self.policies[kind]
+            mailbox = self.mailboxes[key] = OSCMailbox(key, policy, maxsize)
+        mailbox.put(handler, args, trace)
+
+    def evict_idle(self):
+        """回收自上次檢查以來沒有收到消息且沒有處理中消息的郵箱"""
+        for key, mailbox in list(self.mailboxes.items()):
+            if mailbox.waiting and not mailbox.queue and mailbox.processed == mailbox.idle_mark:
+                mailbox.close()
+                del self.mailboxes[key]
+                self.evicted += 1
+            else:
+                mailbox.idle_mark = mailbox.processed
+
+    def discard(self, key):
+        """丟棄郵箱中尚未處理的消息, 用於地址映射移除或修改後不再以舊配置處理"""
+        mailbox = self.mailboxes.get(key)
+        if mailbox is not None:
+            mailbox.dropped += len(mailbox.queue)
+            mailbox.queue.clear()
+
+    def get_stats(self):
+        """
+        返回 [(key, 隊列深度, 丟棄數量, 已處理數量)], 丟棄數量多的排在前面
+        """
+        stats = [(mailbox.key, len(mailbox.queue), mailbox.dropped, mailbox.processed)
+                 for mailbox in self.mailboxes.values()]
+        return sorted(stats, key=lambda item: (item[2], item[1]), reverse=True)
+
+    def close(self):
+        self.evict_job.cancel()
+        for mailbox in self.mailboxes.values():
+            mailbox.close()
+        self.mailboxes.clear()
@@ -0,0 +1,95 @@
+"""
+osc_prefilter.py
+OSC UDP 數據包預過濾: 僅讀取地址字串, 未映射的地址在完整解析參數前直接丟棄
+"""
+import asyncio
+import time
+
+from pythonosc.osc_message_builder import build_msg
+
+from latency import latency_tracker
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+OSC_BUNDLE_PREFIX = b'#bundle'
+
+
+class OSCAddressFilter:
+    """
+    已映射 OSC 地址的索引
+    精確地址使用集合查找, 包含 * 的地址取 * 之前的部分作為前綴匹配, 最終匹配仍由 dispatcher 完成
+    """
+
+    def __init__(self):
+        self.exact_addresses = frozenset()
+        self.prefixes = ()
+        self.accepted_packets = 0
+        self.dropped_packets = 0
+
+    def update(self, addresses):
+        exact_addresses = set()
+        prefixes = set()
+        for address in addresses:
+            if '*' in address:
+                prefixes.add(address.split('*', 1)[0].encode('utf-8'))
+            else:
+                exact_addresses.add(address.encode('utf-8'))
+        # 整體替換, 避免接收過程中讀取到更新了一半的索引
+        self.exact_addresses = frozenset(exact_addresses)
+        self.prefixes = tuple(prefixes)
+        logger.info(f"OSC 地址過濾已更新: {len(exact_addresses)} 個地址, {len(prefixes)} 個前綴")
+
+    def accepts(self, address):
+        """
+        :param address: 數據包中地址部分的 memoryview
+        """
+        if address in self.exact_addresses:
+            return True
+        for prefix in self.prefixes:
+            if address[:len(prefix)] == prefix:
+                return True
+        return False
+
+
+class PrefilteredOSCProtocol(asyncio.DatagramProtocol):
+    """
+    替代 pythonosc 的 AsyncIOOSCUDPServer 協議, 通過地址過濾後才交給 dispatcher 完整解析
+    """
+
+    def __init__(self, dispatcher, address_filter):
+        self.dispatcher = dispatcher
+        self.address_filter = address_filter
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, client_address):
+        received = time.perf_counter()
+        if not data.startswith(OSC_BUNDLE_PREFIX):  # bundle 中包含多條消息, 直接交給 dispatcher
+            address_end = data.find(b'\x00')
+            if address_end <= 0 or not self.address_filter.accepts(memoryview(data)[:address_end]):
+                self.address_filter.dropped_packets += 1
+                return
+        self.address_filter.accepted_packets += 1
+        latency_tracker.last_packet_time = received  # 供 dispatcher 調用的處理函數創建延遲記錄
+
+        responses = self.dispatcher.call_handlers_for_packet(data, client_address)
+        for response in responses:
+            if not isinstance(response, tuple):
+                response = [response]
+            self.transport.sendto(build_msg(response[0], response[1:]).dgram, client_address)
+
+
+async def create_prefiltered_osc_endpoint(server_address, dispatcher, address_filter):
+    """
+    創建帶地址預過濾的 OSC UDP 伺服器
+    :return: (transport, protocol)
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.create_datagram_endpoint(
+        lambda: PrefilteredOSCProtocol(dispatcher, address_filter),
+        local_addr=server_address
+    )
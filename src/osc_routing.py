@@ -0,0 +1,182 @@
+"""
+osc_routing.py
+SoundPad 面板按鍵的路由表與精確匹配的 OSC dispatcher
+"""
+import functools
+import re
+from collections import namedtuple, defaultdict
+from types import MappingProxyType
+
+from pythonosc import dispatcher
+from pythonosc.dispatcher import Handler
+
+from pulse_data import PULSE_LIBRARY
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 默認 SoundPad 按鍵映射, 可在 config.yml 設置中的 soundpad_keymap 覆蓋
+# 值為動作名稱, 或 {'action': 動作名稱, 'pulse': 波形序號或名稱}; 值為 null 時移除該地址
+DEFAULT_SOUNDPAD_KEYMAP = {
+    "/avatar/parameters/SoundPad/PanelControl": "set_panel_control",
+    "/avatar/parameters/SoundPad/Button/1": "set_mode",
+    "/avatar/parameters/SoundPad/Button/2": "reset_strength",
+    "/avatar/parameters/SoundPad/Button/3": "decrease_strength",
+    "/avatar/parameters/SoundPad/Button/4": "increase_strength",
+    "/avatar/parameters/SoundPad/Button/5": "fire_mode",
+    "/avatar/parameters/SoundPad/Button/6": "toggle_chatbox",  # ChatBox 開關控制
+    # 波形控制
+    "/avatar/parameters/SoundPad/Button/7": {"action": "set_pulse", "pulse": 2},
+    "/avatar/parameters/SoundPad/Button/8": {"action": "set_pulse", "pulse": 14},
+    "/avatar/parameters/SoundPad/Button/9": {"action": "set_pulse", "pulse": 4},
+    "/avatar/parameters/SoundPad/Button/10": {"action": "set_pulse", "pulse": 5},
+    "/avatar/parameters/SoundPad/Button/11": {"action": "set_pulse", "pulse": 6},
+    "/avatar/parameters/SoundPad/Button/12": {"action": "set_pulse", "pulse": 7},
+    "/avatar/parameters/SoundPad/Button/13": {"action": "set_pulse", "pulse": 8},
+    "/avatar/parameters/SoundPad/Button/14": {"action": "set_pulse", "pulse": 9},
+    "/avatar/parameters/SoundPad/Button/15": {"action": "set_pulse", "pulse": 1},
+    "/avatar/parameters/SoundPad/Volume": "set_strength_step",  # 數值調節 Float
+    "/avatar/parameters/SoundPad/Page": "set_channel",  # 通道調節 INT
+}
+
+# 動作名稱 -> 構造處理函數, 處理函數接收 OSC 參數值並在調用時讀取當前選擇的通道
+PAD_ACTIONS = {
+    "set_panel_control": lambda controller, spec: controller.set_panel_control,
+    "set_mode": lambda controller, spec: lambda value: controller.set_mode(value, controller.current_select_channel),
+    "reset_strength": lambda controller, spec: lambda value: controller.reset_strength(value, controller.current_select_channel),
+    "decrease_strength": lambda controller, spec: lambda value: controller.decrease_strength(value, controller.current_select_channel),
+    "increase_strength": lambda controller, spec: lambda value: controller.increase_strength(value, controller.current_select_channel),
+    "fire_mode": lambda controller, spec: lambda value: controller.strength_fire_mode(
+        value, controller.current_select_channel, controller.fire_mode_strength_step),
+    "toggle_chatbox": lambda controller, spec: controller.toggle_chatbox,
+    "set_pulse": lambda controller, spec: _bind_pulse_action(controller, spec),
+    "set_strength_step": lambda controller, spec: controller.set_strength_step,
+    "set_channel": lambda controller, spec: controller.set_channel,
+}
+
+# 面板控制被禁用時仍然需要響應的動作
+ALWAYS_ENABLED_ACTIONS = {"set_panel_control"}
+# 僅關心最新值的動作 (Float/INT 參數), 其餘動作按按鍵的按下/鬆開順序處理
+LATEST_VALUE_ACTIONS = {"set_strength_step", "set_channel"}
+
+PadRoute = namedtuple('PadRoute', ['action', 'handler', 'always_enabled', 'kind'])
+# dispatcher 查找用的不可變映射快照: exact 為 地址 -> (Handler, ...), wildcards 為 ((已編譯的正則, (Handler, ...)), ...)
+RoutingSnapshot = namedtuple('RoutingSnapshot', ['exact', 'wildcards'])
+
+
+@functools.lru_cache(maxsize=256)
+def compile_address_pattern(address):
+    """
+    映射地址 -> 已編譯的正則, 與 pythonosc 的行為一致, * 可匹配包含 / 在內的任意字符
+    不含 * 的地址只匹配自身
+    """
+    return re.compile('.*?'.join(map(re.escape, address.split('*'))))
+
+
+def _bind_pulse_action(controller, spec):
+    pulse_index = PULSE_LIBRARY[spec['pulse']].pulse_id  # 支持波形序號或名稱
+    return lambda value: controller.set_pulse_data(value, controller.current_select_channel, pulse_index)
+
+
+def merge_soundpad_keymap(overrides=None):
+    """
+    將設定中的按鍵映射合併到默認映射上
+    """
+    keymap = dict(DEFAULT_SOUNDPAD_KEYMAP)
+    for address, spec in (overrides or {}).items():
+        if spec is None:
+            keymap.pop(address, None)
+        else:
+            keymap[address] = spec
+    return keymap
+
+
+def compile_pad_routes(controller, keymap):
+    """
+    將按鍵映射編譯為 地址 -> PadRoute 的查找表
+    """
+    routes = {}
+    for address, spec in keymap.items():
+        if isinstance(spec, str):
+            spec = {'action': spec}
+        action = spec.get('action')
+        try:
+            handler = PAD_ACTIONS[action](controller, spec)
+        except (KeyError, IndexError, TypeError) as e:
+            logger.warning(f"忽略無效的按鍵映射 {address}: {spec} ({e!r})")
+            continue
+        kind = 'float' if action in LATEST_VALUE_ACTIONS else 'button'
+        routes[address] = PadRoute(action, handler, action in ALWAYS_ENABLED_ACTIONS, kind)
+    return routes
+
+
+class ExactMatchDispatcher(dispatcher.Dispatcher):
+    """
+    精確地址直接通過字典查找, 僅對包含 * 的映射地址進行模式匹配
+    查找只讀取 routes 快照, 映射修改時構建新快照後整體替換, 接收中的數據包不會看到更新了一半的映射
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._wildcard_patterns = {}  # 包含 * 的映射地址 -> 已編譯的正則
+        self.routes = RoutingSnapshot(MappingProxyType({}), ())
+        self.route_swaps = 0
+
+    def map(self, address, handler, *args, needs_reply_address=False):
+        handler = super().map(address, handler, *args, needs_reply_address=needs_reply_address)
+        self._publish_routes()
+        return handler
+
+    def unmap(self, address, handler, *args, needs_reply_address=False):
+        super().unmap(address, handler, *args, needs_reply_address=needs_reply_address)
+        if not self._map.get(address):
+            self._map.pop(address, None)
+        self._publish_routes()
+
+    def replace_routes(self, routes):
+        """
+        以 {地址: [Handler 或處理函數]} 整體替換全部映射, 傳入已有的 Handler 時原樣保留
+        """
+        new_map = defaultdict(list)
+        for address, handlers in routes.items():
+            new_map[address] = [handler if isinstance(handler, Handler) else Handler(handler, [])
+                                for handler in handlers]
+        self._map = new_map
+        self._publish_routes()
+
+    def _publish_routes(self):
+        exact = {}
+        wildcards = []
+        patterns = {}
+        for address, handlers in self._map.items():
+            if not handlers:
+                continue
+            if '*' in address:
+                patterns[address] = self._wildcard_patterns.get(address) or compile_address_pattern(address)
+                wildcards.append((patterns[address], tuple(handlers)))
+            else:
+                exact[address] = tuple(handlers)
+        self._wildcard_patterns = patterns
+        self.routes = RoutingSnapshot(MappingProxyType(exact), tuple(wildcards))  # 單次賦值完成替換
+        self.route_swaps += 1
+
+    def handlers_for_address(self, address_pattern):
+        # VRChat 發送的是具體地址, 若收到 OSC 地址模式則交由 pythonosc 處理
+        if any(char in address_pattern for char in '*?[{'):
+            yield from super().handlers_for_address(address_pattern)
+            return
+
+        routes = self.routes  # 本次查找始終使用同一個快照
+        matched = False
+        handlers = routes.exact.get(address_pattern)
+        if handlers:
+            yield from handlers
+            matched = True
+        for pattern, handlers in routes.wildcards:
+            if pattern.fullmatch(address_pattern):
+                yield from handlers
+                matched = True
+
+        if not matched and self._default_handler:
+            yield self._default_handler
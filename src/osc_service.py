@@ -0,0 +1,164 @@
+"""
+osc_service.py
+OSC 接收服務: dispatcher 地址映射, UDP 預過濾與每個地址的處理郵箱, 界面與無界面模式共用
+"""
+import functools
+from types import MappingProxyType
+
+from pydglab_ws import Channel
+from pythonosc.dispatcher import Handler
+
+from osc_routing import ExactMatchDispatcher, compile_address_pattern
+from response_curve import ResponseCurve, curve_key
+from osc_prefilter import OSCAddressFilter, create_prefiltered_osc_endpoint
+from osc_mailbox import OSCMailboxRouter, DROP_OLDEST, ORDERED
+from latency import latency_tracker, SOURCE_SOUNDPAD, SOURCE_OSC
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class OSCService:
+    def __init__(self, settings):
+        """
+        :param settings: 設定字典, 讀取 osc_float_queue_* 與 osc_button_queue_* 郵箱參數
+        """
+        self.settings = settings
+        self.dispatcher = ExactMatchDispatcher()
+        self.controller = None  # 當前映射所屬的控制器, 更換後全部重建
+        self.osc_address_handlers = {}  # 自訂 OSC 地址的處理器 (Handler)
+        self.osc_address_channels = {}  # 自訂 OSC 地址 -> (輸出通道集合, 曲線配置, 權重, 優先級)
+        self.panel_control_handlers = {}  # 面板控制 OSC 地址的處理器 (Handler)
+        self.osc_address_filter = OSCAddressFilter()  # 接收 UDP 數據包時按已映射地址預過濾
+        self.osc_mailboxes = None  # 每個 OSC 地址的有界處理隊列, 在伺服器啟動後創建
+        self.transport = None
+
+    async def start(self, osc_port):
+        """
+        創建處理郵箱並開始監聽 OSC 埠
+        """
+        self.osc_mailboxes = OSCMailboxRouter(
+            float_policy=self.settings.get('osc_float_queue_policy', DROP_OLDEST),
+            float_size=self.settings.get('osc_float_queue_size', 4),
+            button_policy=self.settings.get('osc_button_queue_policy', ORDERED),
+            button_size=self.settings.get('osc_button_queue_size', 32)
+        )
+        # 設置 OSC 伺服器, 未映射地址的數據包在解析參數前丟棄
+        self.transport, _ = await create_prefiltered_osc_endpoint(
+            ("0.0.0.0", osc_port), self.dispatcher, self.osc_address_filter
+        )
+        logger.info(f"OSC Server Listening on port {osc_port}")
+
+    def close(self):
+        if self.transport:
+            self.transport.close()
+            self.transport = None
+        if self.osc_mailboxes:
+            self.osc_mailboxes.close()
+
+    def update_mappings(self, controller, osc_addresses):
+        """
+        按差異更新自訂 OSC 地址映射, 未變化的地址保留原處理器; 新映射表構建完成後整體替換, 並確保面板控制地址已映射
+        :param osc_addresses: [{'address': 地址, 'channels': {'A': bool, 'B': bool},
+                                'curve': 可選的響應曲線參數, 'weight': 合併權重, 'priority': 合併優先級}]
+        """
+        desired = {}
+        curves = {}
+        for addr in osc_addresses:
+            address = addr['address'].strip()
+            if not address:
+                continue  # 尚未填寫的地址
+            channels = frozenset(channel for channel, enabled in addr['channels'].items() if enabled)
+            previous_channels, previous_curve, _, _ = desired.get(address, (frozenset(), None, None, None))
+            if addr.get('curve'):
+                curves[address] = addr['curve']
+            # 重複的地址合併通道, 曲線, 權重與優先級使用最後一個配置
+            desired[address] = (previous_channels | channels, curve_key(addr.get('curve')) or previous_curve,
+                                float(addr.get('weight', 1.0)), int(addr.get('priority', 0)))
+
+        rebuild = controller is not self.controller
+        if rebuild:
+            self.controller = controller
+            self.osc_address_handlers = {}
+            self.osc_address_channels = {}
+            self.panel_control_handlers = self.build_panel_control_handlers(controller)
+        current = self.osc_address_channels
+        added = desired.keys() - current.keys()
+        removed = current.keys() - desired.keys()
+        changed = {address for address in desired.keys() & current.keys() if current[address] != desired[address]}
+        if not (rebuild or added or removed or changed):
+            return
+
+        handlers = {address: handler for address, handler in self.osc_address_handlers.items()
+                    if address not in removed and address not in changed}
+        for address in added | changed:
+            enabled_channels, _, weight, priority = desired[address]
+            channels = MappingProxyType({channel: channel in enabled_channels for channel in ('A', 'B')})
+            curve = ResponseCurve.from_config(curves[address]) if address in curves else None  # 查找表與濾波狀態隨處理器重建
+            handlers[address] = Handler(functools.partial(
+                self.handle_osc_message_task_pb_with_channels, controller=controller, channels=channels, curve=curve,
+                weight=weight, priority=priority), [])
+
+        if not rebuild:
+            self.remove_float_sources(controller, removed, changed, desired)
+
+        routes = {}
+        for address, handler in (*self.panel_control_handlers.items(), *handlers.items()):
+            routes.setdefault(address, []).append(handler)
+        self.dispatcher.replace_routes(routes)
+        self.osc_address_filter.update(routes)  # 更新 UDP 預過濾的地址索引
+        self.osc_address_handlers = handlers
+        self.osc_address_channels = desired
+        logger.info(f"OSC 地址映射已更新: 新增 {len(added)} 移除 {len(removed)} 修改 {len(changed)} "
+                    f"保留 {len(handlers) - len(added) - len(changed)}")
+
+    def remove_float_sources(self, controller, removed, changed, desired):
+        """
+        從交互模式的合併中移除已刪除地址與已取消勾選的通道, 並丟棄這些地址郵箱中按舊配置排隊的消息
+        合併來源與郵箱以實際收到的地址為鍵, 包含 * 的映射按模式匹配; 仍被其他映射輸出到該通道的地址保留
+        """
+        patterns = {address: compile_address_pattern(address) for address in removed | changed}
+        dropped = {address: self.osc_address_channels[address][0] - (desired[address][0] if address in desired
+                                                                      else frozenset())
+                   for address in patterns}
+        aggregator = controller.float_aggregator
+        for channel in (Channel.A, Channel.B):
+            stale = [source for source in aggregator.sources[channel]
+                     if any(channel.name in dropped[address] and pattern.fullmatch(source)
+                            for address, pattern in patterns.items())
+                     and not self.maps_to_channel(desired, source, channel)]
+            for source in stale:
+                aggregator.remove_source(source, (channel,))
+        if self.osc_mailboxes:
+            for key in list(self.osc_mailboxes.mailboxes):
+                if key not in controller.pad_routes and any(pattern.fullmatch(key) for pattern in patterns.values()):
+                    self.osc_mailboxes.discard(key)
+
+    @staticmethod
+    def maps_to_channel(desired, source, channel):
+        """source 是否仍被 desired 中的某個映射輸出到 channel"""
+        return any(channel.name in channels and compile_address_pattern(address).fullmatch(source)
+                   for address, (channels, *_) in desired.items())
+
+    def build_panel_control_handlers(self, controller):
+        """按路由表為面板控制功能的精確 OSC 地址創建處理器"""
+        handler = Handler(functools.partial(self.handle_osc_message_task_pad, controller=controller), [])
+        return {address: handler for address in controller.pad_routes}
+
+    def handle_osc_message_task_pad(self, address, *args, controller):
+        trace = latency_tracker.begin_trace(SOURCE_SOUNDPAD, latency_tracker.last_packet_time)
+        if trace:
+            trace.stamp('dispatch')
+        route = controller.pad_routes.get(address)
+        kind = route.kind if route else 'button'
+        self.osc_mailboxes.post(address, kind, controller.handle_osc_message_pad, address, *args, trace=trace)
+
+    def handle_osc_message_task_pb_with_channels(self, address, *args, controller, channels, curve=None,
+                                                 weight=1.0, priority=0):
+        trace = latency_tracker.begin_trace(SOURCE_OSC, latency_tracker.last_packet_time)
+        if trace:
+            trace.stamp('dispatch')
+        handler = functools.partial(controller.handle_osc_message_pb, channels=channels, curve=curve,
+                                    weight=weight, priority=priority)
+        self.osc_mailboxes.post(address, 'float', handler, address, *args, trace=trace)
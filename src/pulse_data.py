@@ -1,3 +1,5 @@
+from array import array
+
 PULSE_NAME = [
     '呼吸',
     '潮汐',
@@ -5,7 +7,7 @@ PULSE_NAME = [
     '快速按捏',
     '按捏漸強',
     '心跳節奏',
-    '壓縮',  #6 發送壓縮波形等長波形需要注意不超過單次發送上限 ,比如這組x5會超限
+    '壓縮',  #6 長波形由 PulseScheduler 按單次發送上限自動分段
     '節奏步伐',
     '顆粒摩擦',
     '漸變彈跳',
@@ -140,3 +142,64 @@ PULSE_DATA = {
         ((0, 0, 0, 0), (0, 0, 0, 0))
     ]
 }
+
+
+# 預編譯波形庫: 載入時驗證並轉換為緊湊的數組與不可變的幀元組, 發送時無需重複驗證與分配
+PULSE_FREQUENCY_RANGE = (0, 240)  # 頻率 0 用於靜默幀
+PULSE_INTENSITY_RANGE = (0, 100)
+
+
+class CompiledPulse:
+    """
+    預編譯的波形
+    frequency/intensity: 每幀 4 個值依次排列的數組
+    """
+    __slots__ = ('pulse_id', 'name', 'frequency', 'intensity', 'frames')
+
+    def __init__(self, pulse_id, name, frames):
+        if not frames:
+            raise ValueError(f"波形 {name} 沒有任何幀")
+        self.pulse_id = pulse_id
+        self.name = name
+        self.frequency = array('B')
+        self.intensity = array('B')
+        for index, frame in enumerate(frames):
+            if len(frame) != 2 or len(frame[0]) != 4 or len(frame[1]) != 4:
+                raise ValueError(f"波形 {name} 第 {index} 幀格式錯誤: {frame}")
+            frequency, intensity = frame
+            if not all(PULSE_FREQUENCY_RANGE[0] <= value <= PULSE_FREQUENCY_RANGE[1] for value in frequency):
+                raise ValueError(f"波形 {name} 第 {index} 幀頻率超出範圍: {frequency}")
+            if not all(PULSE_INTENSITY_RANGE[0] <= value <= PULSE_INTENSITY_RANGE[1] for value in intensity):
+                raise ValueError(f"波形 {name} 第 {index} 幀強度超出範圍: {intensity}")
+            self.frequency.extend(frequency)
+            self.intensity.extend(intensity)
+        self.frames = tuple(
+            (tuple(self.frequency[i:i + 4]), tuple(self.intensity[i:i + 4]))
+            for i in range(0, len(self.frequency), 4)
+        )
+
+    def __len__(self):
+        return len(self.frames)
+
+
+class PulseLibrary:
+    """
+    以波形 ID (PULSE_NAME 中的序號) 或名稱索引的預編譯波形庫
+    """
+
+    def __init__(self, names, data):
+        if set(names) != set(data):
+            raise ValueError(f"PULSE_NAME 與 PULSE_DATA 不一致: {set(names) ^ set(data)}")
+        self.by_id = tuple(CompiledPulse(pulse_id, name, data[name]) for pulse_id, name in enumerate(names))
+        self.by_name = {pulse.name: pulse for pulse in self.by_id}
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.by_name[key]
+        return self.by_id[key]
+
+    def __len__(self):
+        return len(self.by_id)
+
+
+PULSE_LIBRARY = PulseLibrary(PULSE_NAME, PULSE_DATA)
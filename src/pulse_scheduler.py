@@ -0,0 +1,90 @@
+"""
+pulse_scheduler.py
+波形隊列補充: 模擬設備端各通道的波形隊列, 僅追加維持緩衝深度所需的幀數
+"""
+import math
+import time
+
+from pydglab_ws import Channel
+from pydglab_ws.utils import PULSE_DATA_MAX_LENGTH
+from pulse_data import PULSE_LIBRARY
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+PULSE_FRAME_DURATION = 0.1  # 每幀波形數據代表 100ms
+APP_PULSE_QUEUE_MAX_LENGTH = 500  # App 端波形隊列最大長度, 超出部分會被丟棄
+
+
+class ChannelPulseQueue:
+    """
+    單個通道的設備端波形隊列模型
+    """
+
+    def __init__(self):
+        self.pulse_index = None  # 當前發送的波形, None 表示設備隊列狀態未知
+        self.cursor = 0  # 下一次追加時從波形的第幾幀開始, 保證循環播放時銜接連續
+        self.queue_end_time = 0.0  # 預計設備隊列播放完畢的時間 (time.monotonic)
+
+    def buffered_frames(self, now):
+        """設備端剩餘的幀數"""
+        return max(0, math.floor((self.queue_end_time - now) / PULSE_FRAME_DURATION))
+
+
+class PulseScheduler:
+    """
+    按需補充波形隊列, 僅在波形切換時清空設備隊列
+    """
+
+    def __init__(self, client, buffer_seconds=2.0):
+        """
+        :param client: DGLabWSServer 的用戶端實例
+        :param buffer_seconds: 設備端需要保持的波形緩衝時長
+        """
+        self.client = client
+        self.target_frames = min(max(1, round(buffer_seconds / PULSE_FRAME_DURATION)), APP_PULSE_QUEUE_MAX_LENGTH)
+        self.queues = {Channel.A: ChannelPulseQueue(), Channel.B: ChannelPulseQueue()}
+        self.frames_sent = {Channel.A: 0, Channel.B: 0}
+
+    def reset(self):
+        """
+        App 重新連接後設備隊列狀態未知, 下次更新時重新清空並填充
+        """
+        for queue in self.queues.values():
+            queue.pulse_index = None
+
+    async def update(self, channel, pulse_index):
+        """
+        保持通道緩衝深度, 波形變更時先清空設備隊列
+        """
+        queue = self.queues[channel]
+        now = time.monotonic()
+        if queue.pulse_index != pulse_index:
+            await self.client.clear_pulses(channel)
+            logger.info(f"通道 {channel.name} 切換波形 {PULSE_LIBRARY[pulse_index].name}")
+            queue.pulse_index = pulse_index
+            queue.cursor = 0
+            queue.queue_end_time = now
+
+        missing_frames = self.target_frames - queue.buffered_frames(now)
+        if missing_frames <= 0:
+            return
+        frames = self.next_frames(queue, missing_frames)
+        # 單條消息的幀數有上限, 超出時分多次發送
+        for start in range(0, len(frames), PULSE_DATA_MAX_LENGTH):
+            await self.client.add_pulses(channel, *frames[start:start + PULSE_DATA_MAX_LENGTH])
+        queue.queue_end_time = max(queue.queue_end_time, now) + len(frames) * PULSE_FRAME_DURATION
+        self.frames_sent[channel] += len(frames)
+
+    def next_frames(self, queue, count):
+        """
+        從波形當前位置開始循環取出 count 幀已校驗的波形數據
+        """
+        pulse = PULSE_LIBRARY[queue.pulse_index]
+        frames = []
+        while len(frames) < count:
+            take = min(count - len(frames), len(pulse) - queue.cursor)
+            frames.extend(pulse.frames[queue.cursor:queue.cursor + take])
+            queue.cursor = (queue.cursor + take) % len(pulse)
+        return frames
@@ -0,0 +1,223 @@
+"""
+response_curve.py
+OSC 浮點輸入 (0-1) 到通道強度的響應曲線: 死區, 輸出範圍, gamma/指數曲線, 遲滯與平滑濾波
+非線性曲線按強度上限預先計算為查找表, 每個數據包只需一次查表; 線性曲線直接計算, 不受查找表的量化影響
+"""
+import math
+import time
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+CURVE_LINEAR = 'linear'
+CURVE_GAMMA = 'gamma'  # x ** gamma, gamma > 1 時小輸入輸出較弱
+CURVE_EXPONENTIAL = 'exponential'  # (e^(k*x) - 1) / (e^k - 1), k > 0 時小輸入輸出較弱
+
+SMOOTHING_EMA = 'ema'
+SMOOTHING_ONE_EURO = 'one_euro'
+
+LUT_RESOLUTION = 1024  # 查找表的輸入分段數, 輸入按 1/1024 量化, 在分段邊界附近可能與直接計算相差一級強度
+MAX_CACHED_TABLES = 8  # 每條曲線保留的不同強度上限的查找表數量
+MAX_STRENGTH_LIMIT = 200  # 設備的最大強度上限, 創建曲線時按此生成一次查找表以檢查參數
+
+# 與原有映射相同: 輸入 0-1 線性映射到 [0.2 * 上限, 上限] 並向上取整
+DEFAULT_CURVE_CONFIG = {
+    'deadzone': 0.0,
+    'min': 0.2,
+    'max': 1.0,
+    'curve': CURVE_LINEAR,
+    'gamma': 1.0,
+    'exponent': 0.0,
+    'hysteresis': 0.0,
+    'smoothing': None,
+    'ema_alpha': 0.5,
+    'min_cutoff': 1.0,
+    'beta': 0.0,
+}
+
+
+class OneEuroFilter:
+    """
+    One Euro 濾波: 變化慢時截止頻率低以去除抖動, 變化快時提高截止頻率以減少延遲
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.0, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.value = None
+        self.derivative = 0.0
+        self.updated_at = None
+
+    @staticmethod
+    def _alpha(dt, cutoff):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def __call__(self, value, now):
+        if self.value is None:
+            self.value, self.updated_at = value, now
+            return value
+        dt = now - self.updated_at
+        if dt <= 0:
+            return self.value
+        derivative = (value - self.value) / dt
+        self.derivative += self._alpha(dt, self.d_cutoff) * (derivative - self.derivative)
+        cutoff = self.min_cutoff + self.beta * abs(self.derivative)
+        self.value += self._alpha(dt, cutoff) * (value - self.value)
+        self.updated_at = now
+        return self.value
+
+
+class EMAFilter:
+    def __init__(self, alpha=0.5):
+        self.alpha = alpha
+        self.value = None
+
+    def __call__(self, value, now):
+        self.value = value if self.value is None else self.value + self.alpha * (value - self.value)
+        return self.value
+
+
+class ResponseCurve:
+    """
+    查找表只與曲線參數和強度上限有關, 遲滯與平滑為每個通道單獨保存的狀態
+    線性曲線 (包括預設曲線) 直接計算, 計算量與查表相近, 結果與原有的 math.ceil(map_value(...)) 完全相同
+    """
+
+    def __init__(self, config=None, resolution=LUT_RESOLUTION, clock=time.monotonic):
+        """
+        :param config: 覆蓋 DEFAULT_CURVE_CONFIG 的參數, 未知參數, 無效值或無法計算的參數拋出 ValueError
+        """
+        config = dict(config or {})
+        unknown = config.keys() - DEFAULT_CURVE_CONFIG.keys()
+        if unknown:
+            raise ValueError(f"未知的曲線參數: {', '.join(sorted(unknown))}")
+        self.config = {**DEFAULT_CURVE_CONFIG, **config}
+        self.deadzone = float(self.config['deadzone'])
+        self.min_fraction = float(self.config['min'])
+        self.max_fraction = float(self.config['max'])
+        self.curve = self.config['curve']
+        self.gamma = float(self.config['gamma'])
+        self.exponent = float(self.config['exponent'])
+        self.hysteresis = float(self.config['hysteresis'])
+        self.smoothing = self.config['smoothing']
+        self.stateful = self.hysteresis > 0 or self.smoothing is not None
+        self.direct = self.curve == CURVE_LINEAR  # 不使用查找表
+        if not 0.0 <= self.deadzone < 1.0:
+            raise ValueError(f"deadzone 需要在 0-1 之間: {self.deadzone}")
+        if not 0.0 <= self.min_fraction <= self.max_fraction <= 1.0:
+            raise ValueError(f"需要 0 <= min <= max <= 1: {self.min_fraction}, {self.max_fraction}")
+        if self.curve not in (CURVE_LINEAR, CURVE_GAMMA, CURVE_EXPONENTIAL):
+            raise ValueError(f"未知的曲線類型: {self.curve}")
+        if self.gamma <= 0:
+            raise ValueError(f"gamma 需要大於 0: {self.gamma}")
+        if self.smoothing not in (None, SMOOTHING_EMA, SMOOTHING_ONE_EURO):
+            raise ValueError(f"未知的平滑方式: {self.smoothing}")
+        self.resolution = resolution
+        self.clock = clock
+        self.tables = {}  # 強度上限 -> 查找表
+        self.filters = {}  # 通道 -> 平滑濾波器
+        self.last_inputs = {}  # 通道 -> 遲滯判斷用的上次輸入
+        try:
+            if not self.direct:
+                self.table(MAX_STRENGTH_LIMIT)  # 參數可能只在計算時溢出 (如 exponent 過大), 在此失敗而不是在處理數據包時
+        except (ArithmeticError, ValueError) as e:
+            raise ValueError(f"曲線參數無法計算: {e!r}") from e
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        由 osc_addresses 中地址的 curve 欄位創建, 配置無效時記錄警告並使用默認曲線
+        """
+        try:
+            return cls(config)
+        except (ValueError, TypeError) as e:
+            logger.warning(f"忽略無效的響應曲線 {config}: {e}")
+            return cls()
+
+    def shape(self, x):
+        """0-1 -> 0-1 的曲線形狀"""
+        if self.curve == CURVE_GAMMA:
+            return x ** self.gamma
+        if self.curve == CURVE_EXPONENTIAL and self.exponent:
+            return math.expm1(self.exponent * x) / math.expm1(self.exponent)
+        return x
+
+    def evaluate(self, value, limit):
+        """不經過查找表直接計算強度, 用於線性曲線與生成查找表"""
+        value = min(max(value, 0.0), 1.0)
+        if self.deadzone and value < self.deadzone:
+            return 0
+        x = (value - self.deadzone) / (1.0 - self.deadzone)
+        low, high = limit * self.min_fraction, limit * self.max_fraction
+        return min(math.ceil(low + self.shape(x) * (high - low)), limit)  # 與原有的 map_value 計算順序相同
+
+    def _evaluate_linear(self, value, limit):
+        """線性曲線的 evaluate, 省去曲線形狀的調用"""
+        if value <= self.deadzone:
+            return 0 if self.deadzone and value < self.deadzone else math.ceil(limit * self.min_fraction)
+        if value >= 1.0:
+            return min(math.ceil(limit * self.max_fraction), limit)
+        low = limit * self.min_fraction
+        return math.ceil(low + (value - self.deadzone) / (1.0 - self.deadzone) * (limit * self.max_fraction - low))
+
+    def table(self, limit):
+        """強度上限對應的查找表, 強度上限第一次出現時生成"""
+        table = self.tables.get(limit)
+        if table is None:
+            if len(self.tables) >= MAX_CACHED_TABLES:
+                self.tables.clear()
+            table = tuple(self.evaluate(i / self.resolution, limit) for i in range(self.resolution + 1))
+            self.tables[limit] = table
+        return table
+
+    def strength(self, value, limit, channel=None):
+        """
+        輸入值經過平滑與遲滯後計算或查表得到強度
+        :param channel: 平滑與遲滯狀態按通道區分
+        """
+        if self.stateful:
+            value = self._apply_state(value, channel)
+        if self.direct:
+            return self._evaluate_linear(value, limit)
+        table = self.tables.get(limit) or self.table(limit)
+        index = int(value * self.resolution + 0.5)
+        if 0 <= index <= self.resolution:
+            return table[index]
+        return table[0] if index < 0 else table[-1]
+
+    def _apply_state(self, value, channel):
+        if self.smoothing is not None:
+            value = self._filter(channel)(value, self.clock())
+        if self.hysteresis > 0:
+            last_input = self.last_inputs.get(channel)
+            if last_input is not None and abs(value - last_input) < self.hysteresis:
+                return last_input
+            self.last_inputs[channel] = value
+        return value
+
+    def _filter(self, channel):
+        smoothing_filter = self.filters.get(channel)
+        if smoothing_filter is None:
+            if self.smoothing == SMOOTHING_EMA:
+                smoothing_filter = EMAFilter(float(self.config['ema_alpha']))
+            else:
+                smoothing_filter = OneEuroFilter(float(self.config['min_cutoff']), float(self.config['beta']))
+            self.filters[channel] = smoothing_filter
+        return smoothing_filter
+
+    def reset(self):
+        """清除平滑與遲滯狀態"""
+        self.filters.clear()
+        self.last_inputs.clear()
+
+
+def curve_key(config):
+    """曲線配置的可比較形式, 用於判斷地址的曲線是否變化"""
+    if not config:
+        return None
+    if not isinstance(config, dict):
+        return repr(config)
+    return tuple(sorted((key, repr(value)) for key, value in config.items()))
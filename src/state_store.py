@@ -0,0 +1,92 @@
+"""
+state_store.py
+控制器狀態存儲: 控制器寫入, 界面按幀合併讀取變化的欄位
+"""
+from types import MappingProxyType
+
+_MISSING = object()
+
+
+class StateSubscription:
+    """
+    訂閱者自上次讀取以來變化的欄位, 多次寫入同一欄位只保留最新值
+    """
+
+    def __init__(self, store, keys=None):
+        self.store = store
+        self.keys = frozenset(keys) if keys is not None else None  # None 表示訂閱全部欄位
+        self.dirty = set(store.values) if self.keys is None else set(self.keys & store.values.keys())
+
+    def take_changes(self):
+        """
+        返回 {欄位: 最新值} 並清空變化記錄, 無變化時返回空字典
+        """
+        if not self.dirty:
+            return {}
+        values = self.store.values
+        changes = {key: values[key] for key in self.dirty if key in values}
+        self.dirty.clear()
+        return changes
+
+
+class StateStore:
+    """
+    欄位值與原值相等時不記錄變化, 界面因此不會重繪未變化的部分
+    """
+
+    def __init__(self, **initial):
+        self.values = dict(initial)
+        self.version = 0  # 每次有欄位變化時遞增
+        self.subscriptions = []
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+    def set(self, key, value):
+        if self.values.get(key, _MISSING) == value:
+            return
+        self.values[key] = value
+        self.version += 1
+        for subscription in self.subscriptions:
+            if subscription.keys is None or key in subscription.keys:
+                subscription.dirty.add(key)
+
+    def update(self, changes):
+        for key, value in changes.items():
+            self.set(key, value)
+
+    def snapshot(self):
+        """返回當前所有欄位的只讀副本"""
+        return MappingProxyType(dict(self.values))
+
+    def subscribe(self, keys=None):
+        """
+        :param keys: 關心的欄位, 預設為全部; 訂閱後首次讀取會返回已有的全部欄位
+        """
+        subscription = StateSubscription(self, keys)
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self.subscriptions.remove(subscription)
+
+
+class StateField:
+    """
+    將實例屬性映射到實例 state (StateStore) 中的同名欄位, 讀寫方式與普通屬性相同
+    """
+
+    def __init__(self, default=None):
+        self.default = default
+        self.key = None
+
+    def __set_name__(self, owner, name):
+        self.key = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return instance.state.values.get(self.key, self.default)
+
+    def __set__(self, instance, value):
+        instance.state.set(self.key, value)
@@ -0,0 +1,170 @@
+"""
+status_publisher.py
+向 VRChat 回報控制器狀態: ChatBox 文字僅在內容變化時發送並受令牌桶限速, 強度等數值以 Avatar 參數逐項去重發送
+"""
+import time
+
+from pydglab_ws import Channel
+
+from control_scheduler import control_scheduler, PRIORITY_STATUS
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# Avatar 參數前綴, 不可與 OSC 輸入地址 (如 /avatar/parameters/DG-LAB/*) 重疊, 否則 VRChat 回傳的參數會被當作輸入處理
+PARAMETER_PREFIX = "/avatar/parameters/DGLabStatus/"
+
+# state 欄位 -> [(參數名, 轉換)], VRChat Int 參數範圍為 0-255
+STATUS_PARAMETERS = {
+    'app_status_online': [('Connected', bool)],
+    'strength_a': [('StrengthA', int)],
+    'strength_b': [('StrengthB', int)],
+    'strength_limit_a': [('LimitA', int)],
+    'strength_limit_b': [('LimitB', int)],
+    'is_dynamic_bone_mode_a': [('InteractiveA', bool)],
+    'is_dynamic_bone_mode_b': [('InteractiveB', bool)],
+    'pulse_mode_a': [('PulseA', int)],
+    'pulse_mode_b': [('PulseB', int)],
+    'current_select_channel': [('Channel', lambda channel: 0 if channel == Channel.A else 1)],
+    'fire_mode_strength_step': [('FireStep', int)],
+}
+# 強度佔上限的比例 (Float 0-1), 便於 Avatar 端直接驅動進度條
+RATIO_PARAMETERS = {
+    'RatioA': ('strength_a', 'strength_limit_a'),
+    'RatioB': ('strength_b', 'strength_limit_b'),
+}
+
+# VRChat 未公開 ChatBox 的確切限制, 連續發送過快會被暫時忽略; 以下數值在實測中不會觸發限制
+CHATBOX_MIN_INTERVAL = 2.0  # 平均每條消息間隔 (秒)
+CHATBOX_BURST = 2  # 允許連續發送的條數
+CHATBOX_KEEPALIVE = 15.0  # 內容不變時重發的間隔, 防止 ChatBox 超時消失
+
+
+class TokenBucket:
+    """
+    每秒補充 rate 個令牌, 最多保留 burst 個, 發送一次消耗一個
+    """
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = float(burst)
+        self.updated_at = clock()
+
+    def try_take(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class StatusPublisher:
+    """
+    ChatBox: 文字變化時發送, 令牌不足時保留最新文字待下次發送, 中間狀態直接丟棄
+    Avatar 參數: 訂閱 controller.state 的變化, 每個參數只在值改變時發送, 並定期全部重發一次
+    """
+
+    def __init__(self, controller, parameters=True, parameter_interval=0.1, chatbox_interval=0.25,
+                 chatbox_min_interval=CHATBOX_MIN_INTERVAL, chatbox_burst=CHATBOX_BURST,
+                 parameter_refresh=10.0):
+        """
+        :param controller: DGLabController, 提供 state, osc_client, enable_chatbox_status 與 format_status_text
+        :param parameters: 是否發送 Avatar 參數
+        :param parameter_interval: 檢查參數變化的間隔 (秒)
+        :param chatbox_interval: 檢查 ChatBox 內容變化的間隔 (秒), 實際發送頻率由令牌桶限制
+        :param parameter_refresh: 全部參數重發的間隔 (秒), 用於切換 Avatar 後恢復參數值
+        """
+        self.controller = controller
+        self.bucket = TokenBucket(1.0 / chatbox_min_interval, chatbox_burst)
+        self.parameter_refresh = parameter_refresh
+        self.last_chatbox_text = None  # 上次實際發送的文字
+        self.last_chatbox_time = 0.0
+        self.chatbox_version = None  # 上次生成文字時的 state.version
+        self.chatbox_pending = False  # 文字已變化但因限速尚未發送
+        self.sent_parameters = {}  # 參數名 -> 上次發送的值
+        self.last_refresh_time = 0.0
+        # 統計計數
+        self.chatbox_sent = 0
+        self.chatbox_delayed = 0
+        self.parameters_sent = 0
+        self.parameters_deduped = 0
+
+        self.parameter_subscription = None
+        self.parameter_job = None
+        if parameters:
+            self.parameter_subscription = controller.state.subscribe(set(STATUS_PARAMETERS) | {
+                key for keys in RATIO_PARAMETERS.values() for key in keys})
+            self.parameter_job = control_scheduler.every(
+                'status_parameters', parameter_interval, self.publish_parameters, PRIORITY_STATUS)
+        self.chatbox_job = control_scheduler.every(
+            'chatbox_status', chatbox_interval, self.publish_chatbox, PRIORITY_STATUS, error_backoff=5)
+
+    def close(self):
+        self.chatbox_job.cancel()
+        if self.parameter_job is not None:
+            self.parameter_job.cancel()
+            self.controller.state.unsubscribe(self.parameter_subscription)
+
+    def publish_chatbox(self):
+        """ChatBox 關閉時發送一次空字串清除內容"""
+        now = time.monotonic()
+        state_version = self.controller.state.version
+        keepalive = bool(self.last_chatbox_text) and now - self.last_chatbox_time >= CHATBOX_KEEPALIVE
+        if state_version == self.chatbox_version and not self.chatbox_pending and not keepalive:
+            return
+        self.chatbox_version = state_version
+        text = self.controller.format_status_text() if self.controller.enable_chatbox_status else ""
+        if text == self.last_chatbox_text and not keepalive:
+            self.chatbox_pending = False
+            return
+        if not self.bucket.try_take():
+            if not self.chatbox_pending:
+                self.chatbox_delayed += 1
+            self.chatbox_pending = True
+            return
+        self.controller.send_message_to_vrchat_chatbox(text)
+        self.last_chatbox_text = text
+        self.last_chatbox_time = now
+        self.chatbox_pending = False
+        self.chatbox_sent += 1
+
+    def publish_parameters(self):
+        now = time.monotonic()
+        if now - self.last_refresh_time >= self.parameter_refresh:
+            self.last_refresh_time = now
+            self.sent_parameters.clear()
+            self.parameter_subscription.take_changes()
+            changes = dict(self.controller.state.values)
+        else:
+            changes = self.parameter_subscription.take_changes()
+        if not changes:
+            return
+        values = self.controller.state.values
+        for key, value in changes.items():
+            for name, convert in STATUS_PARAMETERS.get(key, ()):
+                self._send_parameter(name, convert(value))
+        for name, (strength_key, limit_key) in RATIO_PARAMETERS.items():
+            if strength_key in changes or limit_key in changes:
+                limit = values.get(limit_key) or 0
+                ratio = min(values.get(strength_key, 0) / limit, 1.0) if limit else 0.0
+                self._send_parameter(name, round(ratio, 3))
+
+    def _send_parameter(self, name, value):
+        previous = self.sent_parameters.get(name, _MISSING)
+        if previous is not _MISSING and previous == value:
+            self.parameters_deduped += 1
+            return
+        self.sent_parameters[name] = value
+        self.controller.send_value_to_vrchat(PARAMETER_PREFIX + name, value)
+        self.parameters_sent += 1
+
+    def get_stats(self):
+        """返回 (chatbox_sent, chatbox_delayed, parameters_sent, parameters_deduped)"""
+        return self.chatbox_sent, self.chatbox_delayed, self.parameters_sent, self.parameters_deduped
@@ -0,0 +1,97 @@
+"""
+strength_coalescer.py
+動骨與 Contact 浮點輸入的強度合併發送
+"""
+from pydglab_ws import Channel, StrengthOperationType
+
+from latency import current_trace
+from control_scheduler import control_scheduler, PRIORITY_CONTROL
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class StrengthCoalescer:
+    """
+    每個通道僅保留最新的目標強度 (新值覆蓋舊值)，由固定頻率的發送任務送出
+    取整後的強度與上次發送值相同時不會重複寫入設備
+    """
+
+    def __init__(self, client, rate_hz=20, name='float_output'):
+        """
+        :param client: 提供 set_strength 的用戶端 (一般為 StrengthModel)
+        :param rate_hz: 每秒最多發送次數, 建議 10-30
+        :param name: control_scheduler 中的任務名稱
+        """
+        self.client = client
+        self.aggregator = None  # 可選的 ChannelAggregator, 每次發送前計算一次多來源合併結果
+        self.flush_job = None
+        self.rate_hz = rate_hz
+        self.pending_strength = {Channel.A: None, Channel.B: None}  # 等待發送的最新目標強度
+        self.pending_trace = {Channel.A: None, Channel.B: None}  # 最新目標強度對應的延遲記錄
+        self.last_sent_strength = {Channel.A: None, Channel.B: None}  # 上次實際發送的強度
+        # 統計計數, 用於對比輸入數量與實際寫入數量
+        self.inputs_received = {Channel.A: 0, Channel.B: 0}
+        self.writes_sent = {Channel.A: 0, Channel.B: 0}
+        self.flush_job = control_scheduler.every(name, self.interval, self.flush, PRIORITY_CONTROL)
+
+    @property
+    def rate_hz(self):
+        return self._rate_hz
+
+    @rate_hz.setter
+    def rate_hz(self, value):
+        self._rate_hz = min(max(float(value), 1.0), 60.0)  # 限制在 1-60 Hz
+        self.interval = 1.0 / self._rate_hz
+        if self.flush_job is not None:
+            self.flush_job.interval = self.interval  # 從下一次排程開始生效
+
+    def submit(self, channel, strength, trace=None):
+        """
+        記錄通道的目標強度, 覆蓋尚未發送的舊值
+        :param trace: 對應的延遲記錄, 預設為當前上下文中的記錄
+        """
+        self.inputs_received[channel] += 1
+        self.pending_strength[channel] = int(strength)
+        self.pending_trace[channel] = trace or current_trace.get()
+
+    def invalidate(self, channel):
+        """
+        其他來源修改了通道強度, 下次即使目標值相同也需要重新發送
+        """
+        self.last_sent_strength[channel] = None
+
+    async def flush(self):
+        """
+        發送各通道最新的目標強度
+        """
+        if self.aggregator is not None:
+            self.aggregator.evaluate()
+        for channel in (Channel.A, Channel.B):
+            strength = self.pending_strength[channel]
+            if strength is None:
+                continue
+            trace, self.pending_trace[channel] = self.pending_trace[channel], None
+            self.pending_strength[channel] = None
+            if strength == self.last_sent_strength[channel]:
+                continue
+            token = current_trace.set(trace)
+            try:
+                await self.client.set_strength(channel, StrengthOperationType.SET_TO, strength)
+            finally:
+                current_trace.reset(token)
+            self.last_sent_strength[channel] = strength
+            self.writes_sent[channel] += 1
+
+    def close(self):
+        self.flush_job.cancel()
+
+    def get_stats(self):
+        """
+        返回輸入與寫入計數 {'A': (inputs, writes), 'B': (inputs, writes)}
+        """
+        return {
+            channel.name: (self.inputs_received[channel], self.writes_sent[channel])
+            for channel in (Channel.A, Channel.B)
+        }
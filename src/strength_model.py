@@ -0,0 +1,101 @@
+"""
+strength_model.py
+通道強度模型: 設備已確認的強度 (不可變快照) 與本地已發送但未確認的指令分開記錄, 每次收到 StrengthData 時對賬
+"""
+import time
+from collections import namedtuple
+
+from pydglab_ws import Channel, StrengthOperationType
+
+from latency import latency_tracker, current_trace
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 設備回報的強度快照, 欄位名稱與 StrengthData 一致, 每次回報生成新的快照並遞增 version
+StrengthSnapshot = namedtuple('StrengthSnapshot', ['a', 'b', 'a_limit', 'b_limit', 'version'])
+# 已發送但尚未被設備確認的指令
+PendingCommand = namedtuple('PendingCommand', ['target', 'sent_at', 'trace'])
+
+
+class StrengthModel:
+    """
+    提供與 client.set_strength 相同的接口, 預期強度 (未確認指令的目標值, 否則為已確認值) 不變的寫入直接略過
+    """
+
+    def __init__(self, client, pending_timeout=1.0):
+        """
+        :param client: DGLabWSServer 的用戶端實例
+        :param pending_timeout: 指令超過此時間仍未被確認時放棄等待 (秒), 以設備回報為準
+        """
+        self.client = client
+        self.pending_timeout = pending_timeout
+        self.confirmed = None  # StrengthSnapshot, 收到第一次回報前為 None
+        self.pending = {Channel.A: None, Channel.B: None}  # 每個通道最新的未確認指令
+        self.writes_sent = 0
+        self.writes_skipped = 0
+
+    def on_ack(self, data):
+        """
+        收到 App 回報的 StrengthData, 生成新的快照並清除已確認或已超時的指令
+        :return: 新的 StrengthSnapshot
+        """
+        version = self.confirmed.version + 1 if self.confirmed else 1
+        self.confirmed = StrengthSnapshot(data.a, data.b, data.a_limit, data.b_limit, version)
+        now = time.monotonic()
+        for channel, command in self.pending.items():
+            if command is None:
+                continue
+            if command.target == self.confirmed_strength(channel):
+                latency_tracker.finish(command.trace, channel)
+                self.pending[channel] = None
+            elif now - command.sent_at > self.pending_timeout:
+                self.pending[channel] = None
+        return self.confirmed
+
+    def confirmed_strength(self, channel):
+        if self.confirmed is None:
+            return None
+        return self.confirmed.a if channel == Channel.A else self.confirmed.b
+
+    def limit(self, channel):
+        if self.confirmed is None:
+            return None
+        return self.confirmed.a_limit if channel == Channel.A else self.confirmed.b_limit
+
+    def expected_strength(self, channel):
+        """
+        指令全部生效後的預期強度, 有未確認 (且未超時) 的指令時為其目標值
+        """
+        command = self.pending[channel]
+        if command is not None and time.monotonic() - command.sent_at <= self.pending_timeout:
+            return command.target
+        return self.confirmed_strength(channel)
+
+    def _target(self, channel, operation, value):
+        expected = self.expected_strength(channel)
+        if operation == StrengthOperationType.SET_TO:
+            return value
+        if expected is None:
+            return None  # 尚無設備數據, 無法推算相對調整後的強度
+        delta = value if operation == StrengthOperationType.INCREASE else -value
+        return min(max(expected + delta, 0), self.limit(channel))
+
+    async def set_strength(self, channel, operation, value):
+        """
+        與 client.set_strength 參數相同, 預期強度不變時不發送
+        :return: 是否實際發送
+        """
+        target = self._target(channel, operation, value)
+        if target is not None and target == self.expected_strength(channel):
+            self.writes_skipped += 1
+            return False
+        trace = current_trace.get()
+        command = PendingCommand(target, time.monotonic(), trace) if target is not None else None
+        self.pending[channel] = command
+        self.writes_sent += 1
+        await self.client.set_strength(channel, operation, value)
+        if trace is not None:
+            trace.stamp('send')
+        return True
@@ -0,0 +1,89 @@
+"""
+strength_throttle.py
+界面滑動條強度輸入的限速發送
+"""
+import asyncio
+
+from pydglab_ws import Channel, StrengthOperationType
+
+from latency import latency_tracker, current_trace, SOURCE_GUI
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class StrengthThrottle:
+    """
+    前沿 + 後沿限速: 間隔外的輸入立即發送, 間隔內的輸入僅保留最新值, 在間隔結束時發送
+    是否與預期強度相同由 client (StrengthModel) 判斷: 發送在任務中執行, 此處讀取的強度可能尚未包含剛發出的指令
+    """
+
+    def __init__(self, client, max_rate_hz=10, on_send=None):
+        """
+        :param client: 提供 set_strength 的用戶端 (一般為 StrengthModel)
+        :param max_rate_hz: 每個通道每秒最多發送次數
+        :param on_send: 發送前調用, 參數為 Channel (如使其他發送來源的緩存失效)
+        """
+        self.client = client
+        self.on_send = on_send
+        self.interval = 1.0 / min(max(float(max_rate_hz), 1.0), 60.0)
+        self.pending = {Channel.A: None, Channel.B: None}  # 間隔內等待後沿發送的最新值
+        self.pending_trace = {Channel.A: None, Channel.B: None}
+        self.last_send_time = {Channel.A: float('-inf'), Channel.B: float('-inf')}
+        self.trailing_handles = {Channel.A: None, Channel.B: None}
+        self.writes_sent = {Channel.A: 0, Channel.B: 0}
+
+    def submit(self, channel, strength):
+        """
+        滑動條數值變化時調用
+        """
+        loop = asyncio.get_running_loop()
+        trace = latency_tracker.begin_trace(SOURCE_GUI)
+        wait = self.last_send_time[channel] + self.interval - loop.time()
+        if wait <= 0 and self.trailing_handles[channel] is None:
+            self._send(channel, strength, trace)  # 前沿
+            return
+        self.pending[channel] = strength
+        self.pending_trace[channel] = trace
+        if self.trailing_handles[channel] is None:
+            self.trailing_handles[channel] = loop.call_later(max(wait, 0), self._flush_trailing, channel)
+
+    def commit(self, channel, strength):
+        """
+        鬆開滑動條時調用, 取消等待中的後沿發送並立即發送最終值
+        """
+        self._cancel_trailing(channel)
+        self._send(channel, strength, latency_tracker.begin_trace(SOURCE_GUI))
+
+    def _flush_trailing(self, channel):
+        self.trailing_handles[channel] = None
+        strength, self.pending[channel] = self.pending[channel], None
+        trace, self.pending_trace[channel] = self.pending_trace[channel], None
+        if strength is not None:
+            self._send(channel, strength, trace)
+
+    def _cancel_trailing(self, channel):
+        handle = self.trailing_handles[channel]
+        if handle is not None:
+            handle.cancel()
+            self.trailing_handles[channel] = None
+        self.pending[channel] = None
+        self.pending_trace[channel] = None
+
+    def _send(self, channel, strength, trace=None):
+        self.last_send_time[channel] = asyncio.get_running_loop().time()
+        self.writes_sent[channel] += 1
+        if self.on_send:
+            self.on_send(channel)
+        if trace is not None:
+            trace.stamp('handler')
+        token = current_trace.set(trace)  # 新任務複製當前上下文
+        try:
+            asyncio.create_task(self.client.set_strength(channel, StrengthOperationType.SET_TO, strength))
+        finally:
+            current_trace.reset(token)
+
+    def close(self):
+        for channel in (Channel.A, Channel.B):
+            self._cancel_trailing(channel)
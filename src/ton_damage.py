@@ -0,0 +1,173 @@
+"""
+ton_damage.py
+Terrors of Nowhere 傷害系統: 累計傷害, 連續衰減與死亡懲罰, 界面與無界面模式共用
+"""
+import asyncio
+
+from pydglab_ws import Channel, StrengthOperationType
+
+from damage_model import DamageModel, DECAY_LINEAR
+from strength_coalescer import StrengthCoalescer
+from control_scheduler import control_scheduler, PRIORITY_CONTROL
+from logger_config import RateLimitedLogger
+
+import logging
+
+logger = logging.getLogger(__name__)
+damage_log = RateLimitedLogger(logger, interval=5.0)  # 傷害衰減持續進行, 限流輸出
+
+
+class TonDamageSystem:
+    def __init__(self, get_controller, on_display_name=None, decay=DECAY_LINEAR, half_life=10.0, curve='linear',
+                 output_rate=10):
+        """
+        :param get_controller: 返回當前 DGLabController 的函數, 控制器未初始化時返回 None
+        :param on_display_name: 收到玩家名稱時調用
+        :param decay: 傷害衰減方式, 見 damage_model
+        :param half_life: 指數衰減的半衰期 (秒)
+        :param curve: 傷害到強度的映射曲線, 見 damage_model.DAMAGE_CURVES
+        :param output_rate: 按傷害更新 A 通道強度的最高頻率 (Hz), 強度不變時不寫入
+        """
+        self.get_controller = get_controller
+        self.on_display_name = on_display_name
+        self.model = DamageModel(decay=decay, reduction_rate=2, half_life=half_life, curve=curve)
+        self.damage_strength = 60  # 傷害對應強度上限
+        self.death_penalty_strength = 30
+        self.death_penalty_time = 5  # 死亡懲罰持續時間 (秒)
+        self.death_penalty_count = 0
+        self.output_rate = output_rate
+        self.output_job = None
+        self.writer = None  # 按頻率合併並略過未變化強度的 StrengthCoalescer, 以本對象作為用戶端
+        self.tasks = set()  # 死亡懲罰與重設強度的任務, stop 時取消
+
+        # ToN 事件類型 -> 處理函數
+        self.event_handlers = {
+            "DAMAGED": self.handle_damaged_event,
+            "SAVED": self.handle_saved_event,
+            "ALIVE": self.handle_alive_event,
+            "STATS": self.handle_display_name_event,
+            "CONNECTED": self.handle_display_name_event,
+        }
+
+    @property
+    def damage(self):
+        """當前累計傷害, 0-100 的浮點數"""
+        return self.model.value()
+
+    @property
+    def reduction_strength(self):
+        """線性衰減時每秒傷害減免"""
+        return self.model.reduction_rate
+
+    @reduction_strength.setter
+    def reduction_strength(self, value):
+        self.model.reduction_rate = value
+
+    def online_controller(self):
+        """返回 App 在線時的控制器, 否則返回 None"""
+        controller = self.get_controller()
+        if controller is not None and controller.app_status_online:
+            return controller
+        return None
+
+    def start(self):
+        """開始按傷害輸出強度"""
+        if self.output_job is None:
+            self.writer = StrengthCoalescer(self, rate_hz=self.output_rate, name='ton_damage_flush')
+            self.output_job = control_scheduler.every(
+                'ton_damage_output', self.writer.interval, self.update_output, PRIORITY_CONTROL)
+
+    def stop(self):
+        if self.output_job is not None:
+            self.output_job.cancel()
+            self.output_job = None
+            self.writer.close()
+            self.writer = None
+        for task in list(self.tasks):
+            task.cancel()
+
+    def run_task(self, coroutine, name):
+        """持有任務的引用直到完成, 避免被回收, 並記錄任務中的異常"""
+        task = asyncio.create_task(coroutine, name=name)
+        self.tasks.add(task)
+        task.add_done_callback(self._on_task_done)
+        return task
+
+    def _on_task_done(self, task):
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"ToN 任務 {task.get_name()} 發生錯誤: {task.exception()}")
+
+    def update_output(self):
+        """按當前傷害計算 A 通道強度並交給 writer, 開火 (死亡懲罰) 期間不輸出"""
+        damage = self.damage
+        if damage > 0:
+            damage_log.info("Current damage: %.1f%%", damage)
+        controller = self.online_controller()
+        if not controller or not controller.last_strength:
+            return
+        if controller.fire_mode_active:
+            self.writer.invalidate(Channel.A)  # 開火結束後強度可能已被改變, 需要重新寫入
+            return
+        self.writer.submit(Channel.A, self.model.strength(self.damage_strength))
+
+    async def set_strength(self, channel, operation, value):
+        """writer 的用戶端接口, 轉發到當前在線控制器的 StrengthModel"""
+        controller = self.online_controller()
+        if controller and not controller.fire_mode_active:
+            await controller.strength.set_strength(channel, operation, value)
+
+    def handle_event(self, event):
+        """按事件類型查表分派, 未處理的類型直接忽略"""
+        handler = self.event_handlers.get(event.type)
+        if handler:
+            handler(event)
+
+    def handle_damaged_event(self, event):
+        self.accumulate_damage(event.value)
+
+    def handle_saved_event(self, event):
+        self.reset_damage()
+        logger.info("存檔更新，重設強度")
+
+    def handle_alive_event(self, event):
+        if not event.is_alive:
+            self.run_task(self.trigger_death_penalty(), 'ton_death_penalty')
+            logger.info("已死亡，觸發死亡懲罰")
+
+    def handle_display_name_event(self, event):
+        if event.display_name and self.on_display_name:
+            self.on_display_name(event.display_name)
+
+    def accumulate_damage(self, value):
+        """Accumulate damage based on incoming value."""
+        new_value = self.model.add(value)  # Cap damage at 100%
+        logger.info(f"Accumulated damage by {value}%. Current damage: {new_value:.1f}%")
+
+    def reset_damage(self):
+        """Reset the damage accumulation."""
+        logger.info("Resetting damage accumulation.")
+        self.model.reset()
+        if self.writer:
+            self.writer.invalidate(Channel.A)
+        controller = self.online_controller()
+        if controller:
+            controller.fire_mode.cancel(Channel.A)  # 結束可能仍在進行的死亡懲罰
+            self.run_task(controller.strength.set_strength(Channel.A, StrengthOperationType.SET_TO, 0), 'ton_reset_strength')
+
+    async def trigger_death_penalty(self):
+        """Trigger death penalty by setting damage to 100% and applying penalty."""
+        penalty_strength = self.death_penalty_strength
+        penalty_time = self.death_penalty_time
+        logger.warning(f"Death penalty triggered: Strength={penalty_strength}, Time={penalty_time}s")
+        self.model.set(100)  # 將傷害設置為 100%
+        controller = self.online_controller()
+        if controller:
+            # 開火值基於傷害強度上限, 結束後恢復到傷害強度上限, 之後由傷害衰減逐步降低
+            base = self.damage_strength
+            logger.warning(f"Death penalty triggered: a {base} fire {penalty_strength}")
+            self.death_penalty_count += 1
+            source = f"death_penalty_{self.death_penalty_count}"  # 每次懲罰獨立持有, 重疊觸發時以最後結束的為準
+            await controller.strength_fire_mode(True, Channel.A, penalty_strength, source=source, base=base)
+            await asyncio.sleep(penalty_time)  # 等待指定的懲罰持續時間
+            await controller.strength_fire_mode(False, Channel.A, penalty_strength, source=source)
@@ -3,57 +3,149 @@ import asyncio
 import websockets
 import json
 import logging
-from PySide6.QtCore import Signal, QObject
+
+from logger_config import RateLimitedLogger
+from latency import latency_tracker, current_trace, SOURCE_TON
 
 logger = logging.getLogger(__name__)
+message_log = RateLimitedLogger(logger)  # ToNSaveManager 每 100ms 更新一次, 限流輸出
+
+
+class TonEvent:
+    """ToNSaveManager 事件, 未識別的類型也以此類表示"""
+    __slots__ = ('type', 'data')
+
+    def __init__(self, data):
+        self.type = data.get("Type")
+        self.data = data
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.data})"
+
+
+class DamagedEvent(TonEvent):
+    """受到傷害, value 為傷害值"""
+    __slots__ = ('value',)
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.value = data.get("Value", 0)
+
+
+class AliveEvent(TonEvent):
+    """存活狀態變化, is_alive 為 False 時表示死亡"""
+    __slots__ = ('is_alive',)
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.is_alive = bool(data.get("Value", 0))
+
+
+class SavedEvent(TonEvent):
+    """存檔更新"""
+    __slots__ = ()
+
 
-class WebSocketClient(QObject):
-    status_update_signal = Signal(str)
-    message_received = Signal(str)
-    error_signal = Signal(str)
+class StatsEvent(TonEvent):
+    """統計資訊更新, 目前僅使用 DisplayName"""
+    __slots__ = ('display_name',)
 
-    def __init__(self, url):
-        super().__init__()
+    def __init__(self, data):
+        super().__init__(data)
+        self.display_name = data.get("DisplayName")
+
+
+class ConnectedEvent(TonEvent):
+    """連接到 ToNSaveManager 後的初始資訊"""
+    __slots__ = ('display_name',)
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.display_name = data.get("DisplayName")
+
+
+TON_EVENT_TYPES = {
+    "DAMAGED": DamagedEvent,
+    "ALIVE": AliveEvent,
+    "SAVED": SavedEvent,
+    "STATS": StatsEvent,
+    "CONNECTED": ConnectedEvent,
+}
+
+
+def parse_ton_event(data):
+    """將已解析的 JSON 對象轉換為對應類型的事件"""
+    return TON_EVENT_TYPES.get(data.get("Type"), TonEvent)(data)
+
+
+class WebSocketClient:
+    """
+    ToNSaveManager WebSocket API 用戶端, 不依賴 Qt, 通過回調通知事件與連接狀態
+    """
+
+    def __init__(self, url, on_event=None, on_status=None, on_error=None):
+        """
+        :param on_event: 收到事件時調用, 參數為 TonEvent
+        :param on_status: 連接狀態變化時調用, 參數為 "connected" / "disconnected" / "error"
+        :param on_error: 連接出錯時調用, 參數為錯誤描述
+        """
         self.url = url
+        self.on_event = on_event
+        self.on_status = on_status
+        self.on_error = on_error
         self.websocket = None
+        self.last_display_name = None  # STATS 中相關欄位未變化時不發出事件
 
     async def start_connection(self):
         """Starts the WebSocket connection and listens for messages."""
         try:
             async with websockets.connect(self.url) as ws:
                 self.websocket = ws
+                self._notify(self.on_status, "connected")
                 async for message in ws:
                     # Process received message
                     await self.process_message(message)
         except Exception as e:
-            self.error_signal.emit(f"WebSocket connection error: {e}")
+            self._notify(self.on_error, f"WebSocket connection error: {e}")
 
     async def process_message(self, message):
-        """Process the received WebSocket message and parse JSON."""
-        logger.info(message)
+        """解析一次 JSON 並轉換為事件對象, 按類型發出"""
+        trace = latency_tracker.begin_trace(SOURCE_TON)
         try:
-            # 直接解析收到的消息，不添加 'Received: ' 前綴
-            json_data = json.loads(message)
-
-            self.message_received.emit(f"{json.dumps(json_data, indent=4)}")
-            self.status_update_signal.emit("connected")
-
-            # # Process based on message type
-            # if json_data.get("type") == "STATS":
-            #     stats_data = json_data.get("data", {})
-            #     formatted_stats = "\n".join([f"{key}: {value}" for key, value in stats_data.items()])
-            #     self.status_update_signal.emit(f"STATS Update:\n{formatted_stats}")
-            # else:
-            #     # Emit the full JSON formatted message for other types
-            #     self.status_update_signal.emit(f"{json.dumps(json_data, indent=4)}")
+            data = json.loads(message)
         except json.JSONDecodeError:
-            # 如果消息不是 JSON 格式，顯示原始消息
             logger.warning("ws message is not json format")
-            self.message_received.emit(message)
-            self.status_update_signal.emit("error")
+            self._notify(self.on_status, "error")
+            return
+        if not isinstance(data, dict):
+            logger.warning(f"ws message is not a json object: {message}")
+            return
+
+        event = parse_ton_event(data)
+        if trace is not None:
+            trace.stamp('dispatch')
+        message_log.debug("Received ToN event: %s", event)
+        if isinstance(event, StatsEvent):
+            if event.display_name is None or event.display_name == self.last_display_name:
+                return
+            self.last_display_name = event.display_name
+        elif isinstance(event, ConnectedEvent):
+            self.last_display_name = event.display_name
+        if trace is not None:
+            trace.stamp('handler')
+        token = current_trace.set(trace)  # 事件處理中創建的任務會攜帶此記錄
+        try:
+            self._notify(self.on_event, event)
+        finally:
+            current_trace.reset(token)
+
+    @staticmethod
+    def _notify(callback, value):
+        if callback:
+            callback(value)
 
     async def close(self):
         """Close the WebSocket connection."""
         if self.websocket:
             await self.websocket.close()
-            self.status_update_signal.emit("disconnected")
+            self._notify(self.on_status, "disconnected")
@@ -0,0 +1,45 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+
+class FakeClock:
+    """手動推進的時鐘, 代替 time.monotonic 傳給帶 clock 參數的模塊"""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def fake_clock():
+    return FakeClock()
+
+
+class FakeClient:
+    """記錄 set_strength 調用的用戶端, 代替 DGLabLocalClient"""
+
+    def __init__(self):
+        self.sent = []
+
+    async def set_strength(self, channel, operation, value):
+        self.sent.append((channel, operation, value))
+
+
+@pytest.fixture
+def fake_client():
+    return FakeClient()
+
+
+@pytest.fixture
+def strength_data():
+    """返回構造 App 強度回報 (StrengthData) 的函數"""
+    def make(a, b=0, a_limit=100, b_limit=100):
+        return SimpleNamespace(a=a, b=b, a_limit=a_limit, b_limit=b_limit)
+    return make
@@ -0,0 +1,124 @@
+import time
+from types import SimpleNamespace
+
+from pydglab_ws import Channel
+
+from channel_aggregator import ChannelAggregator, REDUCER_MAX, REDUCER_SUM, REDUCER_PRIORITY
+from osc_service import OSCService
+
+
+class FakeCoalescer:
+    def __init__(self):
+        self.aggregator = None
+        self.submitted = []
+
+    def submit(self, channel, strength, trace=None):
+        self.submitted.append((channel, strength))
+
+
+def make_aggregator(reducer=REDUCER_MAX, timeout=0.0, limit=100, clock=time.monotonic):
+    coalescer = FakeCoalescer()
+    aggregator = ChannelAggregator(coalescer, get_limit=lambda channel: limit, is_active=lambda channel: True,
+                                   reducer=reducer, timeout=timeout, clock=clock)
+    return aggregator, coalescer
+
+
+def test_max_reducer_evaluates_once_per_tick():
+    aggregator, coalescer = make_aggregator()
+    for strength in (10, 20, 30):
+        aggregator.submit(Channel.A, '/a', strength, 0.5)
+    aggregator.submit(Channel.A, '/b', 25, 0.5)
+    aggregator.evaluate()
+    aggregator.evaluate()  # 無變化時不重複提交
+    assert coalescer.submitted == [(Channel.A, 30)]
+
+
+def test_sum_reducer_weights_and_clamps_to_limit():
+    aggregator, coalescer = make_aggregator(REDUCER_SUM, limit=50)
+    aggregator.submit(Channel.B, '/a', 20, 0.5, weight=0.5)
+    aggregator.submit(Channel.B, '/b', 15, 0.5)
+    aggregator.evaluate()
+    aggregator.submit(Channel.B, '/c', 40, 0.5)
+    aggregator.evaluate()
+    assert coalescer.submitted == [(Channel.B, 25), (Channel.B, 50)]
+
+
+def test_priority_reducer_prefers_active_sources(fake_clock):
+    aggregator, coalescer = make_aggregator(REDUCER_PRIORITY, clock=fake_clock)
+    aggregator.submit(Channel.A, '/high', 80, 0.0, priority=5)  # 未活動
+    fake_clock.now = 1.0
+    aggregator.submit(Channel.A, '/low', 30, 0.4, priority=1)
+    aggregator.evaluate()
+    assert coalescer.submitted == [(Channel.A, 30)]
+
+
+def test_timeout_expires_stale_sources(fake_clock):
+    aggregator, coalescer = make_aggregator(timeout=1.0, clock=fake_clock)
+    aggregator.submit(Channel.A, '/a', 60, 0.8)
+    aggregator.evaluate()
+    fake_clock.now = 2.0
+    aggregator.evaluate()
+    assert coalescer.submitted == [(Channel.A, 60), (Channel.A, 0)]
+    assert aggregator.get_stats()['A'] == (0, 1, 2, 1)
+
+
+def test_remove_source_marks_channel_dirty():
+    aggregator, coalescer = make_aggregator()
+    aggregator.submit(Channel.A, '/stale', 100, 1.0)
+    aggregator.submit(Channel.A, '/live', 30, 0.3)
+    aggregator.evaluate()
+    aggregator.remove_source('/stale')
+    aggregator.evaluate()
+    assert coalescer.submitted == [(Channel.A, 100), (Channel.A, 30)]
+
+
+def osc_address(address, a=True, b=False):
+    return {'address': address, 'channels': {'A': a, 'B': b}}
+
+
+def test_remapping_drops_removed_and_unchecked_sources():
+    aggregator, coalescer = make_aggregator()
+    controller = SimpleNamespace(pad_routes={}, float_aggregator=aggregator)
+    service = OSCService({})
+    service.update_mappings(controller, [osc_address('/stale', b=True), osc_address('/live')])
+    aggregator.submit(Channel.A, '/stale', 100, 1.0)
+    aggregator.submit(Channel.B, '/stale', 100, 1.0)
+    aggregator.submit(Channel.A, '/live', 30, 0.3)
+    aggregator.evaluate()
+
+    service.update_mappings(controller, [osc_address('/stale', a=False, b=True), osc_address('/live')])
+    aggregator.evaluate()
+    assert coalescer.submitted[-1] == (Channel.A, 30)
+    assert '/stale' in aggregator.sources[Channel.B]  # 仍勾選的通道保留
+
+    service.update_mappings(controller, [osc_address('/live')])
+    aggregator.evaluate()
+    assert coalescer.submitted[-1] == (Channel.B, 0)
+
+
+def test_remapping_wildcard_drops_concrete_sources():
+    aggregator, coalescer = make_aggregator()
+    controller = SimpleNamespace(pad_routes={}, float_aggregator=aggregator)
+    service = OSCService({})
+    service.update_mappings(controller, [osc_address('/avatar/parameters/DG-LAB/*', b=True),
+                                         osc_address('/avatar/parameters/DG-LAB/Kept')])
+    aggregator.submit(Channel.A, '/avatar/parameters/DG-LAB/Foo', 92, 0.9)
+    aggregator.submit(Channel.A, '/avatar/parameters/DG-LAB/Kept', 40, 0.5)
+    aggregator.submit(Channel.B, '/avatar/parameters/DG-LAB/Foo', 92, 0.9)
+    aggregator.evaluate()
+
+    service.update_mappings(controller, [osc_address('/avatar/parameters/DG-LAB/*', a=False, b=True),
+                                         osc_address('/avatar/parameters/DG-LAB/Kept')])
+    aggregator.evaluate()
+    assert coalescer.submitted[-1] == (Channel.A, 40)  # Kept 仍由精確映射輸出到 A
+    assert list(aggregator.sources[Channel.B]) == ['/avatar/parameters/DG-LAB/Foo']
+
+    discarded = []
+    service.osc_mailboxes = SimpleNamespace(
+        mailboxes=dict.fromkeys(['/avatar/parameters/DG-LAB/Foo', '/avatar/parameters/Other']),
+        discard=discarded.append)
+    service.update_mappings(controller, [osc_address('/avatar/parameters/DG-LAB/Kept')])
+    aggregator.evaluate()
+    assert discarded == ['/avatar/parameters/DG-LAB/Foo']
+    assert coalescer.submitted[-1] == (Channel.B, 0)
+    assert list(aggregator.sources[Channel.A]) == ['/avatar/parameters/DG-LAB/Kept']
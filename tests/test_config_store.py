@@ -0,0 +1,73 @@
+import asyncio
+import os
+
+import pytest
+import yaml
+
+import config_store as config_store_module
+from config_store import ConfigStore, write_yaml_atomic, CONFIG_VERSION
+
+
+def read(path):
+    with open(path, encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+def test_saves_are_debounced_into_one_write(tmp_path):
+    path = str(tmp_path / 'config.yml')
+    store = ConfigStore(path, debounce=0.05)
+
+    async def scenario():
+        for port in range(5678, 5688):
+            store.set('settings', {'port': port})
+            await asyncio.sleep(0.01)
+        assert not os.path.exists(path)  # 仍在修改中, 尚未寫入
+        await asyncio.sleep(0.2)
+
+    asyncio.run(scenario())
+    assert store.writes == 1
+    assert not store.dirty
+    assert read(path) == {'version': CONFIG_VERSION, 'settings': {'port': 5687}}
+
+
+def test_failed_background_write_is_retried_by_flush(tmp_path, monkeypatch):
+    path = str(tmp_path / 'config.yml')
+    store = ConfigStore(path, debounce=0.01)
+
+    def fail(path, data):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(config_store_module, 'write_yaml_atomic', fail)
+
+    async def scenario():
+        store.set('settings', {'port': 1234})
+        await asyncio.sleep(0.1)
+
+    asyncio.run(scenario())
+    assert store.dirty
+    assert store.writes == 0
+
+    monkeypatch.undo()
+    store.flush()
+    assert not store.dirty
+    assert read(path)['settings'] == {'port': 1234}
+
+
+def test_atomic_write_keeps_original_on_failure(tmp_path):
+    path = str(tmp_path / 'config.yml')
+    write_yaml_atomic(path, {'version': 1, 'settings': {'port': 1}})
+    with pytest.raises(yaml.YAMLError):
+        write_yaml_atomic(path, {'settings': object()})  # 無法序列化
+    assert read(path) == {'version': 1, 'settings': {'port': 1}}
+    assert os.listdir(tmp_path) == ['config.yml']  # 不留下臨時文件
+
+
+def test_migrates_legacy_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with open('settings.yml', 'w', encoding='utf-8') as f:
+        yaml.safe_dump({'port': 4321}, f)
+    store = ConfigStore('config.yml')
+    assert store.get('settings') == {'port': 4321}
+    assert store.get('osc_addresses') is None
+    store.set('osc_addresses', [])  # 事件循環外直接寫入
+    assert read('config.yml') == {'version': CONFIG_VERSION, 'settings': {'port': 4321}, 'osc_addresses': []}
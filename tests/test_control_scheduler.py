@@ -0,0 +1,144 @@
+import asyncio
+import time
+
+from control_scheduler import ControlScheduler, PRIORITY_CONTROL, PRIORITY_DISPLAY
+
+
+def run(scheduler, coroutine):
+    async def scenario():
+        try:
+            return await coroutine
+        finally:
+            scheduler.close()
+
+    return asyncio.run(scenario())
+
+
+def test_call_later_runs_once_at_deadline_in_priority_order():
+    scheduler = ControlScheduler()
+    calls = []
+
+    async def scenario():
+        start = time.monotonic()
+        scheduler.call_later('display', 0.05, lambda: calls.append(('display', time.monotonic() - start)),
+                             PRIORITY_DISPLAY)
+        scheduler.call_later('control', 0.05, lambda: calls.append(('control', time.monotonic() - start)),
+                             PRIORITY_CONTROL)
+        await asyncio.sleep(0.15)
+
+    run(scheduler, scenario())
+    assert [name for name, _ in calls] == ['control', 'display']
+    assert all(elapsed >= 0.05 for _, elapsed in calls)
+    assert scheduler.jobs == []  # 只執行一次的任務完成後移除
+
+
+def test_periodic_job_keeps_fixed_rate():
+    scheduler = ControlScheduler()
+    times = []
+
+    async def scenario():
+        job = scheduler.every('tick', 0.02, lambda: times.append(time.monotonic()))
+        await asyncio.sleep(0.31)
+        return job
+
+    job = run(scheduler, scenario())
+    assert 12 <= job.runs <= 16
+    # 按截止時間排程, 每次的延遲不累積
+    drift = (times[-1] - times[0]) - 0.02 * (len(times) - 1)
+    assert abs(drift) < 0.02
+
+
+def test_overrun_skips_missed_deadlines_instead_of_catching_up():
+    scheduler = ControlScheduler()
+
+    async def scenario():
+        job = scheduler.every('slow', 0.01, lambda: time.sleep(0.035))
+        await asyncio.sleep(0.2)
+        return job
+
+    job = run(scheduler, scenario())
+    assert job.overruns == job.runs or job.overruns == job.runs - 1
+    assert job.skipped >= 2 * job.overruns
+    assert job.runs <= 6  # 每次執行 35ms, 沒有補跑積壓的週期
+
+
+def test_cancelled_jobs_do_not_run():
+    scheduler = ControlScheduler()
+    calls = []
+
+    async def scenario():
+        once = scheduler.call_later('once', 0.02, lambda: calls.append('once'))
+        once.cancel()
+        periodic = scheduler.every('periodic', 0.01, lambda: calls.append('periodic') or periodic.cancel())
+        await asyncio.sleep(0.08)
+        return scheduler.get_stats()
+
+    stats = run(scheduler, scenario())
+    assert calls == ['periodic']  # 回調中取消後不再排程
+    assert stats == []
+
+
+def test_error_backoff_delays_next_run():
+    scheduler = ControlScheduler()
+
+    def fail():
+        raise RuntimeError("boom")
+
+    async def scenario():
+        job = scheduler.every('failing', 0.01, fail, error_backoff=0.1)
+        await asyncio.sleep(0.15)
+        return job
+
+    job = run(scheduler, scenario())
+    assert job.errors == job.runs == 2
+
+
+def test_restarts_runner_on_a_new_event_loop():
+    scheduler = ControlScheduler()
+    calls = []
+
+    async def schedule():
+        scheduler.call_later('first', 0.0, lambda: calls.append(1))
+        await asyncio.sleep(0.02)
+
+    asyncio.run(schedule())  # 事件循環結束時 runner 被取消
+    run(scheduler, schedule())
+    assert calls == [1, 1]
+
+
+def test_blocked_coroutine_job_does_not_stall_other_jobs():
+    scheduler = ControlScheduler()
+    started = []
+
+    async def never_returns():  # 例如 App 斷線後 ensure_bind 一直等待
+        started.append(time.monotonic())
+        await asyncio.Event().wait()
+
+    async def scenario():
+        blocked = scheduler.every('pulse_refill', 0.05, never_returns)
+        display = scheduler.every('display', 0.02, lambda: None, PRIORITY_DISPLAY)
+        await asyncio.sleep(0.5)
+        blocked.cancel()
+        await asyncio.sleep(0)
+        return blocked, display
+
+    blocked, display = run(scheduler, scenario())
+    assert len(started) == 1  # 上一次執行未完成時不疊加
+    assert blocked.overruns >= 8 and blocked.task is None
+    assert display.runs >= 20
+
+
+def test_coroutine_errors_are_counted_and_backed_off():
+    scheduler = ControlScheduler()
+
+    async def fail():
+        await asyncio.sleep(0)
+        raise RuntimeError("boom")
+
+    async def scenario():
+        job = scheduler.every('failing', 0.01, fail, error_backoff=0.1)
+        await asyncio.sleep(0.15)
+        return job
+
+    job = run(scheduler, scenario())
+    assert job.errors == job.runs == 2
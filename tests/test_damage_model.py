@@ -0,0 +1,49 @@
+import pytest
+
+from damage_model import DamageModel, DECAY_LINEAR, DECAY_EXPONENTIAL
+
+
+def test_linear_decay_is_continuous_and_clamped(fake_clock):
+    model = DamageModel(DECAY_LINEAR, reduction_rate=2.0, clock=fake_clock)
+    model.add(30)
+    fake_clock.now = 2.5
+    assert model.value() == pytest.approx(25.0)
+    fake_clock.now = 100.0
+    assert model.value() == 0.0
+    model.add(150)
+    assert model.value() == 100.0
+
+
+def test_exponential_decay_uses_half_life(fake_clock):
+    model = DamageModel(DECAY_EXPONENTIAL, half_life=10.0, clock=fake_clock)
+    model.set(80)
+    fake_clock.now = 10.0
+    assert model.value() == pytest.approx(40.0)
+    fake_clock.now = 30.0
+    assert model.value() == pytest.approx(10.0)
+
+
+def test_parameter_change_applies_only_to_future_decay(fake_clock):
+    model = DamageModel(DECAY_LINEAR, reduction_rate=1.0, clock=fake_clock)
+    model.set(50)
+    fake_clock.now = 10.0
+    model.reduction_rate = 5.0  # 前 10 秒仍按每秒 1 衰減
+    fake_clock.now = 12.0
+    assert model.value() == pytest.approx(30.0)
+
+
+def test_strength_curves(fake_clock):
+    model = DamageModel(curve='quadratic', clock=fake_clock)
+    model.set(50)
+    assert model.strength(200) == 50
+    model.curve = 'sqrt'
+    assert model.strength(100) == 70
+    with pytest.raises(ValueError):
+        model.curve = 'unknown'
+    with pytest.raises(ValueError):
+        model.decay = 'unknown'
+
+
+def test_invalid_decay_is_rejected_at_construction():
+    with pytest.raises(ValueError):
+        DamageModel(decay='logarithmic')
@@ -0,0 +1,49 @@
+import asyncio
+
+from osc_mailbox import OSCMailboxRouter
+
+
+def test_idle_mailboxes_are_evicted_and_recreated():
+    handled = []
+
+    async def handle(address, value):
+        handled.append((address, value))
+
+    async def scenario():
+        router = OSCMailboxRouter(idle_timeout=0.05)
+        for index in range(50):  # 通配符映射收到的大量不同地址
+            router.post(f'/avatar/parameters/DG-LAB/{index}', 'float', handle, f'/avatar/parameters/DG-LAB/{index}', 0.5)
+        tasks = [mailbox.worker_task for mailbox in router.mailboxes.values()]
+        await asyncio.sleep(0.2)
+        evicted = router.evicted, len(router.mailboxes), all(task.done() for task in tasks)
+        router.post('/avatar/parameters/DG-LAB/0', 'float', handle, '/avatar/parameters/DG-LAB/0', 1.0)
+        await asyncio.sleep(0)
+        router.close()
+        return evicted
+
+    assert asyncio.run(scenario()) == (50, 0, True)
+    assert len(handled) == 51
+    assert handled[-1] == ('/avatar/parameters/DG-LAB/0', 1.0)
+
+
+def test_active_and_busy_mailboxes_are_kept():
+    async def scenario():
+        router = OSCMailboxRouter(idle_timeout=0.05)
+        gate = asyncio.Event()
+
+        async def slow(value):
+            await gate.wait()
+
+        async def fast(value):
+            pass
+
+        router.post('/busy', 'float', slow, 1.0)
+        for _ in range(12):
+            router.post('/active', 'float', fast, 1.0)
+            await asyncio.sleep(0.02)
+        keys = set(router.mailboxes)
+        gate.set()
+        router.close()
+        return keys
+
+    assert asyncio.run(scenario()) == {'/busy', '/active'}
@@ -0,0 +1,73 @@
+import math
+import random
+
+import pytest
+
+from response_curve import ResponseCurve, curve_key
+
+
+def test_invalid_config_raises_value_error():
+    with pytest.raises(ValueError):
+        ResponseCurve({'unknown': 1})
+    with pytest.raises(ValueError):
+        ResponseCurve({'min': 0.8, 'max': 0.5})
+    with pytest.raises(ValueError):
+        ResponseCurve({'curve': 'exponential', 'exponent': 800})  # 只在計算時溢出
+
+
+def test_from_config_falls_back_to_default_on_overflow():
+    curve = ResponseCurve.from_config({'curve': 'exponential', 'exponent': 800})
+    assert curve.config == ResponseCurve().config
+    assert curve.strength(1.0, 100) == 100
+
+
+@pytest.mark.parametrize('config', [
+    {},
+    {'curve': 'gamma', 'gamma': 2.2},
+    {'curve': 'exponential', 'exponent': 3.0},
+    {'curve': 'exponential', 'exponent': -3.0, 'deadzone': 0.1, 'min': 0.0, 'max': 0.5},
+])
+def test_edge_values(config):
+    curve = ResponseCurve(config)
+    limit = 200
+    low = curve.min_fraction * limit
+    high = curve.max_fraction * limit
+    assert curve.strength(0.0, limit) == (0 if curve.deadzone else round(low))
+    assert curve.strength(1.0, limit) == round(high)
+    assert curve.strength(-0.5, limit) == curve.strength(0.0, limit)  # 超出範圍的輸入按 0-1 截斷
+    assert curve.strength(1.5, limit) == curve.strength(1.0, limit)
+    assert curve.strength(0.5, 0) == 0
+
+
+def test_default_curve_matches_original_mapping():
+    curve = ResponseCurve()
+    rng = random.Random(0)
+    for _ in range(20000):
+        value, limit = rng.random(), rng.randint(0, 200)
+        assert curve.strength(value, limit) == math.ceil(limit * 0.2 + value * (limit - limit * 0.2))
+
+
+def test_table_matches_direct_evaluation_at_table_points():
+    curve = ResponseCurve({'curve': 'gamma', 'gamma': 2.2})
+    for i in range(curve.resolution + 1):
+        value = i / curve.resolution
+        assert curve.strength(value, 150) == curve.evaluate(value, 150)
+
+
+def test_deadzone_outputs_zero_below_threshold():
+    curve = ResponseCurve({'deadzone': 0.2, 'min': 0.0})
+    assert curve.strength(0.15, 100) == 0
+    assert curve.strength(0.6, 100) == 50
+
+
+def test_hysteresis_holds_small_changes_per_channel():
+    curve = ResponseCurve({'hysteresis': 0.1, 'min': 0.0})
+    assert curve.strength(0.5, 100, 'A') == 50
+    assert curve.strength(0.5625, 100, 'A') == 50
+    assert curve.strength(0.5625, 100, 'B') == 57
+    assert curve.strength(0.75, 100, 'A') == 75
+
+
+def test_curve_key_ignores_order():
+    assert curve_key({'gamma': 2, 'curve': 'gamma'}) == curve_key({'curve': 'gamma', 'gamma': 2})
+    assert curve_key(None) is None
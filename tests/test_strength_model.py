@@ -0,0 +1,70 @@
+import asyncio
+
+from pydglab_ws import Channel, StrengthOperationType
+
+import strength_model
+from strength_model import StrengthModel
+
+
+def test_ack_confirms_pending_command(fake_client, strength_data):
+    model = StrengthModel(fake_client)
+    model.on_ack(strength_data(10, 0))
+    assert asyncio.run(model.set_strength(Channel.A, StrengthOperationType.SET_TO, 30))
+    assert model.expected_strength(Channel.A) == 30
+    assert model.confirmed_strength(Channel.A) == 10
+
+    snapshot = model.on_ack(strength_data(30, 0))
+    assert snapshot.version == 2
+    assert model.pending[Channel.A] is None
+    assert model.expected_strength(Channel.A) == 30
+
+
+def test_unchanged_expected_strength_is_not_sent(fake_client, strength_data):
+    model = StrengthModel(fake_client)
+    model.on_ack(strength_data(10, 0))
+
+    async def scenario():
+        await model.set_strength(Channel.A, StrengthOperationType.SET_TO, 30)
+        await model.set_strength(Channel.A, StrengthOperationType.SET_TO, 30)  # 等待確認中, 預期強度相同
+        await model.set_strength(Channel.B, StrengthOperationType.DECREASE, 5)  # 已為 0
+
+    asyncio.run(scenario())
+    assert fake_client.sent == [(Channel.A, StrengthOperationType.SET_TO, 30)]
+    assert (model.writes_sent, model.writes_skipped) == (1, 2)
+
+
+def test_relative_operations_use_expected_strength_and_limit(fake_client, strength_data):
+    model = StrengthModel(fake_client)
+    model.on_ack(strength_data(90, 0, a_limit=95))
+
+    async def scenario():
+        await model.set_strength(Channel.A, StrengthOperationType.INCREASE, 3)
+        await model.set_strength(Channel.A, StrengthOperationType.INCREASE, 10)  # 超過上限按上限計算
+
+    asyncio.run(scenario())
+    assert model.expected_strength(Channel.A) == 95
+    assert len(fake_client.sent) == 2
+
+
+def test_pending_command_times_out(monkeypatch, fake_client, fake_clock, strength_data):
+    fake_clock.now = 100.0
+    monkeypatch.setattr(strength_model.time, 'monotonic', fake_clock)
+    model = StrengthModel(fake_client, pending_timeout=1.0)
+    model.on_ack(strength_data(10, 0))
+    asyncio.run(model.set_strength(Channel.A, StrengthOperationType.SET_TO, 50))
+
+    fake_clock.now += 0.5
+    model.on_ack(strength_data(10, 0))  # App 尚未處理
+    assert model.expected_strength(Channel.A) == 50
+
+    fake_clock.now += 1.0
+    assert model.expected_strength(Channel.A) == 10  # 超時後以設備回報為準
+    model.on_ack(strength_data(10, 0))
+    assert model.pending[Channel.A] is None
+
+
+def test_relative_operation_before_first_ack_is_sent(fake_client):
+    model = StrengthModel(fake_client)
+    assert asyncio.run(model.set_strength(Channel.B, StrengthOperationType.INCREASE, 1))
+    assert model.pending[Channel.B] is None
+    assert model.expected_strength(Channel.B) is None
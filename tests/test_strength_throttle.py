@@ -0,0 +1,47 @@
+import asyncio
+
+from pydglab_ws import Channel, StrengthOperationType
+
+from strength_model import StrengthModel
+from strength_throttle import StrengthThrottle
+
+
+def test_drag_back_then_release_undoes_unconfirmed_write(fake_client, strength_data):
+    async def scenario():
+        model = StrengthModel(fake_client)
+        model.on_ack(strength_data(10))
+        throttle = StrengthThrottle(model, max_rate_hz=10)
+        throttle.submit(Channel.A, 30)  # 前沿立即發送, 尚未確認
+        throttle.submit(Channel.A, 10)  # 間隔內, 等待後沿
+        throttle.commit(Channel.A, 10)  # 鬆開滑動條
+        await asyncio.sleep(0)
+        throttle.close()
+        return [value for _, _, value in fake_client.sent]
+
+    assert asyncio.run(scenario()) == [30, 10]
+
+
+def test_release_at_expected_strength_is_skipped(fake_client, strength_data):
+    async def scenario():
+        model = StrengthModel(fake_client)
+        model.on_ack(strength_data(10))
+        throttle = StrengthThrottle(model, max_rate_hz=10)
+        throttle.commit(Channel.A, 10)
+        await asyncio.sleep(0)
+        return fake_client.sent, model.writes_skipped
+
+    assert asyncio.run(scenario()) == ([], 1)
+
+
+def test_trailing_edge_sends_latest_value(fake_client, strength_data):
+    async def scenario():
+        model = StrengthModel(fake_client)
+        model.on_ack(strength_data(0))
+        throttle = StrengthThrottle(model, max_rate_hz=20)
+        for value in (5, 6, 7, 8):
+            throttle.submit(Channel.B, value)
+        await asyncio.sleep(0.1)
+        return fake_client.sent
+
+    assert asyncio.run(scenario()) == [(Channel.B, StrengthOperationType.SET_TO, 5),
+                                       (Channel.B, StrengthOperationType.SET_TO, 8)]
@@ -0,0 +1,51 @@
+import asyncio
+from types import SimpleNamespace
+
+from ton_damage import TonDamageSystem
+
+
+class FakeController:
+    app_status_online = True
+    last_strength = None
+    fire_mode_active = False
+
+    def __init__(self):
+        self.fire_calls = []
+
+    async def strength_fire_mode(self, value, channel, strength, source=None, base=None):
+        self.fire_calls.append(value)
+
+
+def test_stop_cancels_running_death_penalty():
+    controller = FakeController()
+
+    async def scenario():
+        system = TonDamageSystem(lambda: controller)
+        system.death_penalty_time = 10
+        system.handle_event(SimpleNamespace(type='ALIVE', is_alive=False))
+        await asyncio.sleep(0.01)
+        assert len(system.tasks) == 1  # 持有任務引用
+        task = next(iter(system.tasks))
+        system.stop()
+        await asyncio.sleep(0)
+        return task, system.tasks
+
+    task, tasks = asyncio.run(scenario())
+    assert task.cancelled()
+    assert tasks == set()
+    assert controller.fire_calls == [True]
+
+
+def test_task_errors_are_logged(caplog):
+    async def fail():
+        raise RuntimeError("boom")
+
+    async def scenario():
+        system = TonDamageSystem(lambda: None)
+        system.run_task(fail(), 'failing')
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        return system.tasks
+
+    assert asyncio.run(scenario()) == set()
+    assert "failing" in caplog.text and "boom" in caplog.text
@@ -0,0 +1,364 @@
+"""
+dglab_app_simulator.py
+DG-LAB App 端 WebSocket 協議模擬器: 通過二維碼 URL 綁定, 執行強度操作並回報 StrengthData, 按 100ms/幀 消耗波形隊列
+可注入延遲與斷線, 在沒有手機和設備的環境中測試重連, 波形連續性與吞吐量
+
+    python tools/dglab_app_simulator.py --url "<二維碼內容>"
+    python tools/dglab_app_simulator.py --self-test 30 --latency 0.05 --disconnect-interval 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+from collections import deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import websockets
+from pydglab_ws import Channel, MessageDataHead, MessageType, RetCode, StrengthOperationType
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+PULSE_FRAME_DURATION = 0.1  # 每幀波形數據代表 100ms
+APP_PULSE_QUEUE_MAX_LENGTH = 500  # App 端波形隊列最大長度, 超出部分會被丟棄
+
+
+def parse_qrcode_url(url):
+    """
+    解析 client.get_qrcode 生成的二維碼內容, 也接受 ws://host:port/<clientId>
+    :return: (WebSocket 地址, 終端 clientId)
+    """
+    ws_url = url.rsplit('#', 1)[-1]
+    base, _, client_id = ws_url.rstrip('/').rpartition('/')
+    if not base.startswith(('ws://', 'wss://')) or not client_id:
+        raise ValueError(f"無法解析二維碼 URL: {url}")
+    return ws_url, client_id
+
+
+class SimulatedChannel:
+    """
+    單個通道的強度與波形隊列
+    """
+
+    def __init__(self, channel, limit, queue_max):
+        self.channel = channel
+        self.strength = 0
+        self.limit = limit
+        self.pulse_queue = deque()
+        self.queue_max = queue_max
+        self.playing = False  # 收到波形後為 True, 清空隊列後為 False; 播放中隊列為空記為斷檔
+        self.frames_received = 0
+        self.frames_played = 0
+        self.frames_dropped = 0  # 隊列已滿時丟棄的幀
+        self.underruns = 0
+        self.clears = 0
+
+    def apply_strength(self, operation, value):
+        if operation == StrengthOperationType.SET_TO:
+            target = value
+        elif operation == StrengthOperationType.INCREASE:
+            target = self.strength + value
+        else:
+            target = self.strength - value
+        self.strength = min(max(target, 0), self.limit)
+
+    def add_pulses(self, frames):
+        self.frames_received += len(frames)
+        space = self.queue_max - len(self.pulse_queue)
+        if len(frames) > space:
+            self.frames_dropped += len(frames) - max(space, 0)
+            frames = frames[:max(space, 0)]
+        self.pulse_queue.extend(frames)
+        if frames:
+            self.playing = True
+
+    def clear(self):
+        self.pulse_queue.clear()
+        self.playing = False
+        self.clears += 1
+
+    def tick(self):
+        """消耗一幀 (100ms) 波形"""
+        if self.pulse_queue:
+            self.pulse_queue.popleft()
+            self.frames_played += 1
+        elif self.playing:
+            self.underruns += 1
+
+
+class AppSimulator:
+    """
+    模擬 DG-LAB App: 連接並綁定到終端, 處理 strength / pulse / clear 指令, 強度變化後回報
+    """
+
+    def __init__(self, url, limit_a=100, limit_b=100, latency=0.0, jitter=0.0, disconnect_interval=None,
+                 reconnect_delay=1.0, queue_max=APP_PULSE_QUEUE_MAX_LENGTH, seed=None):
+        """
+        :param url: 二維碼內容或 ws://host:port/<clientId>
+        :param latency: 收到指令到執行之間的延遲 (秒), 模擬網路與 App 處理耗時
+        :param jitter: 延遲的隨機增量上限 (秒), 指令仍按收到的順序執行
+        :param disconnect_interval: 平均每隔多少秒主動斷開一次連接 (指數分佈), None 表示不斷線
+        :param reconnect_delay: 斷開後重新連接前的等待時間 (秒)
+        """
+        self.ws_url, self.client_id = parse_qrcode_url(url)
+        self.latency = latency
+        self.jitter = jitter
+        self.disconnect_interval = disconnect_interval
+        self.reconnect_delay = reconnect_delay
+        self.random = random.Random(seed)
+        self.channels = {
+            Channel.A: SimulatedChannel(Channel.A, limit_a, queue_max),
+            Channel.B: SimulatedChannel(Channel.B, limit_b, queue_max),
+        }
+        self.websocket = None
+        self.app_id = None
+        self.bound = asyncio.Event()
+        self.stopped = False
+        self.binds = 0
+        self.disconnects = 0
+        self.messages_received = 0
+        self.reports_sent = 0
+
+    async def run(self):
+        """連接並處理指令, 被注入斷線後重新連接, 直到調用 stop"""
+        while not self.stopped:
+            try:
+                async with websockets.connect(self.ws_url) as ws:
+                    self.websocket = ws
+                    await self._session(ws)
+            except (OSError, websockets.ConnectionClosed) as e:
+                logger.warning(f"模擬 App 連接中斷: {e}")
+            finally:
+                self.websocket = None
+                self.bound.clear()
+            if not self.stopped:
+                await asyncio.sleep(self.reconnect_delay)
+
+    def stop(self):
+        self.stopped = True
+        if self.websocket is not None:
+            asyncio.create_task(self.websocket.close())
+
+    async def _session(self, ws):
+        commands = asyncio.Queue()
+        tasks = [asyncio.create_task(self._execute_commands(commands)),
+                 asyncio.create_task(self._play_pulses())]
+        if self.disconnect_interval:
+            tasks.append(asyncio.create_task(self._inject_disconnect(ws)))
+        try:
+            loop = asyncio.get_running_loop()
+            async for raw in ws:
+                message = json.loads(raw)
+                message_type = message.get('type')
+                content = message.get('message')
+                if message_type == MessageType.BIND and content == MessageDataHead.TARGET_ID:
+                    # 伺服器分配 App 端 ID 後, 以二維碼中的終端 ID 請求綁定
+                    self.app_id = message['clientId']
+                    await self._send(MessageType.BIND, MessageDataHead.DG_LAB)
+                elif message_type == MessageType.BIND and content == str(RetCode.SUCCESS.value):
+                    self.binds += 1
+                    self.bound.set()
+                    logger.info(f"模擬 App 已綁定 (第 {self.binds} 次)")
+                    await self.report_strength()
+                elif message_type == MessageType.MSG:
+                    self.messages_received += 1
+                    delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+                    commands.put_nowait((loop.time() + delay, content))
+                elif message_type == MessageType.BREAK:
+                    logger.info("終端已斷開, 等待重新綁定")
+                elif message_type != MessageType.HEARTBEAT:
+                    logger.warning(f"模擬 App 收到未處理的消息: {message}")
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _execute_commands(self, commands):
+        """按收到的順序執行指令, 每條指令不早於其延遲到期時間"""
+        loop = asyncio.get_running_loop()
+        while True:
+            due, content = await commands.get()
+            wait = due - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                await self.handle_command(content)
+            except (ValueError, IndexError, KeyError) as e:
+                logger.warning(f"無法解析指令 {content}: {e}")
+
+    async def handle_command(self, content):
+        head, _, body = content.partition('-')
+        if head == MessageDataHead.STRENGTH:
+            channel, operation, value = (int(part) for part in body.split('+'))
+            self.channels[Channel(channel)].apply_strength(StrengthOperationType(operation), value)
+            await self.report_strength()
+        elif head == MessageDataHead.PULSE:
+            channel_name, _, frames = body.partition(':')
+            self.channels[Channel[channel_name]].add_pulses(json.loads(frames))
+        elif head == MessageDataHead.CLEAR:
+            self.channels[Channel(int(body))].clear()
+        else:
+            logger.warning(f"模擬 App 收到未知指令: {content}")
+
+    async def _play_pulses(self):
+        """每 100ms 從兩個通道各消耗一幀, 按絕對時間排程避免累積漂移"""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            next_tick += PULSE_FRAME_DURATION
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            for channel in self.channels.values():
+                channel.tick()
+
+    async def _inject_disconnect(self, ws):
+        await asyncio.sleep(self.random.expovariate(1 / self.disconnect_interval))
+        self.disconnects += 1
+        logger.info(f"注入斷線 (第 {self.disconnects} 次)")
+        await ws.close()
+
+    async def _send(self, message_type, content):
+        if self.websocket is None:
+            return
+        await self.websocket.send(json.dumps({
+            'type': message_type.value,
+            'clientId': self.client_id,
+            'targetId': self.app_id,
+            'message': content,
+        }))
+
+    async def report_strength(self):
+        """回報兩個通道的強度與上限, 格式與 App 相同: strength-A+B+A上限+B上限"""
+        a, b = self.channels[Channel.A], self.channels[Channel.B]
+        await self._send(MessageType.MSG, f"{MessageDataHead.STRENGTH.value}-{a.strength}+{b.strength}+{a.limit}+{b.limit}")
+        self.reports_sent += 1
+
+    async def set_limit(self, channel, limit):
+        """模擬用戶在 App 中修改強度上限"""
+        sim_channel = self.channels[channel]
+        sim_channel.limit = limit
+        sim_channel.strength = min(sim_channel.strength, limit)
+        await self.report_strength()
+
+    async def press_feedback(self, index):
+        """模擬 App 回饋按鈕, index 為 0-9"""
+        await self._send(MessageType.MSG, f"{MessageDataHead.FEEDBACK.value}-{index}")
+
+    def stats(self):
+        result = {'binds': self.binds, 'disconnects': self.disconnects,
+                  'messages': self.messages_received, 'reports': self.reports_sent}
+        for channel in self.channels.values():
+            prefix = channel.channel.name
+            result.update({
+                f'{prefix}_strength': channel.strength,
+                f'{prefix}_queue': len(channel.pulse_queue),
+                f'{prefix}_received': channel.frames_received,
+                f'{prefix}_played': channel.frames_played,
+                f'{prefix}_dropped': channel.frames_dropped,
+                f'{prefix}_underruns': channel.underruns,
+                f'{prefix}_clears': channel.clears,
+            })
+        return result
+
+
+async def report_periodically(simulator, interval):
+    while True:
+        await asyncio.sleep(interval)
+        logger.info(" ".join(f"{key}={value}" for key, value in simulator.stats().items()))
+
+
+async def self_test(args):
+    """
+    在本機啟動 DGLabWSServer 與 DGLabController, 用模擬 App 連接, 隨機調整強度並檢查回報結果
+    :return: 是否通過
+    """
+    from pydglab_ws import DGLabWSServer
+    from pythonosc import udp_client
+    from dglab_controller import DGLabController
+
+    async with DGLabWSServer('127.0.0.1', args.port, 60) as server:
+        client = server.new_local_client()
+        controller = DGLabController(client, udp_client.SimpleUDPClient('127.0.0.1', 9000), None)
+        controller_task = asyncio.create_task(controller.process_app_data())
+
+        simulator = AppSimulator(client.get_qrcode(f"ws://127.0.0.1:{args.port}"), latency=args.latency,
+                                 jitter=args.jitter, disconnect_interval=args.disconnect_interval,
+                                 reconnect_delay=args.reconnect_delay, seed=args.seed)
+        tasks = [asyncio.create_task(simulator.run()),
+                 asyncio.create_task(report_periodically(simulator, args.report_interval))]
+        rng = random.Random(args.seed)
+        loop = asyncio.get_running_loop()
+        end = loop.time() + args.self_test
+        targets = {Channel.A: 0, Channel.B: 0}
+        while loop.time() < end:
+            await asyncio.sleep(0.2)
+            if not (simulator.bound.is_set() and controller.app_status_online):
+                continue
+            channel = rng.choice((Channel.A, Channel.B))
+            targets[channel] = rng.randint(0, simulator.channels[channel].limit)
+            await controller.strength.set_strength(channel, StrengthOperationType.SET_TO, targets[channel])
+
+        # 停止發送後等待最後的指令執行完畢
+        await asyncio.sleep(args.latency + args.jitter + 0.5)
+        stats = simulator.stats()
+        simulator.stop()
+        for task in (*tasks, controller_task):
+            task.cancel()
+        controller.close()
+
+    logger.info(" ".join(f"{key}={value}" for key, value in stats.items()))
+    passed = stats['binds'] >= 1 and stats['binds'] >= stats['disconnects']
+    for channel in (Channel.A, Channel.B):
+        if simulator.bound.is_set() and stats[f'{channel.name}_strength'] != targets[channel]:
+            logger.error(f"{channel.name} 通道強度 {stats[f'{channel.name}_strength']} 與目標 {targets[channel]} 不一致")
+            passed = False
+        if stats[f'{channel.name}_played'] == 0:
+            logger.error(f"{channel.name} 通道沒有播放任何波形")
+            passed = False
+    logger.info("自測通過" if passed else "自測失敗")
+    return passed
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="DG-LAB App 模擬器")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--url', help="二維碼內容或 ws://host:port/<clientId>")
+    target.add_argument('--self-test', type=float, metavar='SECONDS', help="在本機啟動伺服器與控制器並運行指定秒數")
+    parser.add_argument('--port', type=int, default=56789, help="自測時伺服器使用的埠")
+    parser.add_argument('--limit-a', type=int, default=100)
+    parser.add_argument('--limit-b', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.0, help="指令執行延遲 (秒)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="延遲隨機增量上限 (秒)")
+    parser.add_argument('--disconnect-interval', type=float, help="平均斷線間隔 (秒)")
+    parser.add_argument('--reconnect-delay', type=float, default=1.0)
+    parser.add_argument('--report-interval', type=float, default=5.0, help="統計輸出間隔 (秒)")
+    parser.add_argument('--seed', type=int)
+    return parser.parse_args()
+
+
+async def run_simulator(args):
+    simulator = AppSimulator(args.url, limit_a=args.limit_a, limit_b=args.limit_b, latency=args.latency,
+                             jitter=args.jitter, disconnect_interval=args.disconnect_interval,
+                             reconnect_delay=args.reconnect_delay, seed=args.seed)
+    reporter = asyncio.create_task(report_periodically(simulator, args.report_interval))
+    try:
+        await simulator.run()
+    finally:
+        reporter.cancel()
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    try:
+        if args.self_test:
+            sys.exit(0 if asyncio.run(self_test(args)) else 1)
+        asyncio.run(run_simulator(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
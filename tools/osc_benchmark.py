@@ -0,0 +1,248 @@
+"""
+osc_benchmark.py
+OSC -> 控制器 -> WebSocket 熱路徑基準測試: 在獨立進程中向 OSC 埠發送模擬 VRChat 流量,
+以無界面模式的接線 (OSCService + DGLabController + DGLabWSServer) 處理, App 端由 dglab_app_simulator 代替
+
+    python tools/osc_benchmark.py                       # 運行全部場景並與基準文件比較
+    python tools/osc_benchmark.py --scenario physbone --duration 20
+    python tools/osc_benchmark.py --update-baseline     # 將本次結果寫入基準文件
+
+各場景報告: 持續處理的數據包速率, 延遲記錄的分階段分位數, 強度寫入數量, 事件循環延遲與 CPU 佔用
+CPU 佔用為測試進程 (含模擬 App) 的進程時間 / 實際時間, 發送流量的進程不計入
+"""
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from pydglab_ws import DGLabWSServer
+from pythonosc import udp_client
+from pythonosc.osc_message_builder import build_msg
+
+from config import load_osc_addresses
+from dglab_controller import DGLabController
+from latency import latency_tracker, LatencyHistogram, TOTAL
+from osc_service import OSCService
+from dglab_app_simulator import AppSimulator
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'osc_benchmark_baseline.json')
+
+NOISE_PARAMETER_COUNT = 3000  # 模型上與本程序無關的參數數量
+SOUNDPAD_BUTTONS = (
+    "/avatar/parameters/SoundPad/Button/3",
+    "/avatar/parameters/SoundPad/Button/4",
+    "/avatar/parameters/SoundPad/Button/5",
+)
+
+# 場景 -> 各類流量的速率: noise 為每秒數據包數, physbone 為每個地址每秒數據包數, buttons 為每秒按下/鬆開對數
+SCENARIOS = {
+    'noise': {'noise': 8000, 'physbone': 0, 'buttons': 0},
+    'physbone': {'noise': 2000, 'physbone': 90, 'buttons': 0},
+    'soundpad': {'noise': 2000, 'physbone': 0, 'buttons': 10},
+    'mixed': {'noise': 6000, 'physbone': 90, 'buttons': 10},
+}
+
+
+def physbone_addresses(osc_addresses):
+    """將自訂地址中的 * 展開為具體參數名, 模擬多個 Contact / PhysBone 參數"""
+    addresses = []
+    for addr in osc_addresses:
+        address = addr['address']
+        if '*' in address:
+            addresses.extend(address.replace('*', f'Bench_{i}') for i in range(3))
+        else:
+            addresses.append(address)
+    return addresses
+
+
+def generate_traffic(port, rates, physbone_addrs, duration, result):
+    """
+    在獨立進程中按速率發送 OSC 數據包, 發送總數寫入 result
+    每毫秒補發落後的數據包, 按流量類型分別計數
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    target = ('127.0.0.1', port)
+    noise_packets = []
+    for i in range(NOISE_PARAMETER_COUNT):
+        address = f"/avatar/parameters/Noise/Param_{i}"
+        noise_packets.append(build_msg(address, [i % 7 / 7.0]).dgram if i % 3 else build_msg(address, [i % 2 == 0]).dgram)
+    streams = []  # [每秒數量, 生成第 n 個數據包的函數, 已發送數量]
+    if rates['noise']:
+        streams.append([rates['noise'], lambda n: noise_packets[n % len(noise_packets)], 0])
+    for index, address in enumerate(physbone_addrs if rates['physbone'] else ()):
+        # 每個地址發送相位不同的正弦波, 模擬拉伸動骨
+        streams.append([rates['physbone'], lambda n, a=address, p=index: build_msg(
+            a, [0.5 + 0.5 * math.sin(n / 15 + p)]).dgram, 0])
+    if rates['buttons']:
+        # 每對為按下與鬆開, 依次輪換按鍵
+        streams.append([rates['buttons'] * 2, lambda n: build_msg(
+            SOUNDPAD_BUTTONS[n // 2 % len(SOUNDPAD_BUTTONS)], [n % 2 == 0]).dgram, 0])
+
+    start = time.perf_counter()
+    sent = 0
+    while (elapsed := time.perf_counter() - start) < duration:
+        for stream in streams:
+            due = int(elapsed * stream[0])
+            while stream[2] < due:
+                sock.sendto(stream[1](stream[2]), target)
+                stream[2] += 1
+                sent += 1
+        time.sleep(0.001)
+    result.value = sent
+    sock.close()
+
+
+async def sample_loop_lag(histogram, interval=0.005):
+    """每隔 interval 秒醒來一次, 記錄實際醒來時間與預期時間之差"""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        histogram.record(max(0.0, loop.time() - expected))
+
+
+def merged_percentiles(stage):
+    """合併同一階段所有來源與通道的直方圖, 返回 (p50, p99) 毫秒"""
+    merged = LatencyHistogram()
+    for (hist_stage, _, _), histogram in latency_tracker.histograms.items():
+        if hist_stage != stage:
+            continue
+        for index, count in enumerate(histogram.counts):
+            merged.counts[index] += count
+        merged.count += histogram.count
+        merged.max = max(merged.max, histogram.max)
+    return merged.percentile(50) * 1000, merged.percentile(99) * 1000
+
+
+async def run_scenario(name, rates, args):
+    latency_tracker.enabled = True
+    latency_tracker.reset()
+    osc_addresses = load_osc_addresses()
+    async with DGLabWSServer('127.0.0.1', args.ws_port, 60) as server:
+        client = server.new_local_client()
+        controller = DGLabController(client, udp_client.SimpleUDPClient('127.0.0.1', 9000), None)
+        controller.is_dynamic_bone_mode_a = True
+        controller.is_dynamic_bone_mode_b = True
+        controller_task = asyncio.create_task(controller.process_app_data())
+        osc_service = OSCService({})
+        await osc_service.start(args.osc_port)
+        osc_service.update_mappings(controller, osc_addresses)
+
+        simulator = AppSimulator(client.get_qrcode(f"ws://127.0.0.1:{args.ws_port}"))
+        simulator_task = asyncio.create_task(simulator.run())
+        await asyncio.wait_for(simulator.bound.wait(), 5)
+        while not controller.app_status_online:
+            await asyncio.sleep(0.05)
+
+        loop_lag = LatencyHistogram()
+        lag_task = asyncio.create_task(sample_loop_lag(loop_lag))
+        context = multiprocessing.get_context('spawn')
+        sent = context.Value('q', 0)
+        sender = context.Process(target=generate_traffic, args=(
+            args.osc_port, {key: value * args.scale for key, value in rates.items()},
+            physbone_addresses(osc_addresses), args.duration, sent))
+
+        address_filter = osc_service.osc_address_filter
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        sender.start()
+        while sender.is_alive():
+            await asyncio.sleep(0.05)
+        await asyncio.sleep(0.5)  # 等待隊列中的消息與設備回報處理完畢
+        wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+
+        received = address_filter.accepted_packets + address_filter.dropped_packets
+        mailbox_dropped = sum(stats[2] for stats in osc_service.osc_mailboxes.get_stats())
+        result = {
+            'packets_sent': sent.value,
+            'packets_received': received,
+            'packets_per_second': round(received / args.duration),
+            'packets_accepted': address_filter.accepted_packets,
+            'mailbox_dropped': mailbox_dropped,
+            'strength_writes_sent': controller.strength.writes_sent,
+            'strength_writes_skipped': controller.strength.writes_skipped,
+            'app_messages': simulator.messages_received,
+            'loop_lag_p50_ms': round(loop_lag.percentile(50) * 1000, 3),
+            'loop_lag_p99_ms': round(loop_lag.percentile(99) * 1000, 3),
+            'loop_lag_max_ms': round(loop_lag.max * 1000, 3),
+            'cpu_percent': round(cpu / wall * 100, 1),
+        }
+        for stage in ('dispatch', 'handler', TOTAL):
+            p50, p99 = merged_percentiles(stage)
+            result[f'{stage}_p50_ms'] = round(p50, 3)
+            result[f'{stage}_p99_ms'] = round(p99, 3)
+
+        for task in (lag_task, simulator_task, controller_task):
+            task.cancel()
+        controller.close()
+        simulator.stop()
+        osc_service.close()
+    return result
+
+
+def compare(results, baseline):
+    """按場景輸出各指標與基準的差異"""
+    for name, result in results.items():
+        base = baseline.get(name, {})
+        print(f"\n== {name} ==")
+        print(f"{'metric':<26}{'baseline':>12}{'current':>12}{'change':>10}")
+        for metric, value in result.items():
+            base_value = base.get(metric)
+            if base_value in (None, 0):
+                change = ''
+            else:
+                change = f"{(value - base_value) / base_value * 100:+.1f}%"
+            print(f"{metric:<26}{'' if base_value is None else base_value:>12}{value:>12}{change:>10}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="OSC 熱路徑基準測試")
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS), help="運行的場景, 可重複, 預設全部")
+    parser.add_argument('--duration', type=float, default=10.0, help="每個場景發送流量的時長 (秒)")
+    parser.add_argument('--scale', type=float, default=1.0, help="所有流量速率的倍數")
+    parser.add_argument('--osc-port', type=int, default=59001)
+    parser.add_argument('--ws-port', type=int, default=56790)
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="基準文件路徑")
+    parser.add_argument('--update-baseline', action='store_true', help="將本次結果寫入基準文件")
+    return parser.parse_args()
+
+
+async def run_all(args):
+    results = {}
+    for name in args.scenario or SCENARIOS:
+        logger.info(f"運行場景 {name}")
+        results[name] = await run_scenario(name, SCENARIOS[name], args)
+    return results
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logger.setLevel(logging.INFO)
+    results = asyncio.run(run_all(args))
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    compare(results, baseline)
+    if args.update_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\n基準已更新: {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+plot_response_curves.py
+繪製 config.yml 中各 OSC 地址的響應曲線 (輸入 0-1 -> 強度), 便於離線調整曲線參數
+
+    python tools/plot_response_curves.py                                  # 當前目錄 config.yml 中的全部地址
+    python tools/plot_response_curves.py --limit 80 --output curves.png   # 按強度上限 80 繪製並保存圖片
+    python tools/plot_response_curves.py --curve "curve=gamma,gamma=2.2,deadzone=0.1,min=0"
+
+安裝了 matplotlib 時繪製圖表, 否則在終端輸出字符圖
+平滑與遲滯與輸入的時間序列有關, 此處只繪製靜態映射
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import yaml
+
+from config import load_osc_addresses
+from response_curve import ResponseCurve, DEFAULT_CURVE_CONFIG
+
+try:
+    import matplotlib
+except ImportError:
+    matplotlib = None
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+ASCII_WIDTH = 64
+ASCII_HEIGHT = 20
+ASCII_MARKS = '*o+x#@%&'
+
+
+def parse_curve_arg(text):
+    """'curve=gamma,gamma=2.2' -> {'curve': 'gamma', 'gamma': 2.2}, 值按 YAML 解析"""
+    config = {}
+    for item in filter(None, text.split(',')):
+        key, _, value = item.partition('=')
+        config[key.strip()] = yaml.safe_load(value)
+    return config
+
+
+def collect_curves(args):
+    """:return: [(名稱, ResponseCurve)]"""
+    curves = []
+    if not args.curve:
+        curves.append(("default", ResponseCurve()))
+        for addr in load_osc_addresses():
+            if addr.get('curve'):
+                curves.append((addr['address'], ResponseCurve.from_config(addr['curve'])))  # 與運行時相同, 無效配置使用默認曲線
+    for text in args.curve or ():
+        curves.append((text, ResponseCurve(parse_curve_arg(text))))
+    return curves
+
+
+def sample(curve, limit, points):
+    """使用與運行時相同的計算方式 (線性曲線直接計算, 其他曲線查表) 取樣"""
+    inputs = [i / (points - 1) for i in range(points)]
+    return inputs, [curve.strength(value, limit) for value in inputs]
+
+
+def plot_matplotlib(curves, limit, output):
+    if output:
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(8, 5))
+    for name, curve in curves:
+        inputs, strengths = sample(curve, limit, 501)
+        ax.step(inputs, strengths, where='post', label=name)
+    ax.set_xlabel("OSC input")
+    ax.set_ylabel(f"strength (limit {limit})")
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0, limit * 1.05 if limit else 1)
+    ax.grid(True, alpha=0.3)
+    ax.legend(fontsize='small')
+    fig.tight_layout()
+    if output:
+        fig.savefig(output, dpi=120)
+        print(f"已保存到 {output}")
+    else:
+        plt.show()
+
+
+def plot_ascii(curves, limit):
+    grid = [[' '] * ASCII_WIDTH for _ in range(ASCII_HEIGHT)]
+    for (name, curve), mark in zip(curves, ASCII_MARKS):
+        _, strengths = sample(curve, limit, ASCII_WIDTH)
+        for column, strength in enumerate(strengths):
+            row = ASCII_HEIGHT - 1 - round(strength / limit * (ASCII_HEIGHT - 1)) if limit else ASCII_HEIGHT - 1
+            grid[row][column] = mark
+    for index, line in enumerate(grid):
+        label = f"{limit * (ASCII_HEIGHT - 1 - index) / (ASCII_HEIGHT - 1):5.0f} |" if index % 5 == 0 else "      |"
+        print(label + ''.join(line))
+    print("      +" + '-' * ASCII_WIDTH)
+    print("       0" + ' ' * (ASCII_WIDTH - 2) + "1")
+    for (name, curve), mark in zip(curves, ASCII_MARKS):
+        changed = {key: value for key, value in curve.config.items() if DEFAULT_CURVE_CONFIG[key] != value}
+        print(f"  {mark} {name}: {changed or 'default'}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="繪製 OSC 地址的響應曲線")
+    parser.add_argument('--limit', type=int, default=100, help="繪製時使用的強度上限")
+    parser.add_argument('--curve', action='append', metavar='PARAMS',
+                        help="直接繪製指定參數的曲線 (可重複), 例如 curve=gamma,gamma=2,min=0")
+    parser.add_argument('--output', help="保存圖片的路徑, 預設打開窗口 (需要 matplotlib)")
+    parser.add_argument('--ascii', action='store_true', help="即使安裝了 matplotlib 也輸出字符圖")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    curves = collect_curves(args)
+    if matplotlib is None or args.ascii:
+        if args.output:
+            logger.warning("未安裝 matplotlib, 無法保存圖片, 改為輸出字符圖")
+        plot_ascii(curves, args.limit)
+    else:
+        plot_matplotlib(curves, args.limit, args.output)
+
+
+if __name__ == '__main__':
+    main()
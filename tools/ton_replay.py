@@ -0,0 +1,303 @@
+"""
+ton_replay.py
+ToNSaveManager WebSocket API 的錄製與重放: 在沒有遊戲的環境中驅動 ToN 遊戲聯動
+
+    python tools/ton_replay.py record session.ton                       # 錄製 ws://localhost:11398 的事件
+    python tools/ton_replay.py generate storm.ton --storm 60 --rate 20    # 生成傷害風暴
+    python tools/ton_replay.py generate deaths.ton --deaths 5             # 生成死亡/復活循環
+    python tools/ton_replay.py serve session.ton --speed 4 --loop         # 在 11398 埠重放, 4 倍速
+    python tools/ton_replay.py bench storm.ton --speed 0                  # 離線運行傷害系統並報告強度寫入
+
+錄製文件每行為 "相對時間(秒)<TAB>原始消息", 文件名以 .gz 結尾時使用 gzip 壓縮
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import websockets
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_URL = "ws://localhost:11398"
+DEFAULT_PORT = 11398
+STATS_INTERVAL = 0.1  # ToNSaveManager 最快的設置更新速率
+
+
+def open_recording(path, mode):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def load_recording(path):
+    """:return: [(相對時間, 原始消息)]"""
+    events = []
+    with open_recording(path, 'r') as f:
+        for line in f:
+            offset, _, message = line.rstrip('\n').partition('\t')
+            if message:
+                events.append((float(offset), message))
+    return events
+
+
+def save_recording(path, events):
+    with open_recording(path, 'w') as f:
+        for offset, message in events:
+            f.write(f"{offset:.3f}\t{message}\n")
+    logger.info(f"已寫入 {len(events)} 個事件到 {path}")
+
+
+def event(event_type, **fields):
+    return json.dumps({"Type": event_type, **fields}, separators=(',', ':'))
+
+
+def connected_event(display_name):
+    return event("CONNECTED", DisplayName=display_name, Args=[])
+
+
+def stats_events(duration, display_name, start=0.0):
+    """與 ToNSaveManager 相同的週期性 STATS 更新, 名稱不變時應被用戶端忽略"""
+    count = int(duration / STATS_INTERVAL)
+    return [(start + i * STATS_INTERVAL, event("STATS", DisplayName=display_name)) for i in range(count)]
+
+
+def generate_damage_storm(duration, rate, min_damage=1, max_damage=20, display_name="Replay", seed=None):
+    """
+    持續 duration 秒, 平均每秒 rate 次 (泊松分佈) 受到隨機傷害
+    """
+    rng = random.Random(seed)
+    events = [(0.0, connected_event(display_name)), (0.0, event("ALIVE", Value=True))]
+    t = 0.0
+    while True:
+        t += rng.expovariate(rate)
+        if t >= duration:
+            break
+        events.append((t, event("DAMAGED", Value=rng.randint(min_damage, max_damage))))
+    events.extend(stats_events(duration, display_name))
+    return sorted(events, key=lambda item: item[0])
+
+
+def generate_death_cycles(cycles, alive_time=20.0, respawn_time=10.0, damage_rate=1.0, display_name="Replay", seed=None):
+    """
+    每個循環: 存活 alive_time 秒 (期間受到少量傷害) 後死亡, respawn_time 秒後存檔更新並復活
+    """
+    rng = random.Random(seed)
+    events = [(0.0, connected_event(display_name))]
+    t = 0.0
+    for _ in range(cycles):
+        events.append((t, event("ALIVE", Value=True)))
+        death_time = t + alive_time
+        hit = t + rng.expovariate(damage_rate)
+        while hit < death_time:
+            events.append((hit, event("DAMAGED", Value=rng.randint(5, 30))))
+            hit += rng.expovariate(damage_rate)
+        events.append((death_time, event("ALIVE", Value=False)))
+        t = death_time + respawn_time
+        events.append((t, event("SAVED", Value="")))
+    events.extend(stats_events(t, display_name))
+    return sorted(events, key=lambda item: item[0])
+
+
+async def record(args):
+    events = []
+    start = None
+    try:
+        async with websockets.connect(args.url) as ws:
+            logger.info(f"已連接 {args.url}, 按 Ctrl+C 結束錄製")
+            async for message in ws:
+                now = time.monotonic()
+                start = start if start is not None else now
+                events.append((now - start, message))
+                if args.duration and now - start >= args.duration:
+                    break
+    except (asyncio.CancelledError, KeyboardInterrupt):
+        pass
+    finally:
+        save_recording(args.file, events)
+
+
+async def play(ws, events, speed, loop):
+    """
+    按時間戳向一個連接發送事件, speed 為 0 時不等待
+    :return: 發送的事件數量
+    """
+    sent = 0
+    while True:
+        start = time.monotonic()
+        for offset, message in events:
+            if speed:
+                wait = start + offset / speed - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            await ws.send(message)
+            sent += 1
+        if not loop:
+            return sent
+
+
+async def serve(args, ready=None):
+    """
+    在本機啟動替代 ToNSaveManager 的伺服器, 每個連接獨立從頭重放
+    :param ready: 開始監聽後設置的 asyncio.Event
+    """
+    events = load_recording(args.file)
+    done = asyncio.Event()
+
+    async def handler(ws, *_):
+        logger.info(f"用戶端已連接, 開始重放 {len(events)} 個事件")
+        start = time.monotonic()
+        try:
+            sent = await play(ws, events, args.speed, args.loop)
+        except websockets.ConnectionClosed:
+            logger.info("用戶端已斷開")
+            return
+        elapsed = time.monotonic() - start
+        logger.info(f"重放完成: {sent} 個事件, 用時 {elapsed:.2f}s ({sent / max(elapsed, 1e-6):.0f} 事件/s)")
+        if args.once:
+            done.set()
+        await asyncio.sleep(args.linger)
+
+    async with websockets.serve(handler, args.host, args.port):
+        logger.info(f"ToN 重放伺服器監聽 ws://{args.host}:{args.port}")
+        if ready is not None:
+            ready.set()
+        await done.wait()
+
+
+async def bench(args):
+    """
+    對重放伺服器運行 ToN 傷害系統, 設備由 dglab_app_simulator 代替, 報告強度寫入速率與死亡懲罰時長
+    """
+    from pydglab_ws import DGLabWSServer
+    from pythonosc import udp_client
+    from dglab_controller import DGLabController
+    from dglab_app_simulator import AppSimulator
+    from latency import latency_tracker, SOURCE_TON, TOTAL
+    from ton_damage import TonDamageSystem
+    from ton_websocket_handler import WebSocketClient
+
+    latency_tracker.reset()
+    args.once = True
+    ready = asyncio.Event()
+    server_task = asyncio.create_task(serve(args, ready))
+    await ready.wait()
+
+    async with DGLabWSServer('127.0.0.1', args.ws_port, 60) as server:
+        client = server.new_local_client()
+        controller = DGLabController(client, udp_client.SimpleUDPClient('127.0.0.1', 9000), None)
+        controller_task = asyncio.create_task(controller.process_app_data())
+        simulator = AppSimulator(client.get_qrcode(f"ws://127.0.0.1:{args.ws_port}"))
+        simulator_task = asyncio.create_task(simulator.run())
+        await asyncio.wait_for(simulator.bound.wait(), 5)
+        while not controller.last_strength:
+            await asyncio.sleep(0.05)
+
+        damage_system = TonDamageSystem(lambda: controller)
+        penalty_durations = []
+        trigger_death_penalty = damage_system.trigger_death_penalty
+
+        async def timed_death_penalty():
+            start = time.monotonic()
+            await trigger_death_penalty()
+            penalty_durations.append(time.monotonic() - start)
+        damage_system.trigger_death_penalty = timed_death_penalty
+
+        events_received = 0
+
+        def on_event(ton_event):
+            nonlocal events_received
+            events_received += 1
+            damage_system.handle_event(ton_event)
+
+        ton_client = WebSocketClient(f"ws://127.0.0.1:{args.port}", on_event=on_event)
+        damage_system.start()
+        start = time.monotonic()
+        ton_task = asyncio.create_task(ton_client.start_connection())
+        await server_task  # 重放結束
+        await asyncio.sleep(damage_system.death_penalty_time + 1)  # 等待最後的死亡懲罰結束
+        elapsed = time.monotonic() - start
+
+        damage_system.stop()
+        simulator.stop()
+        for task in (ton_task, simulator_task, controller_task):
+            task.cancel()
+        controller.close()
+
+    strength = controller.strength
+    print(f"events delivered        {events_received}")
+    print(f"elapsed                 {elapsed:.2f}s")
+    print(f"strength writes sent    {strength.writes_sent} ({strength.writes_sent / elapsed:.1f}/s)")
+    print(f"strength writes skipped {strength.writes_skipped}")
+    print(f"app commands received   {simulator.messages_received}")
+    print(f"final damage            {damage_system.damage:.1f}")
+    if penalty_durations:
+        print(f"death penalties         {len(penalty_durations)} "
+              f"(mean {sum(penalty_durations) / len(penalty_durations):.3f}s, max {max(penalty_durations):.3f}s, "
+              f"configured {damage_system.death_penalty_time}s)")
+    for _, source, channel_name, count, p50, p95, p99, _ in latency_tracker.summary(TOTAL):
+        if source == SOURCE_TON:
+            print(f"ton -> ack {channel_name}         p50 {p50:.1f}ms p95 {p95:.1f}ms p99 {p99:.1f}ms (n={count})")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="ToNSaveManager 事件錄製與重放")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = commands.add_parser('record', help="錄製 ToNSaveManager 事件")
+    record_parser.add_argument('file')
+    record_parser.add_argument('--url', default=DEFAULT_URL)
+    record_parser.add_argument('--duration', type=float, help="錄製時長 (秒), 預設直到 Ctrl+C")
+
+    generate_parser = commands.add_parser('generate', help="生成合成事件")
+    generate_parser.add_argument('file')
+    kind = generate_parser.add_mutually_exclusive_group(required=True)
+    kind.add_argument('--storm', type=float, metavar='SECONDS', help="傷害風暴時長")
+    kind.add_argument('--deaths', type=int, metavar='CYCLES', help="死亡/復活循環次數")
+    generate_parser.add_argument('--rate', type=float, default=10.0, help="傷害風暴每秒平均傷害次數")
+    generate_parser.add_argument('--max-damage', type=int, default=20)
+    generate_parser.add_argument('--alive-time', type=float, default=20.0)
+    generate_parser.add_argument('--respawn-time', type=float, default=10.0)
+    generate_parser.add_argument('--seed', type=int)
+
+    for name, help_text in (('serve', "重放錄製文件"), ('bench', "重放並運行傷害系統, 報告強度寫入")):
+        replay_parser = commands.add_parser(name, help=help_text)
+        replay_parser.add_argument('file')
+        replay_parser.add_argument('--speed', type=float, default=1.0, help="重放倍速, 0 表示不等待")
+        replay_parser.add_argument('--host', default='localhost')
+        replay_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+        replay_parser.add_argument('--loop', action='store_true', help="重放結束後從頭開始")
+        replay_parser.add_argument('--once', action='store_true', help="第一個連接重放完成後退出")
+        replay_parser.add_argument('--linger', type=float, default=1.0, help="重放完成後保持連接的秒數")
+    commands.choices['bench'].add_argument('--ws-port', type=int, default=56791)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING if args.command == 'bench' else logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.command == 'generate':
+        if args.storm:
+            events = generate_damage_storm(args.storm, args.rate, max_damage=args.max_damage, seed=args.seed)
+        else:
+            events = generate_death_cycles(args.deaths, args.alive_time, args.respawn_time, seed=args.seed)
+        save_recording(args.file, events)
+        return
+    command = {'record': record, 'serve': serve, 'bench': bench}[args.command]
+    try:
+        asyncio.run(command(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()